@@ -28,7 +28,14 @@ FONT_NAME = "SimHei"
 FONT_SIZE = 18
 LIFETIME = 7000  # 文字显示时长（毫秒）
 SPAWN_INTERVAL = 1800  # 生成间隔（毫秒）
+SPAWN_ON_START = True  # 点击开始后立即生成第一条（否则等一个生成间隔）
 FLOAT_SPEED = 40  # 漂浮速度（毫秒）
+# 独立渲染进程：漂浮文字与动画在单独进程中运行，打开面板/设置时不卡顿（未连接时在本进程内显示）
+RENDERER_PROCESS = False
+RENDERER_RESTART_MAX_SECONDS = 30  # 渲染进程连续崩溃时重启间隔上限（秒）
+# 以上与下文中性能相关的常量只是默认值：可用环境变量 FLOAT_WORDS_<名称>、设置中的 tuning/<名称>
+# 或本地控制套接字（python tools/tune.py）在运行时覆盖，见 utils/runtime_params.py
+CONTROL_SOCKET_ENABLED = True  # 本地控制套接字（仅当前用户可连接）
 
 # 空闲检测设置
 IDLE_ONLY = True  # 是否仅在空闲时显示
@@ -36,7 +43,7 @@ IDLE_THRESHOLD_SECONDS = 30  # 空闲阈值（秒）
 DEBUG = True  # 调试模式（显示详细日志）
 
 # 文本来源与 AI 配置
-TEXT_SOURCE = "auto"  # auto / local / ai
+TEXT_SOURCE = "auto"  # auto / local / ai / mix
 AI_ENABLED = True
 AI_PROVIDER = "deepseek"
 AI_API_BASE = "https://api.deepseek.com"  # 不带 /v1，后续拼接
@@ -46,10 +53,70 @@ AI_API_KEY = _os.getenv("DEEPSEEK_API_KEY", "")
 AI_MODEL = "deepseek-chat"
 AI_TEMPERATURE = 0.8
 AI_ITEMS_PER_DAY = 50  # 每天生成多少条
+# 本地数据库（AI 文本包、地理编码/天气缓存、展示历史）
+DB_PATH = "data/float_words.db"
+HISTORY_RETENTION_DAYS = 90  # 展示历史保存天数
 AI_CACHE_DIR = "data/ai_cache"
+AI_CACHE_MAX_MB = 20  # AI 缓存总大小上限，超出按最近使用时间淘汰
+AI_CACHE_MAX_DAYS = 30  # AI 文本包保存天数
+CACHE_COMPACT_INTERVAL_SECONDS = 3600  # 后台缓存整理间隔（0 表示不整理）
 AI_TIMEOUT_SECONDS = 60
+# 多个 OpenAI-compatible 端点（对冲请求），例如：
+# [{"base": "https://api.deepseek.com", "model": "deepseek-chat"},
+#  {"base": "https://other.example.com", "model": "some-model", "key_env": "OTHER_API_KEY"}]
+# 为空时只使用 AI_API_BASE / AI_MODEL；key_env 为空的端点使用 DeepSeek Key
+AI_ENDPOINTS = []
+AI_HEDGE_DELAY_SECONDS = 3.0  # 最快端点超过该时间没有结果时，向下一个端点再发一次（0 表示不对冲）
+AI_LATENCY_EWMA_ALPHA = 0.3  # 端点耗时 EWMA 的平滑系数（越大越看重最近一次）
+# 共享 HTTP 客户端（AI/地理编码/天气共用 keep-alive 连接池）
+HTTP_POOL_SIZE = 8  # 每个主机保留的连接数（不小于 AI_PARALLEL_SHARDS）
+HTTP_DEFAULT_TIMEOUT = (5, 15)  # 未登记主机的 (连接, 读取) 超时（秒）
+# 出站请求重试（超时/连接失败/429/5xx）：封顶指数退避 + 抖动
+HTTP_RETRY_ATTEMPTS = 3  # 总尝试次数（1 表示不重试）
+HTTP_RETRY_BASE_DELAY = 0.5  # 首次重试前的最大等待（秒）
+HTTP_RETRY_MAX_DELAY = 8.0  # 单次等待上限（秒）；Retry-After 超过它则不在调用内等待
+AI_RETRY_ATTEMPTS = 2  # AI 请求耗时长，只重试一次
+# 熔断器（每个主机一个）：连续失败 N 次后暂停请求，冷却期后放行一个探测请求
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30  # 首次冷却期（秒），探测失败后加倍
+BREAKER_MAX_RESET_SECONDS = 600  # 冷却期上限（秒）
+# AI 文本包准备失败后的自动重试间隔（指数退避，熔断中则等到可以探测）
+AI_RETRY_BASE_SECONDS = 60
+AI_RETRY_MAX_SECONDS = 1800
+# 后台任务（AI 准备/刷新/预生成）：有界线程池，退出时取消并等待收尾
+TASK_MAX_WORKERS = 2
+TASK_SHUTDOWN_TIMEOUT_SECONDS = 3.0  # 退出时最多等待运行中的任务多少秒（例如写完缓存）
+# AI 工作进程：生成 / 上下文 / 缓存读写放到独立子进程，GUI 进程只接收文本包（崩溃后自动重启）
+AI_WORKER_PROCESS = False
+AI_WORKER_RESTART_MAX_SECONDS = 30  # 连续崩溃时重启间隔上限（秒）
+AI_STREAM_ENABLED = True  # 流式生成：边生成边提供文本
+AI_STREAM_READY_ITEMS = 5  # 流式生成收到多少条后即可开始使用
+# 分片并发生成：把每天的条数拆成多个小请求并发发送（输出越短延迟越低），单个分片失败不影响其它
+AI_PARALLEL_SHARDS = 4
+AI_SHARD_THEMES = ["清晨与开始", "专注与工作", "休息与放松", "傍晚与夜晚"]
+# “刷新今日 AI 文本”时补充生成的条数（替换上下文过期/展示最多的条目）；0 表示完整重新生成
+AI_TOPUP_ITEMS = 15
+# 明日文本包预生成：晚间用户空闲时后台生成，零点直接切换
+AI_PREGEN_ENABLED = True
+AI_PREGEN_AFTER_HOUR = 21  # 几点之后开始尝试
+AI_PREGEN_IDLE_SECONDS = 120  # 用户空闲超过多少秒才生成
+AI_PREGEN_CHECK_SECONDS = 300  # 检查间隔
 AI_FAILOVER_TO_LOCAL = True  # AI 失败时是否回退到本地文本
+# 跨天近重复过滤（MinHash + LSH），写入缓存前剔除与近几天文本过于相似的句子
+AI_DEDUP_ENABLED = True
+AI_DEDUP_THRESHOLD = 0.5  # 估算 Jaccard 相似度 ≥ 该值视为近重复
+AI_DEDUP_RETENTION_DAYS = 14  # 索引保留天数
+AI_DEDUP_MIN_KEEP = 10  # 过滤后至少保留的条数
+# 结构化输出：请求 JSON 格式返回（端点不支持时自动退回普通模式，可在 AI_ENDPOINTS 中用 "json_mode" 单独关闭）
+AI_JSON_MODE = True
+AI_MAX_TOKENS_PER_ITEM = 60  # max_tokens = 条数 × 该值 + 固定余量，避免输出失控
+# 条目校验（对应模板中的约束）：长度、网址、@、#、表情符号；不合格的条目直接丢弃
+AI_ITEM_MIN_CHARS = 4
+AI_ITEM_MAX_CHARS = 28
+AI_REPLACE_REJECTED_MAX = 10  # 丢弃的条目用一次小请求补回，最多补多少条（0 表示不补）
 
+# Prompt 模板版本：修改模板语义时递增，旧的缓存变体不再命中
+AI_PROMPT_TEMPLATE_VERSION = 1
 # Prompt 模板（必须只输出 JSON）
 AI_PROMPT_TEMPLATE = """
 你是一个桌面漂浮文字生成器。请为今天生成 {n} 条简短、温和、不打扰的中文漂浮文字。
@@ -88,6 +155,17 @@ AI_PROMPT_TEMPLATE = """
 
 # 文本文件路径
 TEXT_FILE = "data/texts.txt"
+TEXT_WATCH_ENABLED = True  # 监听文本文件变更并自动重载
+TEXT_WATCH_DEBOUNCE_MS = 300  # 连续写入的去抖间隔（毫秒）
+# 文本库目录：目录中每个 .txt 文件为一个主题分片（按需加载，按行数加权抽样）
+TEXT_CORPUS_DIR = "data/corpus"
+TEXT_CORPUS_MEMORY_MB = 16  # 已加载分片的内存预算（超出按 LRU 卸载）
+TEXT_CORPUS_WORKERS = 2  # 分片扫描/解析线程数
+
+# 混合模式（TEXT_SOURCE = "mix"）：各来源的比例，按平滑加权轮询交错输出
+TEXT_MIX_RATIOS = {"ai": 70, "local": 20, "seasonal": 10}
+# 额外文本包：名称 -> 文件路径（文件存在时才注册）
+TEXT_MIX_PACKS = {"seasonal": "data/packs/seasonal.txt"}
 
 # 天气上下文设置
 WEATHER_ENABLED = False
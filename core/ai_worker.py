@@ -0,0 +1,375 @@
+"""
+AI 后台工作进程（可选，AI_WORKER_PROCESS=True 时启用）
+
+AI 文本包生成的网络请求、JSON 解析、天气/城市上下文与缓存读写都在独立子进程中进行，
+GUI 进程只收到可直接使用的文本包（文本列表），不再与漂浮动画争抢 GIL：
+- 子进程用 multiprocessing（spawn）启动，通过 Pipe 收发 pickle 消息
+- 子进程内每个请求一个线程 + CancelToken，父进程取消时发送 cancel 消息
+- 流式生成收到首批条目时先推送一次部分文本包（event），完整结果随 result 返回
+- 熔断器状态变化转发给父进程（托盘/面板照常显示）
+- 子进程崩溃：进行中的调用以 WorkerCrashed 失败，按退避自动重启
+
+消息格式：
+    父 → 子：("call", id, op, kwargs) / ("cancel", id) / ("stop",)
+    子 → 父：("event", id, name, payload) / ("result", id, ok, payload) / ("breaker", name, snapshot)
+"""
+
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import config as _config
+from utils.resilience import backoff_delay
+from utils.task_executor import CancelToken, TaskCancelled
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+AI_WORKER_PROCESS = bool(getattr(_config, "AI_WORKER_PROCESS", False))
+AI_WORKER_RESTART_MAX_SECONDS = float(getattr(_config, "AI_WORKER_RESTART_MAX_SECONDS", 30))
+TASK_SHUTDOWN_TIMEOUT_SECONDS = float(getattr(_config, "TASK_SHUTDOWN_TIMEOUT_SECONDS", 3.0))
+
+# 子进程最多保留多少个 provider（每个父进程 RemoteTextProvider 对应一个）
+_MAX_CHILD_PROVIDERS = 4
+# 取消后最多再等子进程多久（它通常会带着已收到的部分结果很快返回）
+_CANCEL_GRACE_SECONDS = 5.0
+
+
+class WorkerCrashed(RuntimeError):
+    """工作进程意外退出，调用未完成"""
+
+
+class WorkerError(RuntimeError):
+    """工作进程中调用失败（消息为子进程中的异常）"""
+
+
+# ---------- 子进程 ----------
+
+
+def _pack(provider) -> Dict[str, Any]:
+    """子进程 provider 的当前文本包 → 可 pickle 的紧凑结果"""
+    snap = provider.snapshot
+    pool = provider._pool
+    return {
+        "texts": [pool.get(h, hot_cache=False) for h in snap.items],
+        "ready": snap.ready,
+        "key": snap.key,
+        "failure_ts": provider.last_failure_ts,
+        "timings": dict(provider.last_stage_timings),
+    }
+
+
+def _serve(conn) -> None:
+    """子进程入口：接收调用，逐个在线程中执行，结果写回管道"""
+    import datetime
+
+    from core import settings as app_settings
+    from utils.runtime_params import get_params
+    from core.text_provider.deepseek_provider import DeepSeekTextProvider
+    from core.text_provider.text_pool import get_text_pool
+    from utils.db import get_database
+    from utils.resilience import add_breaker_listener, get_breaker
+
+    send_lock = threading.Lock()
+    providers: "OrderedDict[int, DeepSeekTextProvider]" = OrderedDict()
+    providers_lock = threading.Lock()
+    tokens: Dict[int, CancelToken] = {}
+    threads: List[threading.Thread] = []
+
+    def send(msg: tuple) -> None:
+        with send_lock:
+            try:
+                conn.send(msg)
+            except (OSError, EOFError):
+                pass
+
+    add_breaker_listener(lambda name, _state: send(("breaker", name, get_breaker(name).snapshot())))
+
+    def provider_for(pid: int, date: Optional[str]) -> DeepSeekTextProvider:
+        with providers_lock:
+            provider = providers.get(pid)
+            if provider is None:
+                day = datetime.date.fromisoformat(date) if date else None
+                provider = providers[pid] = DeepSeekTextProvider(target_date=day)
+                while len(providers) > _MAX_CHILD_PROVIDERS:
+                    providers.popitem(last=False)
+            providers.move_to_end(pid)
+            return provider
+
+    def handle(rid: int, op: str, kw: Dict[str, Any], token: CancelToken) -> Any:
+        if op == "ping":
+            return "pong"
+        # 设置（Key、城市、称呼…）在界面进程中修改，子进程的设置快照每次调用前重读
+        app_settings.reload()
+        get_params().replace_source("parent", kw.get("params") or {})
+        provider = provider_for(int(kw["pid"]), kw.get("date"))
+        if op == "prepare":
+            provider.on_ready = lambda p: send(("event", rid, "partial", _pack(p)))
+            try:
+                provider.prepare(token)
+            finally:
+                provider.on_ready = None
+            return _pack(provider)
+        if op == "top_up":
+            shown = kw.get("shown") or {}
+            if shown:
+                provider._shown = {provider._pool.intern(t): int(c) for t, c in shown.items()}
+            ok = provider.top_up(int(kw["n"]), token)
+            return dict(_pack(provider), ok=ok)
+        if op == "invalidate":
+            provider.invalidate_today_cache()
+            return _pack(provider)
+        raise ValueError(f"未知操作: {op}")
+
+    def run(rid: int, op: str, kw: Dict[str, Any], token: CancelToken) -> None:
+        try:
+            send(("result", rid, True, handle(rid, op, kw, token)))
+        except Exception as e:
+            send(("result", rid, False, f"{type(e).__name__}: {e}"))
+        finally:
+            tokens.pop(rid, None)
+            # 每次调用一个线程：结束前关闭本线程的数据库连接
+            get_database().release()
+        # 文本包更换后，子进程自己的文本池中不再引用的文本按代压缩
+        try:
+            get_text_pool().maybe_compact()
+        except Exception as e:
+            if DEBUG:
+                print(f"[Worker] 文本池压缩失败: {e}")
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break  # 父进程已退出
+        kind = msg[0]
+        if kind == "stop":
+            break
+        if kind == "cancel":
+            token = tokens.get(msg[1])
+            if token is not None:
+                token.cancel()
+        elif kind == "call":
+            _kind, rid, op, kw = msg
+            token = tokens[rid] = CancelToken()
+            t = threading.Thread(target=run, args=(rid, op, kw, token), name=f"ai-worker-{op}", daemon=True)
+            threads.append(t)
+            t.start()
+            threads = [x for x in threads if x.is_alive()]
+
+    # 退出：取消进行中的调用，在期限内等它们收尾（写完缓存）
+    for token in list(tokens.values()):
+        token.cancel()
+    end = time.time() + TASK_SHUTDOWN_TIMEOUT_SECONDS
+    for t in threads:
+        t.join(max(0.0, end - time.time()))
+
+
+# ---------- 父进程 ----------
+
+
+class _Call:
+    def __init__(self, on_event: Optional[Callable[[str, Any], None]]) -> None:
+        self.on_event = on_event
+        self.done = threading.Event()
+        self.ok = False
+        self.payload: Any = None
+
+
+class AIWorker:
+    """工作进程客户端（父进程内单例，线程安全）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._proc = None
+        self._conn = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, _Call] = {}
+        self._stopping = False
+        self._crashes = 0  # 连续崩溃次数（成功返回一次后清零）
+        self._breakers: Dict[str, tuple] = {}  # name -> (snapshot, 收到时间)
+        self._breaker_listeners: List[Callable[[str, str], None]] = []
+
+    # ---------- 生命周期 ----------
+
+    def _ensure_started_locked(self) -> None:
+        if self._proc is not None and self._proc.is_alive():
+            return
+        if self._stopping:
+            raise WorkerCrashed("工作进程已停止")
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_serve, args=(child_conn,), name="float-words-ai", daemon=True)
+        proc.start()
+        child_conn.close()
+        self._proc, self._conn = proc, parent_conn
+        threading.Thread(target=self._reader, args=(proc, parent_conn), name="ai-worker-reader", daemon=True).start()
+        if DEBUG:
+            print(f"[Worker] 工作进程已启动 pid={proc.pid}")
+
+    def start(self) -> None:
+        with self._lock:
+            self._ensure_started_locked()
+
+    def stop(self, timeout: float = TASK_SHUTDOWN_TIMEOUT_SECONDS) -> None:
+        """通知子进程退出（它会取消进行中的调用并等待收尾），超时则强制结束"""
+        with self._lock:
+            self._stopping = True
+            proc, conn = self._proc, self._conn
+        if proc is None:
+            return
+        try:
+            conn.send(("stop",))
+        except (OSError, EOFError):
+            pass
+        proc.join(timeout + 1.0)
+        if proc.is_alive():
+            if DEBUG:
+                print("[Worker] 工作进程未在期限内退出，强制结束")
+            proc.terminate()
+            proc.join(1.0)
+
+    def _reader(self, proc, conn) -> None:
+        """接收子进程消息；管道断开即视为崩溃（正常停止时除外）"""
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = msg[0]
+            if kind == "breaker":
+                self._on_breaker(msg[1], msg[2])
+                continue
+            call = self._pending.get(msg[1])
+            if call is None:
+                continue
+            if kind == "event":
+                if call.on_event is not None:
+                    try:
+                        call.on_event(msg[2], msg[3])
+                    except Exception as e:
+                        if DEBUG:
+                            print(f"[Worker] 事件回调失败: {e}")
+            elif kind == "result":
+                call.ok, call.payload = bool(msg[2]), msg[3]
+                with self._lock:
+                    self._pending.pop(msg[1], None)
+                    self._crashes = 0
+                call.done.set()
+
+        proc.join(1.0)
+        with self._lock:
+            if self._proc is proc:
+                self._proc = self._conn = None
+            pending = list(self._pending.values())
+            self._pending.clear()
+            stopping = self._stopping
+            if not stopping:
+                self._crashes += 1
+            crashes = self._crashes
+        for call in pending:
+            call.ok, call.payload = False, None
+            call.done.set()
+        if stopping:
+            return
+        delay = backoff_delay(crashes, 1.0, AI_WORKER_RESTART_MAX_SECONDS, floor=0.5)
+        if DEBUG:
+            print(f"[Worker] 工作进程意外退出（exitcode={proc.exitcode}），{delay:.1f}s 后重启")
+        time.sleep(delay)
+        try:
+            self.start()
+        except Exception as e:
+            if DEBUG:
+                print(f"[Worker] 重启工作进程失败: {e}")
+
+    # ---------- 调用 ----------
+
+    def call(
+        self,
+        op: str,
+        cancel: Optional[CancelToken] = None,
+        on_event: Optional[Callable[[str, Any], None]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        在工作进程中执行 op 并等待结果
+
+        cancel 取消后通知子进程；子进程通常会带着部分结果很快返回，超过宽限期则抛出 TaskCancelled
+        """
+        call = _Call(on_event)
+        with self._lock:
+            self._ensure_started_locked()
+            rid = next(self._ids)
+            self._pending[rid] = call
+            conn = self._conn
+        try:
+            conn.send(("call", rid, op, kwargs))
+        except (OSError, EOFError) as e:
+            with self._lock:
+                self._pending.pop(rid, None)
+            raise WorkerCrashed(f"工作进程不可用: {e}") from e
+
+        cancelled_at: Optional[float] = None
+        while not call.done.wait(0.2):
+            if cancel is None or not cancel.cancelled:
+                continue
+            if cancelled_at is None:
+                cancelled_at = time.time()
+                try:
+                    conn.send(("cancel", rid))
+                except (OSError, EOFError):
+                    pass
+            elif time.time() - cancelled_at > _CANCEL_GRACE_SECONDS:
+                with self._lock:
+                    self._pending.pop(rid, None)
+                raise TaskCancelled()
+
+        if call.ok:
+            return call.payload
+        if call.payload is None:
+            raise WorkerCrashed("工作进程意外退出")
+        raise WorkerError(call.payload)
+
+    # ---------- 熔断器状态（转发自子进程） ----------
+
+    def _on_breaker(self, name: str, snapshot: Dict[str, Any]) -> None:
+        self._breakers[name] = (snapshot, time.time())
+        for callback in list(self._breaker_listeners):
+            try:
+                callback(name, snapshot.get("state", ""))
+            except Exception as e:
+                if DEBUG:
+                    print(f"[Worker] 熔断状态回调失败: {e}")
+
+    def breaker_snapshot(self, name: str) -> Optional[Dict[str, Any]]:
+        """子进程中该主机熔断器的最近状态（retry_in 按收到后经过的时间折算）；未收到过返回 None"""
+        entry = self._breakers.get(name)
+        if entry is None:
+            return None
+        snapshot, received = entry
+        out = dict(snapshot)
+        out["retry_in"] = max(0.0, float(snapshot.get("retry_in", 0.0)) - (time.time() - received))
+        return out
+
+    def add_breaker_listener(self, callback: Callable[[str, str], None]) -> None:
+        self._breaker_listeners.append(callback)
+
+
+_worker: AIWorker | None = None
+_worker_lock = threading.Lock()
+
+
+def get_ai_worker() -> AIWorker:
+    """工作进程客户端（进程内单例，首次调用时才启动子进程）"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = AIWorker()
+        return _worker
+
+
+def worker_enabled() -> bool:
+    return AI_WORKER_PROCESS
@@ -1,26 +1,69 @@
 """
 应用控制器
 负责窗口生命周期管理、生成控制、退出清理
+
+启动路径只导入必需的模块：AI（requests、DeepSeek provider、天气/定位）、控制套接字、
+渲染进程等在首次使用时才导入；本地文本准备、文本包注册等放到事件循环开始后进行，托盘图标先出现
 """
+from __future__ import annotations
+
+import datetime
+import os
 import random
-import threading
+import sys
 import time
 from enum import Enum
-from typing import Set
-from PyQt6.QtCore import QObject, pyqtSignal, Qt
+from typing import TYPE_CHECKING, Set
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, Qt
 from PyQt6.QtWidgets import QWidget, QApplication
 from core.spawner import FloatSpawner
 from core.activity_monitor import ActivityMonitor
 from core.text_provider import BaseTextProvider, LocalTextProvider
-from core.text_provider.deepseek_provider import DeepSeekTextProvider
-from ui.float_text import FloatText
+from core.text_provider.composite_provider import CompositeTextProvider
+from core.text_provider.snapshot import ProviderSet
+from core.text_provider.text_pool import get_text_pool
+from core.ai_worker import get_ai_worker, worker_enabled
+from core.text_watcher import TextFileWatcher
+from core.history import get_shown_history
+from ui.float_text import FloatText, frame_interval_ms, make_float_spec
 from utils.text_loader import load_texts
 from config import (
     DEBUG,
     AI_FAILOVER_TO_LOCAL,
+    TEXT_WATCH_ENABLED,
+    TEXT_WATCH_DEBOUNCE_MS,
+    TEXT_MIX_RATIOS,
+    TEXT_MIX_PACKS,
+    AI_PREGEN_ENABLED,
+    AI_PREGEN_AFTER_HOUR,
+    AI_API_BASE,
+    AI_RETRY_BASE_SECONDS,
+    AI_RETRY_MAX_SECONDS,
+    TASK_SHUTDOWN_TIMEOUT_SECONDS,
+    RENDERER_PROCESS,
+    CONTROL_SOCKET_ENABLED,
+    SPAWN_ON_START,
 )
+from utils.resources import get_resource_path
+from utils import cache_store
+from utils.db import get_database
+from utils.resilience import add_breaker_listener, backoff_delay, get_breaker, host_of
+from utils.task_executor import CancelToken, TaskExecutor
+from utils.runtime_params import get_params, param
+from utils import startup_timeline
 from core import settings as app_settings
 
+if TYPE_CHECKING:
+    from core.control_server import ControlServer
+    from core.text_provider.deepseek_provider import DeepSeekTextProvider
+    from ui.renderer import RendererProcess
+
+
+def _has_api_key() -> bool:
+    from core.text_provider.deepseek_provider import has_api_key
+
+    return has_api_key()
+
 
 class AppState(Enum):
     """应用状态"""
@@ -35,8 +78,17 @@ class AppController(QObject):
     
     # 状态改变信号
     stateChanged = pyqtSignal(bool)  # running: bool
-    providerChanged = pyqtSignal(str)  # "local" / "ai"
+    providerChanged = pyqtSignal(str)  # "local" / "ai" / "mix"
     aiPreparingChanged = pyqtSignal(bool)
+    breakerChanged = pyqtSignal(str, str)  # 熔断器名称（主机）, 状态 closed/open/half_open
+    # 后台任务 → GUI 线程（QueuedConnection）：provider 组合与 AI 状态只在 GUI 线程修改
+    _aiProviderReady = pyqtSignal(object, bool)  # provider, 是否完整（False 为流式首批就绪）
+    _aiPrepareFailed = pyqtSignal()
+    _aiTaskFinished = pyqtSignal()
+    _pregenFinished = pyqtSignal(object)  # 预生成好的 provider（失败为 None）
+    tasksChanged = pyqtSignal()  # 后台任务状态变化（任意线程发出，面板刷新任务列表）
+    _paramsChanged = pyqtSignal(list)  # 运行时参数变化 → GUI 线程立即生效
+    textsReloaded = pyqtSignal(dict)  # 本地文本重载完成 {"mode", "added", "removed", "total", "ms"}
     
     def __init__(self, spawner: FloatSpawner = None, activity_monitor: ActivityMonitor = None):
         super().__init__()
@@ -44,32 +96,80 @@ class AppController(QObject):
         # 创建或使用传入的 spawner
         self.spawner = spawner if spawner else FloatSpawner()
         
-        # 创建或使用传入的 activity monitor
-        self.activity_monitor = activity_monitor if activity_monitor else ActivityMonitor()
+        # 传入的 activity monitor（未传入时首次检测空闲时再创建）
+        self._activity_monitor: ActivityMonitor | None = activity_monitor
         
         # 设置（运行时优先使用 settings，config 作为默认兜底）
         self.idle_only = app_settings.get_idle_only()
         self.idle_threshold_seconds = app_settings.get_idle_threshold_seconds()
-        self.max_floats = app_settings.get_max_floats()
+        self.max_floats = self._effective_max_floats()
         
-        # 文本 Provider 管理
+        # 文本 Provider 管理：当前组合是不可变快照，GUI 线程整体替换，取文本时只读一次引用
         self.local_provider: BaseTextProvider = LocalTextProvider()
-        self.ai_provider: DeepSeekTextProvider | None = None
-        self.text_provider: BaseTextProvider = self.local_provider
+        self._providers = ProviderSet(active=self.local_provider)
         self.ai_enabled: bool = app_settings.get_ai_enabled()
         self.text_source: str = app_settings.get_text_source()
         self._ai_preparing: bool = False
-        self._ai_last_attempt_ts: float | None = None
-        self._ai_backoff_seconds: int = 60  # 自动重试退避（可后续配置化）
-        
-        # 先准备本地 provider，保证立即可用
-        self.local_provider.prepare()
-        if DEBUG:
-            print(f"[Provider] Local provider ready={self.local_provider.is_ready()}")
+        self._ai_context_pending: bool = False  # 准备期间上下文又发生变化
+
+        # AI 失败后自动重试：指数退避（连续失败次数），熔断中则等到可以探测
+        self._ai_failures: int = 0
+        self._ai_retry_at: float = 0.0  # 退避结束时间（0 表示不在退避中）
+        self._ai_breaker = get_breaker(host_of(AI_API_BASE))
+        self._ai_retry_timer = QTimer(self)
+        self._ai_retry_timer.setSingleShot(True)
+        self._ai_retry_timer.timeout.connect(self._on_ai_retry_timer)
+        queued = Qt.ConnectionType.QueuedConnection
+        self._aiProviderReady.connect(self._adopt_ai_provider, queued)
+        self._aiPrepareFailed.connect(self._schedule_ai_retry, queued)
+        self._aiTaskFinished.connect(self._on_ai_task_finished, queued)
+        self._pregenFinished.connect(self._on_pregen_finished, queued)
+        # 熔断器状态变化可能发生在任意线程，经信号转到 GUI 线程
+        add_breaker_listener(lambda name, state: self.breakerChanged.emit(name, state))
+        if worker_enabled():
+            # AI 在工作进程中生成：熔断状态由子进程转发；提前启动子进程（spawn 导入需要时间）
+            get_ai_worker().add_breaker_listener(lambda name, state: self.breakerChanged.emit(name, state))
+            get_ai_worker().start()
+
+        # 后台任务（AI 准备/刷新/预生成）：有界线程池，可取消，退出时在期限内收尾
+        self.tasks = TaskExecutor(param("TASK_MAX_WORKERS"), name="bg")
+        self.tasks.add_listener(self.tasksChanged.emit)
+
+        # 设置快照变化（设置页保存、托盘开关、设置文件被外部修改）→ 最小化热更新
+        notifier = app_settings.get_notifier()
+        notifier.settingsChanged.connect(self.apply_settings)
+        notifier.watch_external_changes()
+
+        # 运行时参数（生成间隔、帧间隔、窗口上限…）：设置 / 环境变量 / 控制套接字覆盖，变化后立即生效
+        params = get_params()
+        params.replace_source("settings", dict(app_settings.snapshot().tuning))
+        params.add_listener(self._paramsChanged.emit)
+        self._paramsChanged.connect(self._apply_params, queued)
+        self.control: ControlServer | None = None
+
+        # 本地文本监听、控制套接字、本地文本准备等在事件循环开始后进行（finish_startup）
+        self.text_watcher: TextFileWatcher | None = None
+        self._startup_done = False
+
+        # 混合 provider（text_source=mix）：本地 + 额外文本包，AI 就绪后再注册
+        self.mix_provider = CompositeTextProvider()
+        self.mix_provider.register("local", self.local_provider, TEXT_MIX_RATIOS.get("local", 0))
+        if self.text_source == "mix":
+            self._set_providers(active=self.mix_provider, mode="mix")
         
         # 窗口管理（使用普通 set，因为已经通过信号自动移除）
         # 注意：WeakSet 不支持 len()，所以使用普通 set
         self.float_windows: Set[QWidget] = set()
+
+        # 独立渲染进程（可选）：连接后漂浮文字交给它显示，本进程的窗口只作后备
+        self.renderer: RendererProcess | None = None
+        if RENDERER_PROCESS:
+            # 模块别名导入：RendererProcess 这个名字只由上面的 TYPE_CHECKING 导入绑定
+            from ui import renderer as _renderer
+
+            self.renderer = _renderer.RendererProcess(self)
+            if not self.renderer.start():
+                self.renderer = None
         
         # 状态管理
         self._state = AppState.STOPPED
@@ -77,62 +177,257 @@ class AppController(QObject):
         # 连接 spawner 的信号
         self.spawner.spawnRequested.connect(self._on_spawn_requested)
         
+        # 跨天：深夜空闲时预生成明日文本包，零点切换
+        self._current_day = datetime.date.today()
+        self._next_ai_provider: DeepSeekTextProvider | None = None
+        self._pregen_running: bool = False
+        self._pregen_last_attempt_ts: float | None = None
+
+        self._midnight_timer = QTimer(self)
+        self._midnight_timer.setSingleShot(True)
+        self._midnight_timer.timeout.connect(self._on_midnight_timer)
+        self._schedule_midnight_timer()
+
+        self._pregen_timer = QTimer(self)
+        self._pregen_timer.timeout.connect(self._on_pregen_tick)
+        self._pregen_timer.start(param("AI_PREGEN_CHECK_SECONDS") * 1000)
+
+        # 展示历史（内存缓冲，由后台整理线程批量写库）
+        self.history = get_shown_history()
+
+        # 后台缓存整理（过期/超限淘汰、统计与历史落盘、WAL checkpoint）
+        cache_store.start_maintenance(param("CACHE_COMPACT_INTERVAL_SECONDS"))
+
+        # 事件循环开始后（托盘图标已显示）再完成其余初始化
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self) -> None:
+        """
+        延后的初始化（只执行一次）：准备本地文本、注册文本包、文本文件监听、控制套接字，
+        并按设置开始准备 AI（AI 相关模块此时才导入，在后台线程中）
+
+        事件循环开始后自动调用；在此之前开始生成（start）时也会先调用
+        """
+        if self._startup_done or self._state == AppState.EXITING:
+            return
+        self._startup_done = True
+
+        # 先准备本地 provider，保证立即可用
+        self.local_provider.prepare()
+        if DEBUG:
+            print(f"[Provider] Local provider ready={self.local_provider.is_ready()}")
+        startup_timeline.mark("local_texts_ready")
+        self._register_mix_packs()
+
+        # 监听本地文本文件，修改后自动重载（无需重启）
+        if TEXT_WATCH_ENABLED:
+            try:
+                self.text_watcher = TextFileWatcher(
+                    self.local_provider, TEXT_WATCH_DEBOUNCE_MS, parent=self, executor=self.tasks
+                )
+                self.text_watcher.reloaded.connect(self.textsReloaded.emit)
+                self.text_watcher.reloaded.connect(lambda _stats: self._compact_text_pool())
+            except Exception as e:
+                print(f"[Texts] 文本文件监听启动失败: {e}")
+
+        if CONTROL_SOCKET_ENABLED:
+            from core import control_server as _control_server
+
+            self.control = _control_server.ControlServer(self)
+            if not self.control.start():
+                self.control = None
+
         # 根据配置异步准备 AI Provider
-        if self.ai_enabled and self.text_source in ("auto", "ai"):
+        if self._wants_ai():
             self._prepare_ai_provider_async()
 
+    @property
+    def activity_monitor(self) -> ActivityMonitor:
+        """空闲检测（首次使用时创建）"""
+        if self._activity_monitor is None:
+            self._activity_monitor = ActivityMonitor()
+        return self._activity_monitor
+
+    @property
+    def text_provider(self) -> BaseTextProvider:
+        """当前取文本的 provider"""
+        return self._providers.active
+
+    @property
+    def ai_provider(self) -> DeepSeekTextProvider | None:
+        return self._providers.ai
+
+    def _set_providers(self, **changes) -> None:
+        """GUI 线程：发布新的 provider 组合（整体替换引用）"""
+        self._providers = self._providers.evolve(**changes)
+
+    def _wants_ai(self) -> bool:
+        """当前设置是否需要 AI 文本"""
+        return self.ai_enabled and self.text_source in ("auto", "ai", "mix")
+
+    def _register_mix_packs(self) -> None:
+        """注册 TEXT_MIX_PACKS 中存在的额外文本包（如节日包）"""
+        for name, rel_path in TEXT_MIX_PACKS.items():
+            path = get_resource_path(rel_path)
+            if not os.path.isfile(path):
+                continue
+            pack = LocalTextProvider(path=path, corpus_dir="")
+            pack.prepare()
+            if pack.is_ready():
+                self.mix_provider.register(name, pack, TEXT_MIX_RATIOS.get(name, 0))
+                if DEBUG:
+                    print(f"[Provider] 混合文本包已注册: {name} ({path})")
+
+    def _new_ai_provider(self) -> DeepSeekTextProvider:
+        """创建 AI provider，并在流式生成收到首批文本时提前启用"""
+        from core.text_provider.remote_provider import create_ai_provider
+
+        # 固定日期：跨天后旧 provider 不会误写新一天的缓存
+        provider = create_ai_provider(target_date=datetime.date.today())
+        provider.on_ready = self._on_ai_partial_ready
+        return provider
+
+    def _on_ai_partial_ready(self, provider: DeepSeekTextProvider) -> None:
+        """生成线程回调：流式生成已有首批文本，不必等整包完成（转到 GUI 线程启用）"""
+        self._aiProviderReady.emit(provider, False)
+
+    def _adopt_ai_provider(self, provider: DeepSeekTextProvider, complete: bool) -> None:
+        """GUI 线程：采用后台准备好的 AI provider"""
+        if self._state == AppState.EXITING:
+            return
+        if complete:
+            self._ai_failures = 0
+            self._compact_text_pool()
+        if self._providers.ai is not provider:
+            self._set_providers(ai=provider)
+        if self._wants_ai():
+            self._use_ai_provider()
+            if DEBUG:
+                if complete:
+                    print(f"[Provider] 已切换到 AI provider (mode={self.text_source})")
+                else:
+                    print("[Provider] AI 流式生成已有首批文本，提前启用")
+
+    def _use_ai_provider(self) -> None:
+        """AI 就绪后按 text_source 启用（mix 模式下作为其中一个来源）"""
+        ai = self._providers.ai
+        self.mix_provider.register("ai", ai, TEXT_MIX_RATIOS.get("ai", 0))
+        self.mix_provider.set_enabled("ai", self.ai_enabled)
+        if self.text_source == "mix":
+            self._set_providers(active=self.mix_provider, mode="mix")
+            self.providerChanged.emit("mix")
+        else:
+            self._set_providers(active=ai, mode="ai")
+            self.providerChanged.emit("ai")
+
     def _prepare_ai_provider_async(self) -> None:
         # single-flight + backoff，避免并发重试把网络拖死
         now = time.time()
+        if self._state == AppState.EXITING:
+            return
         if self._ai_preparing:
             if DEBUG:
                 print("[Provider] AI 正在准备中，跳过重复触发")
             return
-        if self._ai_last_attempt_ts and (now - self._ai_last_attempt_ts) < self._ai_backoff_seconds:
+        if self._ai_retry_at and now < self._ai_retry_at:
             if DEBUG:
-                wait = self._ai_backoff_seconds - (now - self._ai_last_attempt_ts)
-                print(f"[Provider] AI 退避中，{wait:.0f}s 后再试（如需可点“刷新今日 AI 文本”）")
+                print(f"[Provider] AI 退避中，{self._ai_retry_at - now:.0f}s 后自动重试（如需可点“刷新今日 AI 文本”）")
             return
 
         self._ai_preparing = True
-        self._ai_last_attempt_ts = now
+        self._ai_retry_at = 0.0
         self.aiPreparingChanged.emit(True)
-        threading.Thread(target=self._prepare_ai_provider, daemon=True).start()
+        self.tasks.submit("ai-prepare", self._prepare_ai_provider)
 
     # ---------- Provider 管理 ----------
 
-    def _prepare_ai_provider(self) -> None:
-        """在后台线程中准备 AI Provider"""
+    def _prepare_ai_provider(self, cancel: CancelToken) -> None:
+        """后台任务：准备 AI Provider（结果经信号交给 GUI 线程）"""
         try:
-            provider = DeepSeekTextProvider()
-            provider.prepare()
+            provider = self._new_ai_provider()
+            provider.prepare(cancel)
             if not provider.is_ready():
                 if DEBUG:
                     print("[Provider] AI provider 未就绪，保持使用本地文本")
+                if _has_api_key() and not cancel.cancelled:
+                    self._aiPrepareFailed.emit()
                 return
-            self.ai_provider = provider
             if DEBUG:
                 print("[Provider] AI provider 已就绪")
-
-            # 根据 text_source 决定是否切换
-            if self.ai_enabled and self.text_source in ("auto", "ai"):
-                # 切换到 AI provider
-                self.text_provider = self.ai_provider
-                self.providerChanged.emit("ai")
-                if DEBUG:
-                    print(f"[Provider] 已切换到 AI provider (mode={self.text_source})")
+            # 根据 text_source 决定是否切换（mix 模式下加入混合）
+            self._aiProviderReady.emit(provider, True)
         except Exception as e:
             if DEBUG:
                 print(f"[Provider] 准备 AI provider 失败: {e}")
+            self._aiPrepareFailed.emit()
         finally:
-            self._ai_preparing = False
-            self.aiPreparingChanged.emit(False)
+            self._aiTaskFinished.emit()
+
+    def _on_ai_task_finished(self) -> None:
+        """GUI 线程：AI 准备 / 刷新任务结束"""
+        self._ai_preparing = False
+        self.aiPreparingChanged.emit(False)
+        self._run_pending_context_switch()
+
+    def _schedule_ai_retry(self) -> None:
+        """GUI 线程：准备失败后按连续失败次数退避，熔断中至少等到熔断器可以探测"""
+        if self._state == AppState.EXITING:
+            return
+        self._ai_failures += 1
+        delay = backoff_delay(self._ai_failures, AI_RETRY_BASE_SECONDS, AI_RETRY_MAX_SECONDS, floor=0.5)
+        delay = max(delay, self.ai_breaker_state()["retry_in"] + 1.0)
+        self._ai_retry_at = time.time() + delay
+        if DEBUG:
+            print(f"[Provider] AI 第 {self._ai_failures} 次准备失败，{delay:.0f}s 后自动重试")
+        self._ai_retry_timer.start(max(1000, int(delay * 1000)))
+
+    def _on_ai_retry_timer(self) -> None:
+        """退避结束：仍需要 AI 且上次失败后没有成功过，则再准备一次（熔断器 half-open 时这就是探测请求）"""
+        if self._state == AppState.EXITING or not self._wants_ai() or self._ai_failures == 0:
+            return
+        self._prepare_ai_provider_async()
+
+    def ai_breaker_state(self) -> dict:
+        """AI 端点熔断器状态（state / failures / retry_in / last_error）"""
+        if worker_enabled():
+            remote = get_ai_worker().breaker_snapshot(self._ai_breaker.name)
+            if remote is not None:
+                return remote
+        return self._ai_breaker.snapshot()
+
+    def _switch_ai_context(self) -> None:
+        """
+        生成上下文（城市/天气/称呼/提示词）变化：按新上下文准备文本包
+
+        缓存中已有匹配的变体时几乎立即切换；否则后台生成，期间当前文本包继续提供
+        """
+        if not self._wants_ai():
+            return
+        if self._ai_preparing:
+            # 正在准备的是旧上下文，完成后再按新上下文来一次
+            self._ai_context_pending = True
+            return
+        # 用户主动修改设置，不受失败退避限制
+        self._ai_retry_at = 0.0
+        self._prepare_ai_provider_async()
+
+    def _run_pending_context_switch(self) -> None:
+        if self._ai_context_pending:
+            self._ai_context_pending = False
+            self._switch_ai_context()
 
     def set_ai_enabled(self, enabled: bool) -> None:
         """启用/禁用 AI 文本（禁用时切回本地）"""
         self.ai_enabled = enabled
+        self.mix_provider.set_enabled("ai", enabled)
         if not enabled:
-            self.text_provider = self.local_provider
+            # 不再需要的生成直接取消（已收到的流式条目保留）
+            self.tasks.cancel("ai-prepare")
+            self.tasks.cancel("ai-refresh")
+            if self.text_source == "mix":
+                # mix 模式只停用其中的 AI 来源
+                return
+            self._set_providers(active=self.local_provider, mode="local")
             self.providerChanged.emit("local")
             if DEBUG:
                 print("[Provider] 已切回本地 provider（AI disabled）")
@@ -140,8 +435,7 @@ class AppController(QObject):
 
         # enabled=True：如果 AI 已就绪则切换，否则后台准备
         if self.ai_provider and self.ai_provider.is_ready():
-            self.text_provider = self.ai_provider
-            self.providerChanged.emit("ai")
+            self._use_ai_provider()
             if DEBUG:
                 print("[Provider] 已切换到 AI provider（AI enabled）")
         else:
@@ -150,31 +444,40 @@ class AppController(QObject):
             self._prepare_ai_provider_async()
 
     def set_text_source(self, source: str) -> None:
-        """设置文本来源（auto/local/ai）并立即应用"""
+        """设置文本来源（auto/local/ai/mix）并立即应用"""
         src = (source or "").lower()
-        if src not in ("auto", "local", "ai"):
+        if src not in ("auto", "local", "ai", "mix"):
             return
         self.text_source = src
 
         if src == "local":
-            self.text_provider = self.local_provider
+            self._set_providers(active=self.local_provider, mode="local")
             self.providerChanged.emit("local")
             return
 
-        # auto/ai：若 AI 可用则切换，否则准备
+        if src == "mix":
+            # 混合模式立即生效（本地/文本包已就绪），AI 就绪后自动加入
+            self._set_providers(active=self.mix_provider, mode="mix")
+            self.providerChanged.emit("mix")
+
+        # auto/ai/mix：若 AI 可用则切换，否则准备
         if self.ai_enabled and self.ai_provider and self.ai_provider.is_ready():
-            self.text_provider = self.ai_provider
-            self.providerChanged.emit("ai")
-        elif self.ai_enabled:
+            self._use_ai_provider()
+            return
+        if src != "mix" and self._providers.mode != "local":
+            # auto/ai 在 AI 就绪前（或 AI 未启用时）使用本地文本，不再沿用之前的混合 provider
+            self._set_providers(active=self.local_provider, mode="local")
+            self.providerChanged.emit("local")
+        if self.ai_enabled:
             self._prepare_ai_provider_async()
 
     def apply_settings(self, changed_keys: list) -> None:
         """
-        SettingsDialog 保存后调用：按 changed_keys 进行最小化热更新。
+        设置快照变化时调用（app_settings.get_notifier().settingsChanged）：按 changed_keys 进行最小化热更新。
         规则：
         - idle_only/threshold：立即生效
         - ai_enabled/text_source：立即切换/准备
-        - city（以及未来 weather）：不自动重生成，提示用户手动刷新今日 AI 文本
+        - city/weather/称呼/提示词：按新上下文切换 AI 文本包（命中缓存变体或后台生成）
         """
         keys = set(changed_keys or [])
 
@@ -189,14 +492,18 @@ class AppController(QObject):
                 print(f"[Settings] idle_threshold_seconds={self.idle_threshold_seconds}")
 
         if app_settings.Keys.UI_FLOAT_DENSITY in keys:
-            self.max_floats = app_settings.get_max_floats()
+            self.max_floats = self._effective_max_floats()
             if DEBUG:
                 print(f"[Settings] max_floats={self.max_floats}")
 
         if app_settings.Keys.UI_FLOAT_SPEED in keys:
-            # 速度由 FloatText 在创建时读取 settings；这里给提示即可
+            # 新窗口创建时读取；已显示的窗口也立即换成新的帧间隔
+            self._apply_frame_interval()
             if DEBUG:
-                print(f"[Settings] float_speed={app_settings.get_float_speed_label()} ({app_settings.get_float_speed_ms()}ms)")
+                print(f"[Settings] float_speed={app_settings.get_float_speed_label()} ({frame_interval_ms()}ms)")
+
+        if app_settings.Keys.TUNING in keys:
+            get_params().replace_source("settings", dict(app_settings.snapshot().tuning))
 
         if app_settings.Keys.AI_ENABLED in keys:
             self.set_ai_enabled(app_settings.get_ai_enabled())
@@ -210,15 +517,177 @@ class AppController(QObject):
 
         if app_settings.Keys.AI_DEEPSEEK_API_KEY in keys:
             # 如果用户刚配置了 key，且当前需要 AI，则尝试准备
-            if self.ai_enabled and self.text_source in ("auto", "ai"):
+            if self._wants_ai():
                 self._prepare_ai_provider_async()
 
-        if app_settings.Keys.CONTEXT_CITY in keys:
-            # 不自动刷新缓存，避免频繁打 API
-            print("[Settings] 城市已更新：需要“刷新今日 AI 文本”后才会影响今日文本。")
+        context_keys = {
+            app_settings.Keys.CONTEXT_CITY,
+            app_settings.Keys.CONTEXT_WEATHER_ENABLED,
+            app_settings.Keys.PROMPT_SALUTATION,
+            app_settings.Keys.PROMPT_USER_HINT,
+        }
+        if keys & context_keys:
+            # 缓存按上下文哈希区分变体：切回之前用过的设置不会重新调用 API
+            if DEBUG:
+                print("[Settings] 生成上下文已更新，按新上下文切换 AI 文本包")
+            self._switch_ai_context()
+
+    # ---------- 运行时参数 ----------
+
+    def _effective_max_floats(self) -> int:
+        """窗口上限：运行时参数被覆盖时优先，否则按数量档位"""
+        if get_params().is_overridden("MAX_FLOATS"):
+            return param("MAX_FLOATS")
+        return app_settings.snapshot().max_floats
+
+    def _apply_frame_interval(self) -> None:
+        """已显示的漂浮窗口（包括渲染进程中的）换成当前帧间隔"""
+        ms = frame_interval_ms()
+        for window in list(self.float_windows):
+            window.set_speed(ms)
+        if self.renderer is not None:
+            self.renderer.set_speed(ms)
+
+    def _apply_params(self, names: list) -> None:
+        """运行时参数变化后立即生效（其余参数在下次使用时读取）"""
+        changed = set(names)
+        if "SPAWN_INTERVAL" in changed:
+            self.spawner.set_interval(param("SPAWN_INTERVAL"))
+        if "MAX_FLOATS" in changed:
+            self.max_floats = self._effective_max_floats()
+        if "FLOAT_SPEED" in changed:
+            self._apply_frame_interval()
+        if "AI_PREGEN_CHECK_SECONDS" in changed and self._pregen_timer.isActive():
+            self._pregen_timer.start(param("AI_PREGEN_CHECK_SECONDS") * 1000)
+        if "CACHE_COMPACT_INTERVAL_SECONDS" in changed and self._state != AppState.EXITING:
+            cache_store.stop_maintenance()
+            cache_store.start_maintenance(param("CACHE_COMPACT_INTERVAL_SECONDS"))
+        restart = [n for n in names if not get_params().spec(n).live]
+        if restart:
+            print(f"[Params] {', '.join(restart)} 将在下次启动时生效")
+
+    def _compact_text_pool(self) -> None:
+        """文本包更换后：文本池中不再引用的文本足够多时按代压缩（后台任务，旧句柄在压缩期间仍有效）"""
+        if self._state == AppState.EXITING or self.tasks.is_active("pool-compact"):
+            return
+        self.tasks.submit("pool-compact", lambda _cancel: get_text_pool().maybe_compact())
+
+    # ---------- 跨天：明日文本包预生成 / 零点切换 ----------
+
+    def _schedule_midnight_timer(self) -> None:
+        """定时到下一个零点（多 1 秒，避免提前触发）"""
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+        ms = int((midnight - now).total_seconds() * 1000) + 1000
+        self._midnight_timer.start(max(1000, ms))
+
+    def _on_midnight_timer(self) -> None:
+        self._check_date_rollover()
+        self._schedule_midnight_timer()
+
+    def _check_date_rollover(self) -> None:
+        """
+        日期变化时切换到新一天的文本包（GUI 线程，不做 IO）
+
+        - 有预生成好的今日文本包：直接替换引用
+        - 没有：后台准备今日文本包，旧文本包在新包就绪前继续提供
+        """
+        today = datetime.date.today()
+        if today == self._current_day:
+            return
+        self._current_day = today
+
+        nxt = self._next_ai_provider
+        self._next_ai_provider = None
+        if not self._wants_ai():
+            return
+
+        if nxt is not None and nxt.date_str == today.isoformat() and nxt.is_ready():
+            nxt.on_ready = self._on_ai_partial_ready
+            self._set_providers(ai=nxt)
+            self._use_ai_provider()
+            if DEBUG:
+                print(f"[Provider] 日期切换：已启用预生成的文本包 {nxt.date_str}")
+            self._compact_text_pool()
+            return
+
+        if DEBUG:
+            print("[Provider] 日期切换：没有预生成的文本包，后台准备今日文本")
+        self._compact_text_pool()
+        # 新的一天不受上一次失败的退避限制
+        self._ai_retry_at = 0.0
+        self._prepare_ai_provider_async()
+
+    def _on_pregen_tick(self) -> None:
+        """定期检查：晚间 + 用户空闲 + 有 Key + 不在退避期 → 后台预生成明日文本包"""
+        # 休眠唤醒等情况下零点定时器可能错过，这里顺带兜底检查日期
+        self._check_date_rollover()
+
+        if not AI_PREGEN_ENABLED or not self._wants_ai():
+            return
+        if self._state == AppState.EXITING or self._pregen_running or self._ai_preparing:
+            return
+
+        now = datetime.datetime.now()
+        if now.hour < AI_PREGEN_AFTER_HOUR:
+            return
+        tomorrow = now.date() + datetime.timedelta(days=1)
+        nxt = self._next_ai_provider
+        if nxt is not None and nxt.date_str == tomorrow.isoformat() and nxt.is_ready():
+            return
+        if self._pregen_last_attempt_ts and (time.time() - self._pregen_last_attempt_ts) < AI_RETRY_BASE_SECONDS:
+            return
+        if self.ai_breaker_state()["retry_in"] > 0:
+            return
+        if not _has_api_key():
+            return
+        try:
+            if self.activity_monitor.get_idle_seconds() < param("AI_PREGEN_IDLE_SECONDS"):
+                return
+        except Exception:
+            pass
+
+        self._pregen_running = True
+        self._pregen_last_attempt_ts = time.time()
+        self.tasks.submit("ai-pregen", self._pregenerate_worker, tomorrow)
+
+    def _pregenerate_worker(self, cancel: CancelToken, day: datetime.date) -> None:
+        """后台任务：生成（或读取已有缓存）指定日期的文本包"""
+        ready = None
+        try:
+            if DEBUG:
+                print(f"[Provider] 开始预生成文本包 {day.isoformat()}")
+            from core.text_provider.remote_provider import create_ai_provider
+
+            provider = create_ai_provider(target_date=day)
+            provider.prepare(cancel)
+            if provider.is_ready():
+                ready = provider
+                if DEBUG:
+                    print(f"[Provider] 已预生成文本包 {day.isoformat()}")
+            elif DEBUG:
+                print(f"[Provider] 预生成文本包失败 {day.isoformat()}，稍后重试")
+        except Exception as e:
+            if DEBUG:
+                print(f"[Provider] 预生成文本包失败: {e}")
+        finally:
+            self._pregenFinished.emit(ready)
+
+    def _on_pregen_finished(self, provider) -> None:
+        """GUI 线程：记录预生成结果"""
+        self._pregen_running = False
+        if provider is not None:
+            self._next_ai_provider = provider
 
     def refresh_today_ai(self) -> None:
-        """强制刷新今日 AI 文本（删除缓存并重新生成，异步）"""
+        """
+        刷新今日 AI 文本（异步）
+
+        已有今日文本包时做补充生成：当前文本继续提供，只替换 AI_TOPUP_ITEMS 条；
+        没有文本包或 AI_TOPUP_ITEMS=0 时删除缓存并完整重新生成
+        """
+        if self._state == AppState.EXITING:
+            return
         if not self.ai_enabled:
             if DEBUG:
                 print("[Provider] AI 未启用，忽略刷新")
@@ -232,16 +701,22 @@ class AppController(QObject):
         self._ai_preparing = True
         self.aiPreparingChanged.emit(True)
 
-        def worker():
+        current = self.ai_provider
+        topup = param("AI_TOPUP_ITEMS")
+
+        def worker(cancel: CancelToken):
             try:
-                if self.ai_provider is None:
-                    self.ai_provider = DeepSeekTextProvider()
+                provider = current
+                if provider is None:
+                    provider = self._new_ai_provider()
+                    provider.prepare(cancel)
+                elif topup > 0 and provider.is_ready():
+                    provider.top_up(topup, cancel)
                 else:
-                    self.ai_provider.invalidate_today_cache()
-                self.ai_provider.prepare()
-                if self.ai_provider.is_ready():
-                    self.text_provider = self.ai_provider
-                    self.providerChanged.emit("ai")
+                    provider.invalidate_today_cache()
+                    provider.prepare(cancel)
+                if provider.is_ready():
+                    self._aiProviderReady.emit(provider, True)
                     if DEBUG:
                         print("[Provider] 今日 AI 文本已刷新并启用")
                 else:
@@ -251,10 +726,13 @@ class AppController(QObject):
                 if DEBUG:
                     print(f"[Provider] 刷新 AI 文本失败: {e}")
             finally:
-                self._ai_preparing = False
-                self.aiPreparingChanged.emit(False)
+                self._aiTaskFinished.emit()
 
-        threading.Thread(target=worker, daemon=True).start()
+        self.tasks.submit("ai-refresh", worker)
+
+    def task_states(self) -> list:
+        """后台任务状态（运行中 / 排队 / 最近结束），供面板显示"""
+        return self.tasks.snapshot()
     
     @property
     def state(self) -> AppState:
@@ -271,8 +749,10 @@ class AppController(QObject):
         if self._state == AppState.EXITING:
             return
         
+        self.finish_startup()
+        startup_timeline.mark("start")
         self._state = AppState.RUNNING
-        self.spawner.start()
+        self.spawner.start(immediate=SPAWN_ON_START)
         self.stateChanged.emit(True)
     
     def pause(self):
@@ -301,9 +781,32 @@ class AppController(QObject):
         
         # 停止生成
         self.spawner.stop()
+
+        # 停止文件监听与跨天定时器
+        if self.text_watcher:
+            self.text_watcher.stop()
+        self._midnight_timer.stop()
+        self._pregen_timer.stop()
+        self._ai_retry_timer.stop()
+        # 取消后台任务并等待它们收尾（写完缓存），超过期限的随进程退出
+        self.tasks.shutdown(TASK_SHUTDOWN_TIMEOUT_SECONDS)
+        if worker_enabled():
+            get_ai_worker().stop()
+        # 停止缓存整理并落盘统计与展示历史（含最后一次 checkpoint），再关闭空闲的数据库连接（仍在运行的任务除外）
+        cache_store.stop_maintenance()
+        get_database().close_all()
+        if DEBUG and "utils.http_client" in sys.modules:
+            # 本次运行没有发出过请求时 HTTP 客户端不会被导入
+            from utils.http_client import get_http_client
+
+            print("[HTTP] 连接复用统计:\n" + get_http_client().format_stats())
         
-        # 关闭所有窗口
+        # 关闭所有窗口（渲染进程中的窗口随渲染进程退出）
         self._close_all_windows()
+        if self.renderer is not None:
+            self.renderer.stop()
+        if self.control is not None:
+            self.control.stop()
         
         # 发出状态改变信号
         self.stateChanged.emit(False)
@@ -337,19 +840,20 @@ class AppController(QObject):
         
         # 检查窗口数量限制
         self._cleanup_invisible_windows()
-        if len(self.float_windows) >= self.max_floats:
+        if self._float_count() >= self.max_floats:
             if DEBUG:
                 print(f"[DEBUG] 窗口数量已达上限 {self.max_floats}, skip spawn")
             return
         
         # 获取下一个文本并生成窗口
         text = self._get_next_text()
+        self.history.record(text, self.text_source)
         self._spawn_one(text)
     
     def _get_next_text(self) -> str:
         """从当前 Provider 获取一条文本，必要时回退到本地"""
-        # 优先使用当前 provider
-        provider = self.text_provider or self.local_provider
+        # 优先使用当前 provider（读一次快照引用，后台线程的替换不会影响本次取文本）
+        provider = self._providers.active or self.local_provider
         text = ""
         try:
             if provider and provider.is_ready():
@@ -376,10 +880,21 @@ class AppController(QObject):
 
         return text
     
+    def _float_count(self) -> int:
+        """当前漂浮文字数（本进程窗口 + 渲染进程中的窗口）"""
+        count = len(self.float_windows)
+        if self.renderer is not None:
+            count += self.renderer.count
+        return count
+
     def _spawn_one(self, text: str):
-        """生成一个漂浮文字窗口"""
+        """生成一个漂浮文字窗口（渲染进程已连接时交给它，否则在本进程内创建）"""
+        spec = make_float_spec(text)
+        if self.renderer is not None and self.renderer.spawn(spec):
+            self._mark_first_float()
+            return
         try:
-            window = FloatText(text)
+            window = FloatText.from_spec(spec)
             # 设置关闭时自动删除
             window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, True)
             
@@ -403,8 +918,14 @@ class AppController(QObject):
             
             # 添加到窗口集合
             self.float_windows.add(window)
+            self._mark_first_float()
         except Exception as e:
             print(f"生成窗口失败: {e}")
+
+    def _mark_first_float(self) -> None:
+        """首个漂浮文字：记入启动时间线并打印"""
+        if startup_timeline.mark("first_float"):
+            startup_timeline.report()
     
     def _on_window_closed(self, window: QWidget):
         """窗口关闭回调"""
@@ -439,3 +960,5 @@ class AppController(QObject):
         
         # 清空集合（即使关闭失败也要清空，避免内存泄漏）
         self.float_windows.clear()
+        if self.renderer is not None:
+            self.renderer.clear()
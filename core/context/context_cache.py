@@ -0,0 +1,148 @@
+"""
+上下文缓存（地理编码 / 天气快照）
+
+存放在共享 SQLite 数据库中，按城市 / 坐标点查：
+- geo_cache：城市 → 经纬度（主键 city）
+- weather_snapshots：坐标 → 最近一次天气（主键 loc_key）
+
+有效期（TTL）由调用方按 ts 判断；这里的保存时长只负责清理长期不用的旧条目。
+首次使用时导入旧版 data/context_cache/geo_city.json、weather_city.json（导入成功后删除）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import config as _config
+from utils.cache_store import CacheStore, register_store
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+
+# 旧版 JSON 缓存目录（只用于导入）
+CONTEXT_CACHE_DIR = "data/context_cache"
+GEO_RETENTION_SECONDS = 30 * 24 * 3600  # 地理编码保留 30 天
+WEATHER_RETENTION_SECONDS = 24 * 3600  # 天气快照保留 1 天
+
+
+class GeoCache(CacheStore):
+    """城市 → 经纬度"""
+
+    table = "geo_cache"
+    ts_column = "ts"
+
+    def get(self, city: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(
+            "SELECT ts, lat, lon, name, country, country_code FROM geo_cache WHERE city = ?", (city,)
+        )
+        if row is None:
+            self.record_miss()
+            return None
+        self.record_hit()
+        return dict(row)
+
+    def put(self, city: str, info: Dict[str, Any]) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO geo_cache (city, ts, lat, lon, name, country, country_code) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                city,
+                float(info.get("ts", 0)),
+                info.get("lat"),
+                info.get("lon"),
+                info.get("name", ""),
+                info.get("country", ""),
+                info.get("country_code", ""),
+            ),
+        )
+
+
+class WeatherCache(CacheStore):
+    """坐标 → 最近一次天气快照"""
+
+    table = "weather_snapshots"
+    ts_column = "ts"
+
+    def get(self, loc_key: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one("SELECT data FROM weather_snapshots WHERE loc_key = ?", (loc_key,))
+        if row is None:
+            self.record_miss()
+            return None
+        try:
+            data = json.loads(row["data"])
+        except ValueError:
+            self.record_miss()
+            return None
+        self.record_hit()
+        return data if isinstance(data, dict) else None
+
+    def put(self, loc_key: str, data: Dict[str, Any]) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO weather_snapshots (loc_key, ts, data) VALUES (?, ?, ?)",
+            (loc_key, float(data.get("ts", 0)), json.dumps(data, ensure_ascii=False)),
+        )
+
+
+_geo: GeoCache | None = None
+_weather: WeatherCache | None = None
+_lock = threading.Lock()
+
+
+def get_geo_cache() -> GeoCache:
+    _ensure_caches()
+    return _geo  # type: ignore[return-value]
+
+
+def get_weather_cache() -> WeatherCache:
+    _ensure_caches()
+    return _weather  # type: ignore[return-value]
+
+
+def _ensure_caches() -> None:
+    global _geo, _weather
+    with _lock:
+        if _geo is not None:
+            return
+        geo = register_store(GeoCache("geo_cache", max_age_seconds=GEO_RETENTION_SECONDS))
+        weather = register_store(WeatherCache("weather_cache", max_age_seconds=WEATHER_RETENTION_SECONDS))
+        _import_legacy_files(geo, weather)
+        _geo, _weather = geo, weather
+
+
+def _import_legacy_files(geo: GeoCache, weather: WeatherCache) -> None:
+    """
+    导入旧版 geo_city.json / weather_city.json（整文件字典）
+
+    只删除完整导入的文件；读取或写入失败的文件保留，下次启动再试
+    """
+    if not os.path.isdir(CONTEXT_CACHE_DIR):
+        return
+    imported = 0
+    for filename, store in (("geo_city.json", geo), ("weather_city.json", weather)):
+        path = os.path.join(CONTEXT_CACHE_DIR, filename)
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("不是 JSON 对象")
+            rows = [(k, v) for k, v in data.items() if isinstance(v, dict) and v]
+            with store.db.transaction():
+                for key, value in rows:
+                    store.put(key, value)
+            os.remove(path)
+            imported += len(rows)
+        except Exception as e:
+            if DEBUG:
+                print(f"[Weather] 导入旧缓存 {filename} 失败: {e}")
+
+    # 目录已空时一并删除
+    try:
+        os.rmdir(CONTEXT_CACHE_DIR)
+    except OSError:
+        pass
+    if DEBUG and imported:
+        print(f"[Weather] 已导入 {imported} 条旧缓存到数据库")
@@ -10,7 +10,6 @@ from __future__ import annotations
 import datetime
 from typing import Optional
 
-import requests  # 预留给 IP 模式
 
 # config 作为默认兜底：字段可能不存在，需 getattr 安全读取
 import config as _config
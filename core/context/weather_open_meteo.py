@@ -5,28 +5,25 @@ Open-Meteo 天气上下文实现
 - 地理编码缓存（30天）
 - 天气缓存（15分钟）
 
+缓存存放在共享 SQLite 数据库中，按城市/坐标点查（见 context_cache.py）
+
 输出格式：例如 "12℃，多云，风1.0m/s" 或 "12℃，多云，风1.0m/s(东北)"
 """
 
 from __future__ import annotations
 
-import json
-import os
 import time
 from typing import Optional, Tuple, Dict, Any
 
 import requests
 
 import config as _config
+from utils.http_client import get_http_client
+from .context_cache import get_geo_cache, get_weather_cache
 
 DEBUG = bool(getattr(_config, "DEBUG", False))
 WEATHER_TIMEOUT_SECONDS = int(getattr(_config, "WEATHER_TIMEOUT_SECONDS", 10))
 
-# 缓存目录
-CONTEXT_CACHE_DIR = "data/context_cache"
-GEO_CACHE_FILE = os.path.join(CONTEXT_CACHE_DIR, "geo_city.json")
-WEATHER_CACHE_FILE = os.path.join(CONTEXT_CACHE_DIR, "weather_city.json")
-
 # TTL 设置
 GEO_CACHE_TTL = 30 * 24 * 3600  # 30天
 WEATHER_CACHE_TTL = 15 * 60  # 15分钟
@@ -38,6 +35,10 @@ FORECAST_API = "https://api.open-meteo.com/v1/forecast"
 # 备用地理编码 API (Nominatim)
 NOMINATIM_API = "https://nominatim.openstreetmap.org/search"
 
+# 共享 HTTP 客户端按主机登记超时：connect 3s，read WEATHER_TIMEOUT_SECONDS
+for _api in (GEOCODING_API, FORECAST_API, NOMINATIM_API):
+    get_http_client().set_host_timeout(_api, (3, WEATHER_TIMEOUT_SECONDS))
+
 # 天气码映射表（WMO Weather interpretation codes）
 WEATHER_CODE_MAP = {
     0: "晴",
@@ -84,33 +85,23 @@ WIND_DIRECTION_MAP = {
 }
 
 
-def _ensure_cache_dir() -> None:
-    """确保缓存目录存在"""
-    os.makedirs(CONTEXT_CACHE_DIR, exist_ok=True)
-
-
-def _read_json_cache(path: str) -> Dict[str, Any]:
-    """读取 JSON 缓存文件"""
-    if not os.path.exists(path):
-        return {}
+def _read_cache(cache, key: str) -> Optional[Dict[str, Any]]:
+    """读取缓存条目（失败时视为未命中）"""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return cache.get(key)
     except Exception as e:
         if DEBUG:
-            print(f"[Weather] 读取缓存失败 {path}: {e}")
-        return {}
+            print(f"[Weather] 读取缓存失败 {key}: {e}")
+        return None
 
 
-def _write_json_cache(path: str, data: Dict[str, Any]) -> None:
-    """写入 JSON 缓存文件"""
+def _write_cache(cache, key: str, data: Dict[str, Any]) -> None:
+    """写入单个缓存条目（只写这一行）"""
     try:
-        _ensure_cache_dir()
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        cache.put(key, data)
     except Exception as e:
         if DEBUG:
-            print(f"[Weather] 写入缓存失败 {path}: {e}")
+            print(f"[Weather] 写入缓存失败 {key}: {e}")
 
 
 def _is_cache_valid(ts: float, ttl: int) -> bool:
@@ -214,7 +205,7 @@ def _try_open_meteo_geocoding(query: str, language: str) -> Optional[list[Dict[s
     try:
         if DEBUG:
             print(f"[Weather] Open-Meteo 查询: {query} (lang={language})")
-        response = requests.get(
+        response = get_http_client().get(
             GEOCODING_API,
             params={
                 "name": query,
@@ -222,7 +213,6 @@ def _try_open_meteo_geocoding(query: str, language: str) -> Optional[list[Dict[s
                 "language": language,
                 "format": "json",
             },
-            timeout=(3, WEATHER_TIMEOUT_SECONDS),
         )
         response.raise_for_status()
         data = response.json()
@@ -253,7 +243,7 @@ def _try_nominatim_geocoding(query: str) -> Optional[list[Dict[str, Any]]]:
     try:
         if DEBUG:
             print(f"[Weather] Nominatim 查询: {query}")
-        response = requests.get(
+        response = get_http_client().get(
             NOMINATIM_API,
             params={
                 "q": query,
@@ -264,7 +254,6 @@ def _try_nominatim_geocoding(query: str) -> Optional[list[Dict[str, Any]]]:
             headers={
                 "User-Agent": "float_words/1.0 (contact: none)",
             },
-            timeout=(3, WEATHER_TIMEOUT_SECONDS),
         )
         response.raise_for_status()
         data = response.json()
@@ -319,9 +308,8 @@ def resolve_city_to_latlon(city: str) -> Optional[Tuple[float, float, str]]:
     city_key = city.strip()
     
     # 检查地理编码缓存
-    geo_cache = _read_json_cache(GEO_CACHE_FILE)
-    if city_key in geo_cache:
-        cached = geo_cache[city_key]
+    cached = _read_cache(get_geo_cache(), city_key)
+    if cached is not None:
         if _is_cache_valid(cached.get("ts", 0), GEO_CACHE_TTL):
             if DEBUG:
                 print(f"[Weather] 使用地理编码缓存: {city_key}")
@@ -389,15 +377,14 @@ def resolve_city_to_latlon(city: str) -> Optional[Tuple[float, float, str]]:
         return None
 
     # 保存到缓存
-    geo_cache[city_key] = {
+    _write_cache(get_geo_cache(), city_key, {
         "ts": time.time(),
         "lat": lat,
         "lon": lon,
         "name": name,
         "country": country,
         "country_code": country_code,
-    }
-    _write_json_cache(GEO_CACHE_FILE, geo_cache)
+    })
 
     if DEBUG:
         print(f"[Weather] 地理编码成功: {city_key} -> {name} ({lat}, {lon})")
@@ -419,9 +406,8 @@ def fetch_current_weather(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     city_key = f"{lat:.2f},{lon:.2f}"
     
     # 检查天气缓存
-    weather_cache = _read_json_cache(WEATHER_CACHE_FILE)
-    if city_key in weather_cache:
-        cached = weather_cache[city_key]
+    cached = _read_cache(get_weather_cache(), city_key)
+    if cached is not None:
         if _is_cache_valid(cached.get("ts", 0), WEATHER_CACHE_TTL):
             if DEBUG:
                 print(f"[Weather] 使用天气缓存: {city_key}")
@@ -431,7 +417,7 @@ def fetch_current_weather(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     try:
         if DEBUG:
             print(f"[Weather] 请求天气: ({lat}, {lon})")
-        response = requests.get(
+        response = get_http_client().get(
             FORECAST_API,
             params={
                 "latitude": lat,
@@ -439,7 +425,6 @@ def fetch_current_weather(lat: float, lon: float) -> Optional[Dict[str, Any]]:
                 "current": "temperature_2m,weather_code,wind_speed_10m,wind_direction_10m",
                 "timezone": "auto",
             },
-            timeout=(3, WEATHER_TIMEOUT_SECONDS),
         )
         response.raise_for_status()
         data = response.json()
@@ -483,8 +468,7 @@ def fetch_current_weather(lat: float, lon: float) -> Optional[Dict[str, Any]]:
         }
 
         # 保存到缓存
-        weather_cache[city_key] = result
-        _write_json_cache(WEATHER_CACHE_FILE, weather_cache)
+        _write_cache(get_weather_cache(), city_key, result)
 
         if DEBUG:
             print(f"[Weather] 天气获取成功: {result}")
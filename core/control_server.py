@@ -0,0 +1,144 @@
+"""
+本地控制套接字（CONTROL_SOCKET_ENABLED=True 时启用）
+
+在不重启程序的情况下查看 / 调整运行时参数（utils.runtime_params），供 tools/tune.py 使用。
+只监听本机、仅当前用户可访问的 QLocalServer；协议为一行一个 JSON：
+
+    {"op": "list"}                                         → {"ok": true, "params": [...]}
+    {"op": "set", "name": "SPAWN_INTERVAL", "value": 1200,
+     "persist": false}                                     → {"ok": true, "value": 1200}
+    {"op": "reset", "name": "SPAWN_INTERVAL", "persist": false} → {"ok": true, "value": 1800}
+
+set / reset 默认只影响本次运行；persist=true 时同时写入（或删除）设置中的 tuning/<名称>。
+任何处理错误都回复 {"ok": false, "error": ...}；一行超过 MAX_LINE_BYTES 时回复错误并断开连接。
+"""
+
+from __future__ import annotations
+
+import getpass
+import json
+from typing import Any, Dict, Optional
+
+from PyQt6.QtCore import QObject
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+from core import settings as app_settings
+from utils.runtime_params import get_params
+import config as _config
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+
+# 单条请求（一行）的长度上限：不发换行的客户端不能让缓冲无限增长
+MAX_LINE_BYTES = 64 * 1024
+
+
+def control_server_name() -> str:
+    """每个用户一个固定名称（tools/tune.py 按同样规则连接）"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "user"
+    return f"float_words_control_{user}"
+
+
+class ControlServer(QObject):
+    """运行时参数的本地控制服务"""
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._buffers: Dict[QLocalSocket, bytes] = {}
+
+    def start(self) -> bool:
+        name = control_server_name()
+        QLocalServer.removeServer(name)
+        if not self._server.listen(name):
+            print(f"[Control] 本地控制套接字监听失败: {self._server.errorString()}")
+            return False
+        if DEBUG:
+            print(f"[Control] 控制套接字已就绪: {name}")
+        return True
+
+    def stop(self) -> None:
+        for sock in list(self._buffers):
+            sock.abort()
+        self._buffers.clear()
+        self._server.close()
+
+    def _on_new_connection(self) -> None:
+        while self._server.hasPendingConnections():
+            sock = self._server.nextPendingConnection()
+            self._buffers[sock] = b""
+            sock.readyRead.connect(lambda s=sock: self._on_ready_read(s))
+            sock.disconnected.connect(lambda s=sock: self._on_disconnected(s))
+
+    def _on_disconnected(self, sock: QLocalSocket) -> None:
+        self._buffers.pop(sock, None)
+        sock.deleteLater()
+
+    def _on_ready_read(self, sock: QLocalSocket) -> None:
+        # Qt 槽中未捕获的异常会让 PyQt6 直接终止进程：所有错误都转成 {"ok": false} 回复
+        try:
+            if sock not in self._buffers:
+                return
+            data = self._buffers[sock] + bytes(sock.readAll())
+            *lines, rest = data.split(b"\n")
+            self._buffers[sock] = rest
+            for line in lines:
+                if line.strip():
+                    self._reply(sock, self._handle_line(line))
+            if len(rest) > MAX_LINE_BYTES:
+                self._reply(sock, {"ok": False, "error": f"请求超过 {MAX_LINE_BYTES} 字节"})
+                self._buffers.pop(sock, None)
+                sock.disconnectFromServer()
+        except Exception as e:
+            if DEBUG:
+                print(f"[Control] 处理请求失败: {e}")
+            try:
+                self._reply(sock, {"ok": False, "error": f"{type(e).__name__}: {e}"})
+            except Exception:
+                pass
+
+    @staticmethod
+    def _reply(sock: QLocalSocket, reply: Dict[str, Any]) -> None:
+        sock.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def _handle_line(self, line: bytes) -> Dict[str, Any]:
+        if len(line) > MAX_LINE_BYTES:
+            return {"ok": False, "error": f"请求超过 {MAX_LINE_BYTES} 字节"}
+        try:
+            return self._handle(json.loads(line))
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            if DEBUG:
+                print(f"[Control] 处理请求失败: {e}")
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def _handle(self, msg: Any) -> Dict[str, Any]:
+        if not isinstance(msg, dict):
+            return {"ok": False, "error": "请求必须是 JSON 对象"}
+        params = get_params()
+        op = msg.get("op")
+        try:
+            if op == "list":
+                return {"ok": True, "params": params.describe()}
+            name = str(msg.get("name") or "")
+            persist = bool(msg.get("persist"))
+            if op == "set":
+                value = params.set(name, msg.get("value"), source="control")
+                if persist:
+                    app_settings.set_tuning_override(name, value)
+                print(f"[Control] {name}={value}{'（已保存）' if persist else ''}")
+                return {"ok": True, "value": value, "live": params.spec(name).live}
+            if op == "reset":
+                params.clear(name, source="control")
+                if persist:
+                    app_settings.set_tuning_override(name, None)
+                print(f"[Control] {name} 已恢复为 {params.get(name)}（{params.source(name)}）")
+                return {"ok": True, "value": params.get(name), "source": params.source(name)}
+        except (KeyError, ValueError) as e:
+            return {"ok": False, "error": str(e).strip("'\"")}
+        return {"ok": False, "error": f"未知操作: {op}"}
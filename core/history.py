@@ -0,0 +1,70 @@
+"""
+展示历史
+
+记录每条实际展示过的文字（时间、日期、来源、文本），存放在共享 SQLite 数据库的 shown_history 表中。
+GUI 线程只把记录追加到内存缓冲，由后台缓存整理线程批量写入（或退出时 flush），生成窗口时不做 IO。
+"""
+
+from __future__ import annotations
+
+import datetime
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import config as _config
+from utils.cache_store import CacheStore, register_store
+
+HISTORY_RETENTION_DAYS = int(getattr(_config, "HISTORY_RETENTION_DAYS", 90))
+
+
+class ShownHistory(CacheStore):
+    """展示历史（按保存天数清理）"""
+
+    table = "shown_history"
+    ts_column = "ts"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._buffer: List[Tuple[float, str, str, str]] = []
+        self._buffer_lock = threading.Lock()
+
+    def record(self, text: str, source: str = "") -> None:
+        """记录一次展示（只写内存缓冲）"""
+        if not text:
+            return
+        now = time.time()
+        with self._buffer_lock:
+            self._buffer.append((now, datetime.date.today().isoformat(), source or "", text))
+
+    def flush(self) -> None:
+        """缓冲批量写入数据库（一个事务）"""
+        with self._buffer_lock:
+            rows, self._buffer = self._buffer, []
+        if rows:
+            self.db.executemany("INSERT INTO shown_history (ts, date, source, text) VALUES (?, ?, ?, ?)", rows)
+        super().flush()
+
+    def count_on(self, date: str) -> int:
+        row = self.db.query_one("SELECT COUNT(*) FROM shown_history WHERE date = ?", (date,))
+        return int(row[0]) if row else 0
+
+    def recent(self, limit: int = 50) -> List[Tuple[float, str, str]]:
+        """最近展示的文字：[(ts, source, text)]"""
+        rows = self.db.query_all("SELECT ts, source, text FROM shown_history ORDER BY id DESC LIMIT ?", (int(limit),))
+        return [(r["ts"], r["source"], r["text"]) for r in rows]
+
+
+_history: Optional[ShownHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_shown_history() -> ShownHistory:
+    """展示历史（进程内单例，登记到后台整理）"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = register_store(
+                ShownHistory("shown_history", max_age_seconds=HISTORY_RETENTION_DAYS * 24 * 3600)
+            )
+        return _history
@@ -5,26 +5,35 @@
 - 不写回 config.py（config 仅作为默认值兜底）
 - API Key 等敏感信息保存在本机（Windows 注册表 / macOS plist / Linux ini）
 - 提供 typed getters/setters，避免散落全项目直接用 QSettings
+- 读取走内存中的不可变快照（SettingsSnapshot）：启动时一次读入，写入或设置文件被外部修改时整体重载；
+  热路径（每次生成漂浮文字、面板刷新、每次 AI 请求取 Key）只是属性访问，不再构造 QSettings
+- 快照变化时 get_notifier().settingsChanged(keys) 发出变化的键（控制器据此热更新）
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Optional
+import os
+import sys
+import threading
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from PyQt6.QtCore import QSettings
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QSettings, QTimer, pyqtSignal
 
 # config 作为默认兜底，但不要强依赖某些字段一定存在（避免 ImportError）
 import config as _config
+from utils.runtime_params import get_params
 
 
+DEBUG = bool(getattr(_config, "DEBUG", False))
+
 APP_ORG = "FloatWords"
 APP_NAME = "FloatWords"
 
 
 class Keys:
     AI_ENABLED = "ai/enabled"
-    AI_TEXT_SOURCE = "ai/text_source"  # auto/local/ai
+    AI_TEXT_SOURCE = "ai/text_source"  # auto/local/ai/mix
     AI_DEEPSEEK_API_KEY = "ai/deepseek_api_key"
     CONTEXT_CITY = "context/city"
     CONTEXT_LOCATION_MODE = "context/location_mode"  # manual/ip
@@ -36,15 +45,16 @@ class Keys:
     UI_SHOW_PANEL_ON_STARTUP = "ui/show_panel_on_startup"  # 启动时显示控制面板
     PROMPT_SALUTATION = "prompt/salutation"
     PROMPT_USER_HINT = "prompt/user_hint"
+    TUNING = "tuning"  # 运行时参数覆盖：tuning/<参数名>（见 utils.runtime_params）
 
 
 def _qs() -> QSettings:
     return QSettings(APP_ORG, APP_NAME)
 
 
-def get_bool(key: str, default: bool) -> bool:
+def get_bool(key: str, default: bool, qs: Optional[QSettings] = None) -> bool:
     try:
-        v = _qs().value(key, default)
+        v = (qs or _qs()).value(key, default)
         if isinstance(v, bool):
             return v
         if isinstance(v, (int, float)):
@@ -55,31 +65,466 @@ def get_bool(key: str, default: bool) -> bool:
         return default
 
 
-def get_int(key: str, default: int) -> int:
+def get_int(key: str, default: int, qs: Optional[QSettings] = None) -> int:
     try:
-        v = _qs().value(key, default)
+        v = (qs or _qs()).value(key, default)
         return int(v)
     except Exception:
         return default
 
 
-def get_str(key: str, default: str) -> str:
+def get_str(key: str, default: str, qs: Optional[QSettings] = None) -> str:
     try:
-        v = _qs().value(key, default)
+        v = (qs or _qs()).value(key, default)
         return "" if v is None else str(v)
     except Exception:
         return default
 
 
 def set_value(key: str, value: Any) -> None:
-    _qs().setValue(key, value)
+    """写入单个设置（等同于只含一个键的事务）"""
+    with transaction() as tx:
+        tx.set(key, value)
+
+
+# -------- 读取（构建快照时使用同一个 QSettings） --------
+
+
+def _read_ai_enabled(qs: QSettings) -> bool:
+    return get_bool(Keys.AI_ENABLED, bool(getattr(_config, "AI_ENABLED", True)), qs)
+
+
+def _read_text_source(qs: QSettings) -> str:
+    default = str(getattr(_config, "TEXT_SOURCE", "auto"))
+    v = get_str(Keys.AI_TEXT_SOURCE, default, qs).lower()
+    return v if v in ("auto", "local", "ai", "mix") else default
+
+
+def _read_city(qs: QSettings) -> str:
+    # settings 优先，其次 config.CITY
+    v = get_str(Keys.CONTEXT_CITY, "", qs).strip()
+    return v if v else (str(getattr(_config, "CITY", "")) or "")
+
+
+def _read_location_mode(qs: QSettings) -> str:
+    default = str(getattr(_config, "LOCATION_MODE", "manual") or "manual")
+    v = get_str(Keys.CONTEXT_LOCATION_MODE, default, qs).lower()
+    return v if v in ("manual", "ip") else "manual"
+
+
+def _read_float_density_label(qs: QSettings) -> str:
+    default_max = int(getattr(_config, "MAX_FLOATS", 6))
+    # 用默认 max_floats 推断一个最接近的档位
+    if default_max >= 15:
+        default_label = "超多"
+    elif default_max >= 8:
+        default_label = "多"
+    elif default_max >= 4:
+        default_label = "普通"
+    else:
+        default_label = "少"
+
+    v = get_str(Keys.UI_FLOAT_DENSITY, default_label, qs).strip()
+    return v if v in _DENSITY_TO_MAX_FLOATS else default_label
+
+
+def _read_float_speed_label(qs: QSettings) -> str:
+    default_ms = int(getattr(_config, "FLOAT_SPEED", 40))
+    if default_ms <= 30:
+        default_label = "快"
+    elif default_ms <= 50:
+        default_label = "正常"
+    else:
+        default_label = "慢"
+
+    v = get_str(Keys.UI_FLOAT_SPEED, default_label, qs).strip()
+    return v if v in _SPEED_TO_MS else default_label
+
+
+def _effective_api_key(settings_key: str) -> str:
+    """
+    实际使用的 DeepSeek Key：
+    1) 环境变量 DEEPSEEK_API_KEY
+    2) QSettings（设置窗口保存）
+    3) config.AI_API_KEY（兜底，通常为空）
+    """
+    env = (os.getenv("DEEPSEEK_API_KEY", "") or "").strip()
+    if env:
+        return env
+    if settings_key:
+        return settings_key
+    return str(getattr(_config, "AI_API_KEY", "") or "").strip()
+
+
+# -------- 快照 --------
+
+
+_DENSITY_TO_MAX_FLOATS = {
+    "超多": 30,
+    "多": 15,
+    "普通": 8,
+    "少": 3,
+}
+
+_SPEED_TO_MS = {
+    "快": 25,
+    "正常": 40,
+    "慢": 60,
+}
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """某一时刻的全部设置（已解析、已套用默认值；发布后不再修改）"""
+
+    ai_enabled: bool
+    text_source: str
+    deepseek_api_key: str  # 设置窗口保存的 Key
+    api_key: str  # 实际使用的 Key（环境变量 > 设置 > config）
+    city: str
+    location_mode: str
+    weather_enabled: bool
+    idle_only: bool
+    idle_threshold_seconds: int
+    float_density_label: str
+    max_floats: int
+    float_speed_label: str
+    float_speed_ms: int
+    show_panel_on_startup: bool
+    salutation: str
+    user_custom_prompt: str
+    tuning: Tuple[Tuple[str, str], ...]  # 运行时参数覆盖 (名称, 值)，按名称排序
+
+    def changed_keys(self, other: "SettingsSnapshot") -> List[str]:
+        """与另一个快照相比发生变化的设置键（派生字段归到其来源键）"""
+        keys: List[str] = []
+        for f in fields(self):
+            if getattr(self, f.name) != getattr(other, f.name):
+                key = _FIELD_KEYS[f.name]
+                if key not in keys:
+                    keys.append(key)
+        return keys
+
+
+_FIELD_KEYS = {
+    "ai_enabled": Keys.AI_ENABLED,
+    "text_source": Keys.AI_TEXT_SOURCE,
+    "deepseek_api_key": Keys.AI_DEEPSEEK_API_KEY,
+    "api_key": Keys.AI_DEEPSEEK_API_KEY,
+    "city": Keys.CONTEXT_CITY,
+    "location_mode": Keys.CONTEXT_LOCATION_MODE,
+    "weather_enabled": Keys.CONTEXT_WEATHER_ENABLED,
+    "idle_only": Keys.IDLE_ENABLED,
+    "idle_threshold_seconds": Keys.IDLE_THRESHOLD_SECONDS,
+    "float_density_label": Keys.UI_FLOAT_DENSITY,
+    "max_floats": Keys.UI_FLOAT_DENSITY,
+    "float_speed_label": Keys.UI_FLOAT_SPEED,
+    "float_speed_ms": Keys.UI_FLOAT_SPEED,
+    "show_panel_on_startup": Keys.UI_SHOW_PANEL_ON_STARTUP,
+    "salutation": Keys.PROMPT_SALUTATION,
+    "user_custom_prompt": Keys.PROMPT_USER_HINT,
+    "tuning": Keys.TUNING,
+}
+
+
+def _load(qs: Optional[QSettings] = None) -> SettingsSnapshot:
+    """用一个 QSettings 读出全部设置（传入刚写入的 qs 时直接读其内存中的值）"""
+    if qs is None:
+        qs = _qs()
+        qs.sync()  # 设置文件被外部修改时重新读入
+    density = _read_float_density_label(qs)
+    speed = _read_float_speed_label(qs)
+    settings_key = get_str(Keys.AI_DEEPSEEK_API_KEY, "", qs).strip()
+    qs.beginGroup(Keys.TUNING)
+    tuning = tuple(sorted((k, str(qs.value(k))) for k in qs.childKeys()))
+    qs.endGroup()
+    return SettingsSnapshot(
+        ai_enabled=_read_ai_enabled(qs),
+        text_source=_read_text_source(qs),
+        deepseek_api_key=settings_key,
+        api_key=_effective_api_key(settings_key),
+        city=_read_city(qs),
+        location_mode=_read_location_mode(qs),
+        weather_enabled=get_bool(Keys.CONTEXT_WEATHER_ENABLED, bool(getattr(_config, "WEATHER_ENABLED", False)), qs),
+        idle_only=get_bool(Keys.IDLE_ENABLED, bool(getattr(_config, "IDLE_ONLY", True)), qs),
+        idle_threshold_seconds=max(0, get_int(Keys.IDLE_THRESHOLD_SECONDS, int(getattr(_config, "IDLE_THRESHOLD_SECONDS", 30)), qs)),
+        float_density_label=density,
+        max_floats=int(_DENSITY_TO_MAX_FLOATS.get(density, int(getattr(_config, "MAX_FLOATS", 6)))),
+        float_speed_label=speed,
+        float_speed_ms=int(_SPEED_TO_MS.get(speed, int(getattr(_config, "FLOAT_SPEED", 40)))),
+        show_panel_on_startup=get_bool(Keys.UI_SHOW_PANEL_ON_STARTUP, True, qs),  # 默认 True
+        salutation=get_str(Keys.PROMPT_SALUTATION, "", qs).strip(),
+        user_custom_prompt=get_str(Keys.PROMPT_USER_HINT, "", qs).strip(),
+        tuning=tuning,
+    )
+
+
+_snap: Optional[SettingsSnapshot] = None
+_snap_lock = threading.Lock()
+
+
+def snapshot() -> SettingsSnapshot:
+    """当前设置快照（任意线程可读；先取一次引用再使用）"""
+    snap = _snap
+    if snap is None:
+        with _snap_lock:
+            if _snap is None:
+                _publish(_load())
+            snap = _snap
+    return snap
+
+
+def _publish(snap: SettingsSnapshot) -> None:
+    global _snap
+    _snap = snap
+
+
+def reload() -> List[str]:
+    """重新读取设置并发布新快照；有变化时发出 settingsChanged，返回变化的键"""
+    with _snap_lock:
+        old = _snap
+        new = _load()
+        _publish(new)
+    keys = old.changed_keys(new) if old is not None else []
+    if _notifier is None:
+        # 没有人订阅时（AI 工作进程、命令行工具）不创建通知器
+        return keys
+    _notifier._ensure_watched()
+    if keys:
+        _notifier.settingsChanged.emit(keys)
+    return keys
+
+
+class SettingsNotifier(QObject):
+    """设置变化通知；可选监听设置文件被外部修改"""
+
+    settingsChanged = pyqtSignal(list)  # changed_keys: list[str]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._watcher: Optional[QFileSystemWatcher] = None
+        self._path = ""
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(300)
+        self._debounce.timeout.connect(self._on_file_settled)
+
+    def watch_external_changes(self) -> bool:
+        """
+        监听设置文件（Linux ini / macOS plist）；Windows 注册表没有文件可监听，返回 False
+
+        首次运行时文件可能还不存在，第一次写入设置后开始监听。需在 GUI 线程调用。
+        """
+        if sys.platform == "win32":
+            return False
+        if self._watcher is not None:
+            return True
+        self._path = _qs().fileName()
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(lambda _p: self._debounce.start())
+        self._ensure_watched()
+        return True
+
+    def _ensure_watched(self) -> None:
+        # 文件刚创建，或编辑器“写临时文件再改名”让监听失效时，重新加上
+        watcher = self._watcher
+        if watcher is not None and self._path not in watcher.files() and os.path.isfile(self._path):
+            watcher.addPath(self._path)
+
+    def _on_file_settled(self) -> None:
+        self._ensure_watched()
+        keys = reload()
+        if keys:
+            print(f"[Settings] 设置文件已被外部修改: {', '.join(keys)}")
+
+
+_notifier: Optional[SettingsNotifier] = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> SettingsNotifier:
+    """设置变化通知器（单例；首次应在 GUI 线程中获取）"""
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = SettingsNotifier()
+        return _notifier
+
+
+# -------- 批量写入（事务） --------
+
+
+def _choice(*allowed: str) -> Callable[[Any], str]:
+    def normalize(v: Any) -> str:
+        s = str(v or "").strip().lower()
+        if s not in allowed:
+            raise ValueError(f"可选值为 {'/'.join(allowed)}")
+        return s
+
+    return normalize
+
+
+def _label(mapping: Dict[str, int]) -> Callable[[Any], str]:
+    def normalize(v: Any) -> str:
+        s = str(v or "").strip()
+        if s not in mapping:
+            raise ValueError(f"可选值为 {'/'.join(mapping)}")
+        return s
+
+    return normalize
+
+
+def _non_negative_int(v: Any) -> int:
+    n = int(v)
+    if n < 0:
+        raise ValueError("不能为负数")
+    return n
+
+
+def _text(v: Any) -> str:
+    return str(v or "").strip()
+
+
+# 键 → (规范化/校验函数, 对应的快照字段)；校验失败抛 ValueError
+_SCHEMA: Dict[str, Tuple[Callable[[Any], Any], str]] = {
+    Keys.AI_ENABLED: (bool, "ai_enabled"),
+    Keys.AI_TEXT_SOURCE: (_choice("auto", "local", "ai", "mix"), "text_source"),
+    Keys.AI_DEEPSEEK_API_KEY: (_text, "deepseek_api_key"),
+    Keys.CONTEXT_CITY: (_text, "city"),
+    Keys.CONTEXT_LOCATION_MODE: (_choice("manual", "ip"), "location_mode"),
+    Keys.CONTEXT_WEATHER_ENABLED: (bool, "weather_enabled"),
+    Keys.IDLE_ENABLED: (bool, "idle_only"),
+    Keys.IDLE_THRESHOLD_SECONDS: (_non_negative_int, "idle_threshold_seconds"),
+    Keys.UI_FLOAT_DENSITY: (_label(_DENSITY_TO_MAX_FLOATS), "float_density_label"),
+    Keys.UI_FLOAT_SPEED: (_label(_SPEED_TO_MS), "float_speed_label"),
+    Keys.UI_SHOW_PANEL_ON_STARTUP: (bool, "show_panel_on_startup"),
+    Keys.PROMPT_SALUTATION: (_text, "salutation"),
+    Keys.PROMPT_USER_HINT: (_text, "user_custom_prompt"),
+}
+
+
+_TUNING_PREFIX = Keys.TUNING + "/"
+
+
+def _current(snap: SettingsSnapshot, key: str) -> Any:
+    """某个键在快照中的当前值（用于跳过没有变化的写入）"""
+    if key.startswith(_TUNING_PREFIX):
+        return dict(snap.tuning).get(key[len(_TUNING_PREFIX):])
+    return getattr(snap, _SCHEMA[key][1])
+
+
+def set_tuning_override(name: str, value: Any) -> None:
+    """保存一个运行时参数覆盖（value 为 None 时删除）"""
+    set_value(_TUNING_PREFIX + name, value)
+
+
+class SettingsError(ValueError):
+    """事务校验失败（errors: 键 → 原因）；整批都不会写入"""
+
+    def __init__(self, errors: Dict[str, str]) -> None:
+        self.errors = dict(errors)
+        super().__init__("；".join(f"{k}: {v}" for k, v in self.errors.items()))
+
+
+class SettingsTransaction:
+    """
+    批量写入设置：set() 暂存，commit() 整批校验后一次写入、一次 sync，
+    在内存中比较新旧快照，只发出一次 settingsChanged（包含全部变化的键）
+
+        with app_settings.transaction() as tx:
+            tx.set(Keys.CONTEXT_CITY, city)
+            tx.set(Keys.PROMPT_SALUTATION, salutation)
+        changed = tx.changed_keys
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, Any] = {}
+        self.changed_keys: List[str] = []
+        self._done = False
+
+    def set(self, key: str, value: Any) -> "SettingsTransaction":
+        if self._done:
+            raise RuntimeError("事务已结束")
+        self._pending[key] = value
+        return self
+
+    def set_many(self, values: Dict[str, Any]) -> "SettingsTransaction":
+        for key, value in values.items():
+            self.set(key, value)
+        return self
+
+    def commit(self) -> List[str]:
+        """写入并返回变化的键；校验失败抛 SettingsError（不写入任何键）"""
+        if self._done:
+            raise RuntimeError("事务已结束")
+        self._done = True
+
+        values: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for key, value in self._pending.items():
+            if key.startswith(_TUNING_PREFIX):
+                # 运行时参数覆盖：None 表示删除，其余按参数表校验后以字符串保存
+                try:
+                    name = key[len(_TUNING_PREFIX):]
+                    values[key] = None if value is None else str(get_params().coerce(name, value))
+                except (KeyError, ValueError) as e:
+                    errors[key] = str(e)
+                continue
+            spec = _SCHEMA.get(key)
+            if spec is None:
+                errors[key] = "未知设置项"
+                continue
+            try:
+                values[key] = spec[0](value)
+            except (TypeError, ValueError) as e:
+                errors[key] = str(e) or "无效的值"
+        if errors:
+            raise SettingsError(errors)
+
+        with _snap_lock:
+            old = _snap if _snap is not None else _load()
+            # 与当前值相同的键不写（保持未设置的项继续跟随 config 默认值）
+            writes = {k: v for k, v in values.items() if _current(old, k) != v}
+            if not writes:
+                return []
+            qs = _qs()
+            for key, value in writes.items():
+                if value is None:
+                    qs.remove(key)
+                else:
+                    qs.setValue(key, value)
+            qs.sync()
+            new = _load(qs)
+            _publish(new)
+        self.changed_keys = old.changed_keys(new)
+
+        if _notifier is not None:
+            _notifier._ensure_watched()
+            if self.changed_keys:
+                _notifier.settingsChanged.emit(self.changed_keys)
+        if DEBUG and self.changed_keys:
+            print(f"[Settings] 已保存 {len(writes)} 项: {', '.join(self.changed_keys)}")
+        return self.changed_keys
+
+    def __enter__(self) -> "SettingsTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # 块内出错则放弃整批
+        if exc_type is None:
+            self.commit()
+
+
+def transaction() -> SettingsTransaction:
+    """开始一个设置事务"""
+    return SettingsTransaction()
 
 
 # -------- typed accessors --------
 
 
 def get_ai_enabled() -> bool:
-    return get_bool(Keys.AI_ENABLED, bool(getattr(_config, "AI_ENABLED", True)))
+    return snapshot().ai_enabled
 
 
 def set_ai_enabled(v: bool) -> None:
@@ -87,9 +532,7 @@ def set_ai_enabled(v: bool) -> None:
 
 
 def get_text_source() -> str:
-    default = str(getattr(_config, "TEXT_SOURCE", "auto"))
-    v = get_str(Keys.AI_TEXT_SOURCE, default).lower()
-    return v if v in ("auto", "local", "ai") else default
+    return snapshot().text_source
 
 
 def set_text_source(v: str) -> None:
@@ -97,8 +540,8 @@ def set_text_source(v: str) -> None:
 
 
 def get_deepseek_api_key() -> str:
-    # 注意：环境变量优先级不在这里处理（调用方做 env > settings > config）
-    return get_str(Keys.AI_DEEPSEEK_API_KEY, "")
+    # 注意：环境变量优先级不在这里处理（实际使用的 Key 见 snapshot().api_key）
+    return snapshot().deepseek_api_key
 
 
 def set_deepseek_api_key(v: str) -> None:
@@ -106,9 +549,7 @@ def set_deepseek_api_key(v: str) -> None:
 
 
 def get_city() -> str:
-    # settings 优先，其次 config.CITY
-    v = get_str(Keys.CONTEXT_CITY, "").strip()
-    return v if v else (str(getattr(_config, "CITY", "")) or "")
+    return snapshot().city
 
 
 def set_city(v: str) -> None:
@@ -116,9 +557,7 @@ def set_city(v: str) -> None:
 
 
 def get_location_mode() -> str:
-    default = str(getattr(_config, "LOCATION_MODE", "manual") or "manual")
-    v = get_str(Keys.CONTEXT_LOCATION_MODE, default).lower()
-    return v if v in ("manual", "ip") else "manual"
+    return snapshot().location_mode
 
 
 def set_location_mode(v: str) -> None:
@@ -127,7 +566,7 @@ def set_location_mode(v: str) -> None:
 
 def get_weather_enabled() -> bool:
     """是否启用天气上下文（Open-Meteo，无需 API Key）"""
-    return get_bool(Keys.CONTEXT_WEATHER_ENABLED, bool(getattr(_config, "WEATHER_ENABLED", False)))
+    return snapshot().weather_enabled
 
 
 def set_weather_enabled(v: bool) -> None:
@@ -135,7 +574,7 @@ def set_weather_enabled(v: bool) -> None:
 
 
 def get_idle_only() -> bool:
-    return get_bool(Keys.IDLE_ENABLED, bool(getattr(_config, "IDLE_ONLY", True)))
+    return snapshot().idle_only
 
 
 def set_idle_only(v: bool) -> None:
@@ -143,8 +582,7 @@ def set_idle_only(v: bool) -> None:
 
 
 def get_idle_threshold_seconds() -> int:
-    v = get_int(Keys.IDLE_THRESHOLD_SECONDS, int(getattr(_config, "IDLE_THRESHOLD_SECONDS", 30)))
-    return max(0, v)
+    return snapshot().idle_threshold_seconds
 
 
 def set_idle_threshold_seconds(v: int) -> None:
@@ -154,35 +592,9 @@ def set_idle_threshold_seconds(v: int) -> None:
 # -------- UI 档位：数量/速度 --------
 
 
-_DENSITY_TO_MAX_FLOATS = {
-    "超多": 30,
-    "多": 15,
-    "普通": 8,
-    "少": 3,
-}
-
-_SPEED_TO_MS = {
-    "快": 25,
-    "正常": 40,
-    "慢": 60,
-}
-
-
 def get_float_density_label() -> str:
     """漂浮数量档位（中文）"""
-    default_max = int(getattr(_config, "MAX_FLOATS", 6))
-    # 用默认 max_floats 推断一个最接近的档位
-    if default_max >= 15:
-        default_label = "超多"
-    elif default_max >= 8:
-        default_label = "多"
-    elif default_max >= 4:
-        default_label = "普通"
-    else:
-        default_label = "少"
-
-    v = get_str(Keys.UI_FLOAT_DENSITY, default_label).strip()
-    return v if v in _DENSITY_TO_MAX_FLOATS else default_label
+    return snapshot().float_density_label
 
 
 def set_float_density_label(v: str) -> None:
@@ -191,22 +603,12 @@ def set_float_density_label(v: str) -> None:
 
 def get_max_floats() -> int:
     """将档位映射为窗口上限"""
-    label = get_float_density_label()
-    return int(_DENSITY_TO_MAX_FLOATS.get(label, int(getattr(_config, "MAX_FLOATS", 6))))
+    return snapshot().max_floats
 
 
 def get_float_speed_label() -> str:
     """漂浮速度档位（中文）"""
-    default_ms = int(getattr(_config, "FLOAT_SPEED", 40))
-    if default_ms <= 30:
-        default_label = "快"
-    elif default_ms <= 50:
-        default_label = "正常"
-    else:
-        default_label = "慢"
-
-    v = get_str(Keys.UI_FLOAT_SPEED, default_label).strip()
-    return v if v in _SPEED_TO_MS else default_label
+    return snapshot().float_speed_label
 
 
 def set_float_speed_label(v: str) -> None:
@@ -215,13 +617,12 @@ def set_float_speed_label(v: str) -> None:
 
 def get_float_speed_ms() -> int:
     """将档位映射为 QTimer 间隔（ms）"""
-    label = get_float_speed_label()
-    return int(_SPEED_TO_MS.get(label, int(getattr(_config, "FLOAT_SPEED", 40))))
+    return snapshot().float_speed_ms
 
 
 def get_show_panel_on_startup() -> bool:
     """是否在启动时显示控制面板"""
-    return get_bool(Keys.UI_SHOW_PANEL_ON_STARTUP, True)  # 默认 True
+    return snapshot().show_panel_on_startup
 
 
 def set_show_panel_on_startup(v: bool) -> None:
@@ -234,7 +635,7 @@ def set_show_panel_on_startup(v: bool) -> None:
 
 def get_salutation() -> str:
     """称呼，如“小王”、“阿哲”等，可为空"""
-    return get_str(Keys.PROMPT_SALUTATION, "").strip()
+    return snapshot().salutation
 
 
 def set_salutation(v: str) -> None:
@@ -243,9 +644,8 @@ def set_salutation(v: str) -> None:
 
 def get_user_custom_prompt() -> str:
     """用户自定义提示词，可多句自然语言"""
-    return get_str(Keys.PROMPT_USER_HINT, "").strip()
+    return snapshot().user_custom_prompt
 
 
 def set_user_custom_prompt(v: str) -> None:
     set_value(Keys.PROMPT_USER_HINT, (v or "").strip())
-
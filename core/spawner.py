@@ -3,7 +3,7 @@
 只负责定时发出生成请求，不管理窗口
 """
 from PyQt6.QtCore import QObject, QTimer, pyqtSignal
-from config import SPAWN_INTERVAL
+from utils.runtime_params import param
 
 
 class FloatSpawner(QObject):
@@ -18,10 +18,17 @@ class FloatSpawner(QObject):
         self.timer.timeout.connect(self._on_timeout)
         self.timer.setSingleShot(False)  # 重复定时器
     
-    def start(self):
-        """启动定时器"""
+    def start(self, immediate: bool = False):
+        """启动定时器（immediate=True 时先立即发出一次生成请求）"""
         if not self.timer.isActive():
-            self.timer.start(SPAWN_INTERVAL)
+            self.timer.start(param("SPAWN_INTERVAL"))
+            if immediate:
+                QTimer.singleShot(0, self._on_timeout)
+
+    def set_interval(self, ms: int):
+        """修改生成间隔（运行中立即生效）"""
+        if self.timer.isActive():
+            self.timer.start(int(ms))
     
     def stop(self):
         """停止定时器"""
@@ -6,9 +6,12 @@
 
 from .base import BaseTextProvider
 from .local_provider import LocalTextProvider
+from .text_pool import TextPool, get_text_pool
 
 __all__ = [
     "BaseTextProvider",
     "LocalTextProvider",
+    "TextPool",
+    "get_text_pool",
 ]
 
@@ -0,0 +1,193 @@
+"""
+AI 文本包缓存
+
+文本包按「日期 + 上下文哈希」区分：
+- key 由影响生成结果的上下文稳定哈希得到：城市、天气分档、称呼、自定义提示词、模型、模板版本
+- 同一天可以并存多个变体（例如切换称呼后再切回来，直接复用之前的文本包）
+- 文本包存放在 SQLite 的 ai_packs 表中（主键 日期 + key），按保存天数与总大小上限淘汰
+- 首次使用时导入旧版 data/ai_cache/*.json 文件
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from utils.cache_store import CacheStore, register_store
+from config import (
+    DEBUG,
+    AI_CACHE_DIR,
+    AI_CACHE_MAX_MB,
+    AI_CACHE_MAX_DAYS,
+    AI_MODEL,
+    AI_PROMPT_TEMPLATE,
+    AI_PROMPT_TEMPLATE_VERSION,
+)
+
+_DATE_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\.([0-9a-f]+))?\.json$")
+_TEMP_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*℃")
+
+
+def weather_bucket(weather: str) -> str:
+    """
+    天气分档：天气描述 + 5℃ 一档的温度
+
+    "12℃，多云，风1.0m/s(东北)" → "多云|10"；风速等细节不参与，避免每 15 分钟换一个 key
+    """
+    weather = (weather or "").strip()
+    if not weather:
+        return ""
+    parts = [p.strip() for p in re.split(r"[，,]", weather) if p.strip()]
+    cond = parts[1] if len(parts) > 1 else ""
+    m = _TEMP_RE.search(weather)
+    if not m:
+        return cond or weather
+    temp = int(float(m.group(1)) // 5 * 5)
+    return f"{cond}|{temp}"
+
+
+def template_version() -> str:
+    """模板版本：配置中的版本号 + 模板内容校验（改了模板忘记改版本号也能区分）"""
+    return f"{AI_PROMPT_TEMPLATE_VERSION}:{zlib.crc32(AI_PROMPT_TEMPLATE.encode('utf-8')):08x}"
+
+
+def context_key(ctx: Dict[str, Any]) -> str:
+    """上下文 → 稳定的缓存 key（12 位十六进制）"""
+    material = {
+        "city": ctx.get("city") or "",
+        "weather": weather_bucket(ctx.get("weather") or ""),
+        "salutation": ctx.get("salutation") or "",
+        "user_custom_prompt": ctx.get("user_custom_prompt") or "",
+        "model": AI_MODEL,
+        "template": template_version(),
+    }
+    raw = json.dumps(material, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+class AIPackStore(CacheStore):
+    """文本包变体：(日期, 上下文 key) → 文本包"""
+
+    table = "ai_packs"
+    ts_column = "created"
+    used_column = "used"
+    size_column = "size"
+
+    def load(self, date: str, key: str) -> Optional[Dict[str, Any]]:
+        """读取某天某上下文的文本包，没有则返回 None"""
+        row = self.db.query_one("SELECT payload FROM ai_packs WHERE date = ? AND ctx_key = ?", (date, key))
+        if row is None:
+            self.record_miss()
+            return None
+        try:
+            data = json.loads(row["payload"])
+        except ValueError as e:
+            if DEBUG:
+                print(f"[AI] 缓存 {date}.{key} 已损坏，删除: {e}")
+            self.remove(date, key)
+            self.record_miss()
+            return None
+        self.db.execute("UPDATE ai_packs SET used = ? WHERE date = ? AND ctx_key = ?", (time.time(), date, key))
+        self.record_hit()
+        return data if isinstance(data, dict) else None
+
+    def save(self, date: str, key: str, payload: Dict[str, Any], context: Dict[str, Any]) -> None:
+        """写入（或替换）一个变体，随后按上限淘汰"""
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO ai_packs (date, ctx_key, context, payload, size, created, used) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(date, ctx_key) DO UPDATE SET context = excluded.context, payload = excluded.payload, "
+            "size = excluded.size, created = excluded.created, used = excluded.used",
+            (date, key, json.dumps(context or {}, ensure_ascii=False), raw, len(raw.encode("utf-8")), now, now),
+        )
+        self.evict()
+
+    def remove(self, date: str, key: str) -> bool:
+        cur = self.db.execute("DELETE FROM ai_packs WHERE date = ? AND ctx_key = ?", (date, key))
+        return cur.rowcount > 0
+
+    def has_date(self, date: str) -> bool:
+        """某天是否已有任意变体"""
+        return self.db.query_one("SELECT 1 FROM ai_packs WHERE date = ? LIMIT 1", (date,)) is not None
+
+    def variants(self, date: str) -> Dict[str, Dict[str, Any]]:
+        """某天的全部变体：上下文 key → {"context", "size", "created", "used"}"""
+        rows = self.db.query_all("SELECT ctx_key, context, size, created, used FROM ai_packs WHERE date = ?", (date,))
+        out: Dict[str, Dict[str, Any]] = {}
+        for r in rows:
+            try:
+                ctx = json.loads(r["context"])
+            except ValueError:
+                ctx = {}
+            out[r["ctx_key"]] = {"context": ctx, "size": r["size"], "created": r["created"], "used": r["used"]}
+        return out
+
+    def import_json_dir(self, directory: str) -> int:
+        """
+        导入旧版 JSON 缓存文件（YYYY-MM-DD.json / YYYY-MM-DD.<key>.json），导入后删除文件
+
+        旧文件没有 key 时按其保存的上下文计算；数据库中已有同一变体时以数据库为准
+        """
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            return 0
+        imported = 0
+        for name in names:
+            m = _DATE_FILE_RE.match(name)
+            if not m:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+                ctx = payload.get("context") or {}
+                if not isinstance(ctx, dict):
+                    ctx = {}
+                date, key = m.group(1), m.group(2) or context_key(ctx)
+                mtime = os.path.getmtime(path)
+                raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+                self.db.execute(
+                    "INSERT OR IGNORE INTO ai_packs (date, ctx_key, context, payload, size, created, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (date, key, json.dumps(ctx, ensure_ascii=False), raw, len(raw.encode("utf-8")), mtime, mtime),
+                )
+                os.remove(path)
+                imported += 1
+            except Exception as e:
+                if DEBUG:
+                    print(f"[AI] 导入旧缓存 {name} 失败: {e}")
+        # 文件存储时代的索引已无用
+        try:
+            os.remove(os.path.join(directory, "_index.json"))
+        except OSError:
+            pass
+        if DEBUG and imported:
+            print(f"[AI] 已导入 {imported} 个旧缓存文件到数据库")
+        return imported
+
+
+_cache_index: AIPackStore | None = None
+_cache_index_lock = threading.Lock()
+
+
+def get_cache_index() -> AIPackStore:
+    """AI 文本包缓存（进程内单例，登记到缓存维护注册表；首次使用时导入旧 JSON 缓存）"""
+    global _cache_index
+    with _cache_index_lock:
+        if _cache_index is None:
+            store = AIPackStore(
+                "ai_cache",
+                max_bytes=int(AI_CACHE_MAX_MB * 1024 * 1024),
+                max_age_seconds=AI_CACHE_MAX_DAYS * 24 * 3600,
+            )
+            store.import_json_dir(AI_CACHE_DIR)
+            _cache_index = register_store(store)
+        return _cache_index
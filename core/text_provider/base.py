@@ -5,19 +5,46 @@
 - prepare(): 同步准备数据（读文件 / 读缓存等）
 - is_ready(): 是否已经就绪，可以提供文本
 - get_next_text(): 返回一条文本
+
+就绪状态变化时通知 add_ready_listener() 登记的回调（混合 provider 据此维护可用来源，抽样时不再逐个询问）。
 """
 
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Callable, List, Optional
 
 
 class BaseTextProvider(ABC):
     """文本提供者基类"""
 
     def __init__(self) -> None:
-        self._ready: bool = False
+        self._ready_flag: bool = False
+        self._ready_listeners: List[Callable[["BaseTextProvider", bool], None]] = []
+
+    @property
+    def _ready(self) -> bool:
+        return self._ready_flag
+
+    @_ready.setter
+    def _ready(self, value: bool) -> None:
+        """子类在就绪状态变化时赋值；变化时通知监听者（在赋值的线程中调用）"""
+        value = bool(value)
+        if value == self._ready_flag:
+            return
+        self._ready_flag = value
+        for callback in list(self._ready_listeners):
+            callback(self, value)
+
+    def add_ready_listener(self, callback: Callable[["BaseTextProvider", bool], None]) -> None:
+        """就绪状态变化回调 callback(provider, ready)"""
+        self._ready_listeners.append(callback)
+
+    def remove_ready_listener(self, callback: Callable[["BaseTextProvider", bool], None]) -> None:
+        try:
+            self._ready_listeners.remove(callback)
+        except ValueError:
+            pass
 
     @abstractmethod
     def prepare(self) -> None:
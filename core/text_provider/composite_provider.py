@@ -0,0 +1,139 @@
+"""
+混合文本提供者
+
+按配置比例混合多个已注册的 provider（例如 AI 70% / 本地 20% / 节日包 10%）：
+- 使用平滑加权轮询（smooth weighted round-robin），输出序列确定、交错均匀
+- 未就绪或被禁用的来源直接跳过，不累计权重，也不走 try/except 回退链：
+  可用来源列表在注册 / 比例 / 开关 / 就绪状态（provider 的就绪通知）变化时重建，抽样时只遍历它
+- 同名来源换成新的 provider（例如 AI 文本包刷新）时保留轮询状态，交错顺序不被打乱
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from .base import BaseTextProvider
+
+
+@dataclass
+class _Source:
+    name: str
+    provider: BaseTextProvider
+    weight: int
+    enabled: bool = True
+    current: int = 0
+
+
+class CompositeTextProvider(BaseTextProvider):
+    """按比例混合多个 provider"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        # 注册表与可用来源都整体替换（tuple），抽样时无需加锁
+        self._sources: Tuple[_Source, ...] = ()
+        self._active_sources: Tuple[_Source, ...] = ()
+
+    # ---------- 注册管理 ----------
+
+    def register(self, name: str, provider: BaseTextProvider, weight: int) -> None:
+        """
+        注册（或替换）一个来源
+
+        同名来源只换 provider / 权重不变时保留各来源的轮询状态；权重变化时重新开始轮询
+        """
+        weight = max(0, int(weight))
+        with self._lock:
+            old = {s.name: s for s in self._sources}.get(name)
+            if old is not None:
+                if old.provider is not provider:
+                    old.provider.remove_ready_listener(self._on_ready_changed)
+                    provider.add_ready_listener(self._on_ready_changed)
+                    old.provider = provider
+                if old.weight != weight:
+                    old.weight = weight
+                    self._reset_locked()
+            else:
+                provider.add_ready_listener(self._on_ready_changed)
+                self._sources = self._sources + (_Source(name=name, provider=provider, weight=weight),)
+                self._reset_locked()
+            self._rebuild_locked()
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            for s in self._sources:
+                if s.name == name:
+                    s.provider.remove_ready_listener(self._on_ready_changed)
+            self._sources = tuple(s for s in self._sources if s.name != name)
+            self._reset_locked()
+            self._rebuild_locked()
+
+    def set_ratios(self, ratios: Dict[str, int]) -> None:
+        """批量调整比例（未出现的来源保持原值）"""
+        with self._lock:
+            for s in self._sources:
+                if s.name in ratios:
+                    s.weight = max(0, int(ratios[s.name]))
+            self._reset_locked()
+            self._rebuild_locked()
+
+    def set_enabled(self, name: str, enabled: bool) -> None:
+        """启用 / 停用一个来源（状态不变时不影响轮询）"""
+        with self._lock:
+            changed = False
+            for s in self._sources:
+                if s.name == name and s.enabled != bool(enabled):
+                    s.enabled = bool(enabled)
+                    changed = True
+            if changed:
+                self._reset_locked()
+                self._rebuild_locked()
+
+    def ratios(self) -> Dict[str, int]:
+        return {s.name: s.weight for s in self._sources}
+
+    def has_source(self, name: str) -> bool:
+        return any(s.name == name for s in self._sources)
+
+    # ---------- Provider 接口 ----------
+
+    def prepare(self) -> None:
+        """各来源由各自的所有者准备，这里不做 IO"""
+        return None
+
+    def is_ready(self) -> bool:
+        return bool(self._active_sources)
+
+    def get_next_text(self) -> str:
+        """
+        平滑加权轮询：每轮给可用来源加上自身权重，选 current 最大者，
+        再从其 current 中扣除本轮总权重
+        """
+        best: _Source | None = None
+        total = 0
+        for s in self._active_sources:
+            s.current += s.weight
+            total += s.weight
+            if best is None or s.current > best.current:
+                best = s
+        if best is None:
+            return ""
+        best.current -= total
+        return best.provider.get_next_text()
+
+    # ---------- 内部实现 ----------
+
+    def _on_ready_changed(self, _provider: BaseTextProvider, _ready: bool) -> None:
+        """某个来源的就绪状态变化（在其写入线程中调用）：重建可用来源"""
+        with self._lock:
+            self._rebuild_locked()
+
+    def _rebuild_locked(self) -> None:
+        self._active_sources = tuple(s for s in self._sources if s.enabled and s.weight > 0 and s.provider.is_ready())
+        self._ready = bool(self._active_sources)
+
+    def _reset_locked(self) -> None:
+        for s in self._sources:
+            s.current = 0
@@ -0,0 +1,319 @@
+"""
+分片文本库（目录模式）
+
+把多个主题文本文件（节日、工作、休息…）放进一个目录，每个文件即一个分片：
+- 启动时只 stat 文件，结合 .manifest.json（大小 / mtime / 校验和 / 行数）得到各分片权重
+- 新增或变更的分片在后台线程池中计算校验和与行数，不阻塞启动
+- 分片在第一次被抽中时才在后台解析（解析期间抽样返回空串，由调用方用兜底文本），按行数加权抽样
+- 已加载分片按 LRU 在内存预算内淘汰
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import os
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from utils.text_loader import parse_text_line
+from config import DEBUG
+
+MANIFEST_NAME = ".manifest.json"
+SHARD_SUFFIXES = (".txt",)
+
+# 行数未知时按平均每行字节数估算权重
+_EST_BYTES_PER_LINE = 40
+# 每条 str 对象的额外开销估算（字节）
+_EST_STR_OVERHEAD = 80
+
+
+@dataclass
+class ShardInfo:
+    """分片元信息（manifest 中的一项）"""
+
+    name: str  # 相对于文本库目录的路径
+    size: int
+    mtime: float
+    checksum: str = ""  # 为空表示尚未扫描
+    lines: int = 0
+
+    @property
+    def scanned(self) -> bool:
+        return bool(self.checksum)
+
+    @property
+    def weight(self) -> int:
+        if self.scanned:
+            return self.lines
+        return max(1, self.size // _EST_BYTES_PER_LINE)
+
+
+def read_shard_lines(path: str) -> List[str]:
+    """解析分片文件为文本列表"""
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        return [t for t in (parse_text_line(line) for line in f) if t]
+
+
+def scan_shard(path: str) -> Tuple[str, int]:
+    """计算分片校验和与行数（不解码，只按字节统计）"""
+    h = hashlib.sha1()
+    lines = 0
+    last = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+            lines += chunk.count(b"\n")
+            last = chunk
+    if last and not last.endswith(b"\n"):
+        lines += 1
+    return h.hexdigest(), lines
+
+
+class ShardedCorpus:
+    """目录分片文本库"""
+
+    def __init__(
+        self,
+        root: str,
+        extra_files: Optional[List[str]] = None,
+        memory_budget_bytes: int = 16 * 1024 * 1024,
+        workers: int = 2,
+    ) -> None:
+        self.root = os.path.abspath(root)
+        self._extra_files = [os.path.abspath(p) for p in (extra_files or [])]
+        self._budget = max(0, int(memory_budget_bytes))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="corpus")
+        self._lock = threading.Lock()
+
+        self._manifest: Dict[str, ShardInfo] = {}
+        # (分片列表, 累积权重)：整体替换，抽样时无需加锁
+        self._table: Tuple[List[ShardInfo], List[int]] = ([], [])
+        self._loaded: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._loaded_bytes: Dict[str, int] = {}
+        # 分片名 -> 发起加载时的 manifest 条目（分片变更后条目被替换，旧的加载结果丢弃）
+        self._loading: Dict[str, ShardInfo] = {}
+
+    # ---------- 公共接口 ----------
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._table[0])
+
+    @property
+    def total_lines(self) -> int:
+        return sum(s.weight for s in self._table[0])
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(self._loaded_bytes.values())
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        扫描目录并更新 manifest（只做 stat，未知分片交给后台扫描）
+
+        返回: {"shards": n, "added": 新增/变更分片行数, "removed": 删除/变更分片行数}
+        """
+        cached = self._read_manifest_file()
+        current: Dict[str, ShardInfo] = {}
+        for path in self._list_shard_paths():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            name = os.path.relpath(path, self.root)
+            old = self._manifest.get(name) or cached.get(name)
+            if old and old.size == st.st_size and old.mtime == st.st_mtime:
+                current[name] = old
+            else:
+                current[name] = ShardInfo(name=name, size=st.st_size, mtime=st.st_mtime)
+
+        added = removed = 0
+        with self._lock:
+            for name, info in self._manifest.items():
+                if current.get(name) is not info:
+                    removed += info.weight
+                    self._unload_locked(name)
+            for name, info in current.items():
+                if self._manifest.get(name) is not info:
+                    added += info.weight
+            self._manifest = current
+            self._rebuild_table_locked()
+
+        for info in current.values():
+            if not info.scanned:
+                self._pool.submit(self._scan_worker, info)
+        # 只在与磁盘上的 manifest 不一致时才写（避免目录监听被自己的写入反复触发）
+        dirty = {n: asdict(i) for n, i in current.items()} != {n: asdict(i) for n, i in cached.items()}
+        if dirty and all(info.scanned for info in current.values()):
+            self._write_manifest_file()
+
+        return {"shards": len(current), "added": added, "removed": removed}
+
+    def sample(self) -> str:
+        """按行数加权抽一个分片，再从分片中随机取一条（一个分片都还没加载时返回空串）"""
+        shards, cum = self._table
+        if not shards:
+            return ""
+        idx = bisect.bisect_right(cum, random.random() * cum[-1])
+        shard = shards[min(idx, len(shards) - 1)]
+
+        lines = self._touch(shard.name)
+        if lines is None:
+            # 首次抽中：后台解析；期间先用已加载的分片顶上，都没有时由调用方兜底（不在调用线程解析）
+            self._schedule_load(shard)
+            lines = self._any_loaded()
+        return random.choice(lines) if lines else ""
+
+    def prefetch(self, count: int = 1) -> None:
+        """后台预加载权重最高的若干分片"""
+        shards, _ = self._table
+        for shard in sorted(shards, key=lambda s: s.weight, reverse=True)[: max(0, count)]:
+            self._schedule_load(shard)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- 内部实现 ----------
+
+    def _list_shard_paths(self) -> List[str]:
+        paths: List[str] = []
+        if os.path.isdir(self.root):
+            for dirpath, _dirs, files in os.walk(self.root):
+                for fn in sorted(files):
+                    if fn.lower().endswith(SHARD_SUFFIXES) and not fn.startswith("."):
+                        paths.append(os.path.join(dirpath, fn))
+        for p in self._extra_files:
+            if os.path.isfile(p) and p not in paths:
+                paths.append(p)
+        return paths
+
+    def _path_of(self, name: str) -> str:
+        return os.path.normpath(os.path.join(self.root, name))
+
+    def _rebuild_table_locked(self) -> None:
+        shards = [s for s in self._manifest.values() if s.weight > 0 and s.size > 0]
+        cum: List[int] = []
+        total = 0
+        for s in shards:
+            total += s.weight
+            cum.append(total)
+        self._table = (shards, cum)
+
+    def _scan_worker(self, info: ShardInfo) -> None:
+        try:
+            checksum, lines = scan_shard(self._path_of(info.name))
+        except OSError as e:
+            if DEBUG:
+                print(f"[Corpus] 扫描分片失败 {info.name}: {e}")
+            return
+        with self._lock:
+            if self._manifest.get(info.name) is not info:
+                return  # 期间又被刷新过
+            info.checksum = checksum
+            info.lines = lines
+            self._rebuild_table_locked()
+            done = all(s.scanned for s in self._manifest.values())
+        if done:
+            self._write_manifest_file()
+
+    def _touch(self, name: str) -> Optional[List[str]]:
+        with self._lock:
+            lines = self._loaded.get(name)
+            if lines is not None:
+                self._loaded.move_to_end(name)
+            return lines
+
+    def _any_loaded(self) -> Optional[List[str]]:
+        with self._lock:
+            for lines in reversed(self._loaded.values()):
+                if lines:
+                    return lines
+        return None
+
+    def _schedule_load(self, info: ShardInfo) -> None:
+        name = info.name
+        with self._lock:
+            if name in self._loaded or self._loading.get(name) is info:
+                return
+            if self._manifest.get(name) is not info:
+                return  # 抽样用的分片表已过期
+            self._loading[name] = info
+        try:
+            self._pool.submit(self._load, info)
+        except RuntimeError:
+            # 线程池已关闭
+            with self._lock:
+                if self._loading.get(name) is info:
+                    del self._loading[name]
+
+    def _load(self, info: ShardInfo) -> None:
+        name = info.name
+        try:
+            lines = read_shard_lines(self._path_of(name))
+        except OSError as e:
+            if DEBUG:
+                print(f"[Corpus] 加载分片失败 {name}: {e}")
+            lines = []
+        est = sum(len(t) for t in lines) * 2 + len(lines) * _EST_STR_OVERHEAD
+        with self._lock:
+            if self._loading.get(name) is info:
+                del self._loading[name]
+            if self._manifest.get(name) is not info:
+                # 读取期间分片被刷新（变更/删除）：丢弃旧内容，下次抽中时按新条目重读
+                if DEBUG:
+                    print(f"[Corpus] 分片 {name} 已变更，丢弃加载结果")
+                return
+            self._loaded[name] = lines
+            self._loaded.move_to_end(name)
+            self._loaded_bytes[name] = est
+            self._evict_locked(keep=name)
+        if DEBUG:
+            print(f"[Corpus] 已加载分片 {name}: {len(lines)} 条")
+
+    def _unload_locked(self, name: str) -> None:
+        self._loaded.pop(name, None)
+        self._loaded_bytes.pop(name, None)
+        self._loading.pop(name, None)
+
+    def _evict_locked(self, keep: str) -> None:
+        """超出内存预算时按 LRU 淘汰（至少保留刚加载的分片）"""
+        while sum(self._loaded_bytes.values()) > self._budget and len(self._loaded) > 1:
+            oldest = next(iter(self._loaded))
+            if oldest == keep:
+                break
+            self._unload_locked(oldest)
+            if DEBUG:
+                print(f"[Corpus] 内存预算不足，卸载分片 {oldest}")
+
+    def _read_manifest_file(self) -> Dict[str, ShardInfo]:
+        path = os.path.join(self.root, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {
+                name: ShardInfo(name=name, **{k: v for k, v in item.items() if k != "name"})
+                for name, item in (data.get("shards") or {}).items()
+            }
+        except Exception:
+            return {}
+
+    def _write_manifest_file(self) -> None:
+        if not os.path.isdir(self.root):
+            return
+        with self._lock:
+            payload = {"shards": {name: asdict(info) for name, info in self._manifest.items()}}
+        path = os.path.join(self.root, MANIFEST_NAME)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, path)
+        except OSError as e:
+            if DEBUG:
+                print(f"[Corpus] 写入 manifest 失败: {e}")
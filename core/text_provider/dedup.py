@@ -0,0 +1,330 @@
+"""
+AI 文本近重复检测（MinHash + LSH）
+
+prompt 里写了“不要重复句子”，但跨天的文本包仍会出现大量改写（“记得喝水”“休息一下”…）。
+这里在写入缓存前做一次过滤：
+- 对每条文本取字符 n-gram，计算 MinHash 签名
+- 签名按 band 切分放入 LSH 桶，候选项再用签名估算 Jaccard 相似度确认；
+  band 数按阈值选取，使相似度恰好等于阈值的一对成为候选的概率不低于 LSH_MIN_RECALL
+- 签名按日期存放在数据库的 dedup_signatures 表中（保留最近若干天），同一天重新生成时先替换当天的旧条目
+- 检查/剔除条数累计到 cache_stats（“命中”即判定为近重复），剔除率见 tools/cache_maint.py
+
+签名使用 crc32 + 固定参数的线性哈希，不依赖 Python 的随机化 hash()，跨进程稳定。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import DEBUG
+from utils.cache_store import CacheStore
+from utils.db import Database
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# 相似度 = 阈值的一对文本进入同一 LSH 桶（被比较）的最低概率
+LSH_MIN_RECALL = 0.9
+_MAX_HASH = (1 << 32) - 1
+
+
+def _normalize(text: str) -> str:
+    """去掉标点、空白与符号，只保留文字本身"""
+    return "".join(
+        ch for ch in unicodedata.normalize("NFKC", text).lower()
+        if unicodedata.category(ch)[0] in ("L", "N")
+    )
+
+
+def choose_bands(num_perm: int, threshold: float, recall: float = LSH_MIN_RECALL) -> int:
+    """
+    选 band 数：每个 band 的行数 r 尽量大（候选少、比较快），
+    但要满足 1 - (1 - threshold^r)^b ≥ recall（b = num_perm / r，r 须整除 num_perm）
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= recall:
+            return bands
+    return num_perm
+
+
+def shingles(text: str, n: int) -> set:
+    """字符 n-gram 集合（文本过短时整体作为一个 shingle）"""
+    s = _normalize(text)
+    if len(s) <= n:
+        return {s} if s else set()
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+class MinHashIndex(CacheStore):
+    """跨天持久化的 MinHash LSH 索引（内存中保留 LSH 桶，签名落盘到 dedup_signatures 表）"""
+
+    table = "dedup_signatures"
+    ts_column = "created"
+
+    def __init__(
+        self,
+        name: str = "ai_dedup",
+        num_perm: int = 32,
+        bands: Optional[int] = None,
+        ngram: int = 2,
+        threshold: float = 0.5,
+        retention_days: int = 14,
+        db: Optional[Database] = None,
+    ) -> None:
+        if bands is None:
+            # 默认参数（32 个哈希、阈值 0.5）得到 16 个 band × 2 行：阈值处成为候选的概率约 0.99
+            bands = choose_bands(num_perm, threshold)
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        super().__init__(name, db=db)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.threshold = threshold
+        self.retention_days = retention_days
+        # 签名参数不同的旧记录不可比，加载时忽略、整理时删除
+        self.params = f"{num_perm}/{ngram}"
+
+        rng = random.Random(20240101)
+        self._perms: List[Tuple[int, int]] = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+        # 内存索引的锁（self._lock 归 CacheStore 的统计使用）
+        self._index_lock = threading.Lock()
+        self._loaded = False
+        # date -> [签名]
+        self._by_date: Dict[str, List[Tuple[int, ...]]] = {}
+        # (band, band 值) -> [签名]
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[int, ...]]] = {}
+
+        self.last_ms = 0.0
+
+    # ---------- 公共接口 ----------
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        grams = shingles(text, self.ngram)
+        if not grams:
+            return None
+        hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def filter_pack(self, texts: List[str], date: str, min_keep: int = 0) -> Tuple[List[str], List[str]]:
+        """
+        过滤一个文本包：与历史（其它日期）及包内已保留条目近重复的条目被剔除
+
+        - 若剔除后不足 min_keep 条，按原顺序补回被剔除的条目
+        - 保留的条目写入索引（替换该日期原有条目）并落盘
+
+        返回: (保留, 剔除)
+        """
+        t0 = time.perf_counter()
+        with self._index_lock:
+            self._ensure_loaded()
+            self._drop_date_locked(date)
+
+            kept: List[Tuple[str, Tuple[int, ...]]] = []
+            rejected: List[Tuple[str, Optional[Tuple[int, ...]]]] = []
+            for text in texts:
+                sig = self.signature(text)
+                if sig is None:
+                    rejected.append((text, None))
+                    continue
+                if self._is_near_duplicate_locked(sig):
+                    rejected.append((text, sig))
+                    continue
+                kept.append((text, sig))
+                self._add_locked(date, sig)
+
+            # 兜底：保证最少条数
+            while len(kept) < min_keep and rejected:
+                text, sig = rejected.pop(0)
+                if sig is None:
+                    continue
+                kept.append((text, sig))
+                self._add_locked(date, sig)
+
+            self._save_date_locked(date)
+            self._prune_locked(date)
+
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.last_ms = ms
+        with self._lock:
+            self._pending["hits"] += len(rejected)
+            self._pending["misses"] += len(texts) - len(rejected)
+        if DEBUG:
+            rate = (len(rejected) / len(texts) * 100.0) if texts else 0.0
+            print(f"[Dedup] 近重复过滤: {len(texts)} 条 → 保留 {len(kept)}，剔除 {len(rejected)} ({rate:.0f}%)，{ms:.1f}ms")
+        return [t for t, _ in kept], [t for t, _ in rejected]
+
+    def is_near_duplicate(self, text: str, exclude_date: str = "") -> bool:
+        """只读检查：text 是否与索引中（exclude_date 以外）的条目近重复"""
+        sig = self.signature(text)
+        if sig is None:
+            return False
+        with self._index_lock:
+            self._ensure_loaded()
+            skip = {id(s) for s in self._by_date.get(exclude_date, ())}
+            return self._is_near_duplicate_locked(sig, skip)
+
+    @property
+    def rejection_rate(self) -> float:
+        """累计剔除率（含已落盘的统计）"""
+        return self.stats()["rejection_rate"]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["rejection_rate"] = stats["hit_rate"]
+        stats["last_ms"] = self.last_ms
+        return stats
+
+    def evict(self) -> int:
+        """删除参数不符的旧签名，并只保留最近 retention_days 个日期"""
+        removed = max(0, self.db.execute(
+            "DELETE FROM dedup_signatures WHERE params != ?", (self.params,)
+        ).rowcount)
+        with self._index_lock:
+            self._ensure_loaded()
+            removed += self._prune_locked(max(self._by_date, default=""))
+        if removed:
+            with self._lock:
+                self._pending["evictions"] += removed
+        return removed
+
+    def import_json(self, path: str) -> int:
+        """
+        导入旧版 _dedup_index.json（按日期；数据库中已有的日期以数据库为准），成功后删除文件
+
+        返回导入的签名条数；读取或写入失败时保留文件，下次启动再试
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            if DEBUG:
+                print(f"[Dedup] 读取旧索引失败: {e}")
+            return 0
+
+        imported = 0
+        try:
+            # 参数变化的旧签名不可比，直接丢弃
+            if data.get("num_perm") == self.num_perm and data.get("ngram") == self.ngram:
+                with self.db.transaction() as c:
+                    for date, sigs in (data.get("dates") or {}).items():
+                        if c.execute("SELECT 1 FROM dedup_signatures WHERE date = ? LIMIT 1", (date,)).fetchone():
+                            continue
+                        rows = [self._row(date, tuple(s)) for s in sigs if len(s) == self.num_perm]
+                        c.executemany(
+                            "INSERT INTO dedup_signatures (date, params, sig, created) VALUES (?, ?, ?, ?)", rows
+                        )
+                        imported += len(rows)
+            os.remove(path)
+        except Exception as e:
+            if DEBUG:
+                print(f"[Dedup] 导入旧索引失败: {e}")
+            return 0
+        with self._index_lock:
+            self._loaded = False
+        if DEBUG and imported:
+            print(f"[Dedup] 已导入 {imported} 条旧签名到数据库")
+        return imported
+
+    # ---------- 内部实现 ----------
+
+    def _band_keys(self, sig: Tuple[int, ...]):
+        r = self.rows
+        for b in range(self.bands):
+            yield (b, sig[b * r:(b + 1) * r])
+
+    def _is_near_duplicate_locked(self, sig: Tuple[int, ...], skip: Optional[set] = None) -> bool:
+        seen = set(skip) if skip else set()
+        for key in self._band_keys(sig):
+            for other in self._buckets.get(key, ()):
+                if id(other) in seen:
+                    continue
+                seen.add(id(other))
+                same = sum(1 for x, y in zip(sig, other) if x == y)
+                if same / self.num_perm >= self.threshold:
+                    return True
+        return False
+
+    def _add_locked(self, date: str, sig: Tuple[int, ...]) -> None:
+        self._by_date.setdefault(date, []).append(sig)
+        for key in self._band_keys(sig):
+            self._buckets.setdefault(key, []).append(sig)
+
+    def _drop_date_locked(self, date: str) -> None:
+        sigs = self._by_date.pop(date, None)
+        if sigs:
+            self._rebuild_buckets_locked()
+
+    def _prune_locked(self, today: str) -> int:
+        """只保留最近 retention_days 个日期（内存与数据库），返回删除的签名条数"""
+        dates = sorted(self._by_date)
+        if len(dates) <= self.retention_days:
+            return 0
+        stale = [d for d in dates[: len(dates) - self.retention_days] if d != today]
+        if not stale:
+            return 0
+        removed = 0
+        with self.db.transaction() as c:
+            for d in stale:
+                removed += len(self._by_date.pop(d, ()))
+                c.execute("DELETE FROM dedup_signatures WHERE date = ?", (d,))
+        self._rebuild_buckets_locked()
+        return removed
+
+    def _rebuild_buckets_locked(self) -> None:
+        self._buckets = {}
+        for sigs in self._by_date.values():
+            for sig in sigs:
+                for key in self._band_keys(sig):
+                    self._buckets.setdefault(key, []).append(sig)
+
+    def _row(self, date: str, sig: Tuple[int, ...]) -> Tuple[str, str, bytes, float]:
+        return (date, self.params, array("I", sig).tobytes(), time.time())
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._by_date = {}
+        try:
+            rows = self.db.query_all(
+                "SELECT date, sig FROM dedup_signatures WHERE params = ? ORDER BY id", (self.params,)
+            )
+        except Exception as e:
+            if DEBUG:
+                print(f"[Dedup] 读取索引失败: {e}")
+            rows = []
+        for r in rows:
+            sig = array("I")
+            sig.frombytes(r["sig"])
+            if len(sig) == self.num_perm:
+                self._by_date.setdefault(r["date"], []).append(tuple(sig))
+        self._rebuild_buckets_locked()
+
+    def _save_date_locked(self, date: str) -> None:
+        """用内存中的签名替换数据库里该日期的记录"""
+        rows = [self._row(date, sig) for sig in self._by_date.get(date, ())]
+        try:
+            with self.db.transaction() as c:
+                c.execute("DELETE FROM dedup_signatures WHERE date = ?", (date,))
+                c.executemany("INSERT INTO dedup_signatures (date, params, sig, created) VALUES (?, ?, ?, ?)", rows)
+        except Exception as e:
+            if DEBUG:
+                print(f"[Dedup] 写入索引失败: {e}")
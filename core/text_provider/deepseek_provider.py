@@ -2,6 +2,7 @@
 DeepSeek AI 文本提供者
 
 通过 OpenAI-compatible Chat Completions 接口生成每日文本，并缓存到本地。
+缓存按「日期 + 上下文哈希」区分变体（见 ai_cache.py），上下文变化后可直接复用已有变体。
 """
 
 from __future__ import annotations
@@ -9,77 +10,170 @@ from __future__ import annotations
 import datetime
 import json
 import os
+import queue
 import time
 import threading
-from typing import List, Dict, Any, Optional
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable
 
 import requests
 
 from .base import BaseTextProvider
+from .text_pool import get_text_pool
+from .dedup import MinHashIndex
+from .json_stream import IncrementalItemExtractor
+from .ai_cache import context_key, get_cache_index
+from .endpoints import Endpoint, HedgeCancelled, HedgeRace, configured_endpoints, get_endpoint_latency
+from .item_filter import get_item_filter
+from .snapshot import EMPTY_SNAPSHOT, TextSnapshot
 from core.context.location import get_city
 from core.context.weather import get_weather_summary
 from core import settings as app_settings
+from utils.http_client import get_http_client
+from utils.cache_store import register_store
+from utils.db import get_database
+from utils.resilience import RetryPolicy
+from utils.task_executor import CancelToken, TaskCancelled
+from utils.runtime_params import param
 from config import (
     AI_API_BASE,
-    AI_API_KEY,
-    AI_MODEL,
     AI_TEMPERATURE,
-    AI_ITEMS_PER_DAY,
     AI_CACHE_DIR,
     AI_TIMEOUT_SECONDS,
+    AI_RETRY_ATTEMPTS,
     DEBUG,
     AI_PROMPT_TEMPLATE,
+    AI_DEDUP_ENABLED,
+    AI_DEDUP_THRESHOLD,
+    AI_DEDUP_RETENTION_DAYS,
+    AI_DEDUP_MIN_KEEP,
+    AI_STREAM_ENABLED,
+    AI_SHARD_THEMES,
+    AI_MAX_TOKENS_PER_ITEM,
+    AI_REPLACE_REJECTED_MAX,
 )
 
+_dedup_index: MinHashIndex | None = None
+_dedup_lock = threading.Lock()
+
+# 返回过 400 拒绝 response_format 的端点（本进程内不再请求 JSON 模式）
+_json_mode_unsupported: set = set()
+
+# timeout 分离：connect 5s，read AI_TIMEOUT_SECONDS（流式下为两个分块之间的最大间隔）
+for _ep in configured_endpoints():
+    get_http_client().set_host_timeout(_ep.base, (5, AI_TIMEOUT_SECONDS))
+    get_http_client().set_host_policy(_ep.base, RetryPolicy(attempts=AI_RETRY_ATTEMPTS))
+
 
 def _today_str() -> str:
     return datetime.date.today().isoformat()
 
 
+def get_dedup_index() -> MinHashIndex:
+    """跨天近重复索引（进程内单例，登记到缓存维护注册表；首次使用时导入旧版索引文件）"""
+    global _dedup_index
+    with _dedup_lock:
+        if _dedup_index is None:
+            index = MinHashIndex(
+                "ai_dedup",
+                threshold=AI_DEDUP_THRESHOLD,
+                retention_days=AI_DEDUP_RETENTION_DAYS,
+            )
+            index.import_json(os.path.join(AI_CACHE_DIR, "_dedup_index.json"))
+            _dedup_index = register_store(index)
+        return _dedup_index
+
+
+def has_api_key() -> bool:
+    """是否有端点配置了可用的 API Key（环境变量 / 设置 / config 任一）"""
+    return bool(_usable_endpoints())
+
+
+def _usable_endpoints() -> List[Endpoint]:
+    """有 API Key 的端点，按延迟 EWMA 从快到慢"""
+    default = _get_api_key()
+    endpoints = [ep for ep in configured_endpoints() if ep.api_key(default)]
+    return get_endpoint_latency().ordered(endpoints)
+
+
 def _get_api_key() -> str:
     """
     API Key 读取优先级：
     1) 环境变量 DEEPSEEK_API_KEY（方便部署/高级用户）
     2) QSettings（SettingsDialog 保存）
     3) config.AI_API_KEY（兜底，通常为空）
+
+    已在设置快照中解析好，每次请求只是一次属性访问。
     """
-    env = os.getenv("DEEPSEEK_API_KEY", "").strip()
-    if env:
-        return env
-    try:
-        v = (app_settings.get_deepseek_api_key() or "").strip()
-        if v:
-            return v
-    except Exception:
-        pass
-    return (AI_API_KEY or "").strip()
+    return app_settings.snapshot().api_key
 
 
 class DeepSeekTextProvider(BaseTextProvider):
     """使用 DeepSeek 生成每日文本的 Provider"""
 
-    def __init__(self) -> None:
+    def __init__(self, target_date: Optional[datetime.date] = None) -> None:
+        """
+        :param target_date: 文本包对应的日期；默认今天（预生成明日文本包时传入明天）
+        """
         super().__init__()
-        self._items: List[Dict[str, Any]] = []
-        self._session = requests.Session()
-        self._last_cache_path: str | None = None
+        self._target_date = target_date
+        self._pool = get_text_pool()
+        # 当前文本包（不可变快照，整体替换发布；抽样时无需加锁）
+        self._snap: TextSnapshot = EMPTY_SNAPSHOT
+        # 共享 HTTP 客户端：多个 provider 实例、多个分片复用同一组 keep-alive 连接
+        self._http = get_http_client()
+        self._cache_key: str = ""  # 当前文本包对应的上下文哈希
         self._lock = threading.Lock()
         self._preparing: bool = False
         self._last_failure_ts: float | None = None
         self._context: Dict[str, Any] = {}
+        # 流式生成：收到前几条后即可提供文本，此回调在生成线程中调用
+        self.on_ready: Optional[Callable[["DeepSeekTextProvider"], None]] = None
+        self._stream_lock = threading.Lock()
+        # 句柄 -> 展示次数（补充生成时用于挑选替换对象）
+        self._shown: Dict[int, int] = {}
+        # 最近一次分片并发生成的统计（每个分片的条数/耗时/错误）
+        self.last_shard_stats: List[Dict[str, Any]] = []
+        # 最近一次准备的分阶段耗时（ms）：city_weather / settings / warm / context / request / total
+        self.last_stage_timings: Dict[str, float] = {}
+        # 当前 prepare / top_up 的取消标记（由任务执行器传入），在请求与流式读取中检查
+        self._cancel: Optional[CancelToken] = None
+        self._pool.add_holder(self)
 
     @property
     def preparing(self) -> bool:
         return self._preparing
 
+    @property
+    def snapshot(self) -> TextSnapshot:
+        """当前文本包快照"""
+        return self._snap
+
+    @property
+    def _items(self) -> array:
+        return self._snap.items
+
+    def is_ready(self) -> bool:
+        return self._snap.ready
+
     @property
     def last_failure_ts(self) -> float | None:
         return self._last_failure_ts
 
+    @property
+    def cache_key(self) -> str:
+        """当前文本包的上下文哈希（未准备时为空）"""
+        return self._cache_key
+
     # ---------- 公共接口 ----------
 
-    def prepare(self) -> None:
-        """加载今日缓存或从 DeepSeek 生成"""
+    def prepare(self, cancel: Optional[CancelToken] = None) -> None:
+        """
+        加载与当前上下文匹配的今日缓存变体，没有则从 DeepSeek 生成
+
+        :param cancel: 取消标记；取消后在下一个检查点放弃（已收到的流式条目继续提供，不写缓存）
+        """
         # single-flight：避免并发 prepare（只在锁内做状态切换，不要把网络/IO 放锁里）
         with self._lock:
             if self._preparing:
@@ -87,128 +181,344 @@ class DeepSeekTextProvider(BaseTextProvider):
                     print("[AI] prepare 已在进行中，跳过重复调用")
                 return
             self._preparing = True
-
-        cache_path = ""
+            self._cancel = cancel
 
         try:
-            self._ensure_cache_dir()
-            cache_path = self._get_today_cache_path()
-            self._last_cache_path = cache_path
+            t0 = time.perf_counter()
+            index = get_cache_index()
+            # 今天还没有任何变体时必然要请求 AI，收集上下文的同时预热连接
+            ctx = self._build_context(warm=not index.has_date(self._today_str()) and has_api_key())
+            self._context = ctx
+            self._cache_key = context_key(ctx)
+            cached = index.load(self._today_str(), self._cache_key)
 
-            if os.path.exists(cache_path):
+            if cached is not None:
                 if DEBUG:
-                    print(f"[AI] 发现今日缓存: {cache_path}")
-                if self._load_cache(cache_path):
-                    self._ready = True
+                    print(f"[AI] 发现今日缓存: {self._today_str()}.{self._cache_key}")
+                items = self._load_payload(cached)
+                if items:
+                    self._publish(items, ready=True)
                     return
                 else:
                     if DEBUG:
                         print("[AI] 缓存无效，准备重新生成")
 
             # 没有有效缓存，尝试调用 DeepSeek
-            if not _get_api_key():
+            if not has_api_key():
                 if DEBUG:
                     print("[AI] 未配置 AI_API_KEY（请设置环境变量 DEEPSEEK_API_KEY），跳过 AI 生成")
-                self._ready = False
+                self._publish(self._items, ready=False)
                 return
 
-            data = self._generate_from_ai()
+            self._check_cancelled()
+            t_req = time.perf_counter()
+            try:
+                data = self._generate_from_ai(ctx)
+            finally:
+                self._record_stage("request", t_req)
+                self._record_stage("total", t0)
+                self._log_stage_timings()
             if not data:
-                self._ready = False
+                self._publish(self._items, ready=False)
                 return
 
-            items = data.get("items") or []
-            # 只保留 text 字段
-            self._items = [{"text": str(it.get("text", "")).strip()} for it in items if it.get("text")]
+            # 只保留通过校验的 text（不合格的用一次小请求补回）；写缓存前剔除与近几天文本近重复的条目
+            texts = self._valid_texts(data.get("items") or [], ctx)
+            texts = self._dedup_texts(texts, data.get("date") or self._today_str())
+            items = self._pool.intern_many(texts)
 
-            if not self._items:
+            if not items:
                 if DEBUG:
                     print("[AI] 生成结果为空")
-                self._ready = False
+                self._publish(items, ready=False)
                 return
 
-            # 写入缓存
-            payload = {
-                "date": data.get("date") or self._today_str(),
-                "context": self._context or {},
-                "items": self._items,
-            }
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
-
+            # 完整文本包一次发布（替换流式过程中的部分快照），再写入缓存
+            self._shown = {}
+            self._publish(items, ready=True)
+            self._write_cache(data.get("date") or self._today_str())
+        except TaskCancelled:
+            # 流式中途取消 / 失败时，已收到的条目继续提供（快照保持不变，不写缓存）
             if DEBUG:
-                print(f"[AI] 已写入缓存: {cache_path}")
-
-            self._ready = True
+                print("[AI] 生成已取消")
         except Exception as e:
             if DEBUG:
                 print(f"[AI] 生成失败: {e}")
-            self._ready = False
             self._last_failure_ts = time.time()
         finally:
             with self._lock:
                 self._preparing = False
+                self._cancel = None
 
     def get_next_text(self) -> str:
         """从 AI 文本池中取一条"""
-        if not self._items:
+        h = self._snap.sample()
+        if h < 0:
             return ""
-        import random
 
-        return random.choice(self._items).get("text", "")
+        # 展示次数：补充生成时优先替换展示最多的条目
+        self._shown[h] = self._shown.get(h, 0) + 1
+        return self._pool.get(h)
+
+    def top_up(self, n: int, cancel: Optional[CancelToken] = None) -> bool:
+        """
+        补充生成：当前文本包继续提供，只请求 n 条新文本替换其中一部分
+
+        - 上下文过期（称呼/城市已变化）的条目优先替换，其次是展示次数最多的条目
+        - 过期条目多于 n 时，请求条数相应增加（不超过 AI_ITEMS_PER_DAY）
+        - 新上下文、缓存 key 与合并后的文本包在最后一起发布并写回今日缓存；
+          中途失败/取消时当前文本包与上下文保持不变
+        - 补充请求不走流式追加（新条目只在合并后随整个文本包发布）
+        - 当前没有可用文本包时退化为完整 prepare()
+
+        返回: 是否成功
+        """
+        if not self._items:
+            self.prepare(cancel)
+            return self.is_ready()
+
+        with self._lock:
+            if self._preparing:
+                if DEBUG:
+                    print("[AI] prepare 已在进行中，跳过补充生成")
+                return False
+            self._preparing = True
+            self._cancel = cancel
 
-    def invalidate_today_cache(self) -> None:
-        """删除今日缓存并清空当前内容（下次 prepare 会重新生成）"""
         try:
-            path = self._last_cache_path or self._get_today_cache_path()
-            if os.path.exists(path):
-                os.remove(path)
+            if not has_api_key():
+                if DEBUG:
+                    print("[AI] 未配置 AI_API_KEY，跳过补充生成")
+                return False
+
+            old_ctx = dict(self._context or {})
+            ctx = self._build_context(warm=True)
+            current = list(self._items)
+            victims = self._pick_victims(current, n, old_ctx, ctx)
+            if not victims:
+                return True
+
+            self._check_cancelled()
+            t0 = time.perf_counter()
+            data = self._request_items(self._render_prompt(ctx, len(victims)), len(victims), stream=False)
+            new_texts, _rejected = get_item_filter().filter(self._extract_texts((data or {}).get("items") or []))
+            if not new_texts:
                 if DEBUG:
-                    print(f"[AI] 已删除今日缓存: {path}")
+                    print("[AI] 补充生成结果为空，保留当前文本包")
+                return False
+
+            # 只替换与新文本数量相当的条目，避免新文本不足时文本包缩水
+            victims = victims[: len(new_texts)]
+            drop = set(victims)
+            kept = [self._pool.get(h, hot_cache=False) for h in current if h not in drop]
+            date = self._today_str()
+            texts = self._dedup_texts(kept + new_texts, date)
+
+            items = self._pool.intern_many(texts)
+            self._check_cancelled()
+            # 补充后的文本包对应新上下文：上下文、key 与快照一起发布，再写入新的缓存变体
+            self._publish(items, ready=bool(items), context=ctx)
+            for h in drop:
+                self._shown.pop(h, None)
+
+            self._write_cache(date)
+            if DEBUG:
+                print(
+                    f"[AI] 补充生成完成: 替换 {len(drop)} 条，新增 {len(new_texts)} 条，"
+                    f"当前 {len(self._items)} 条，{(time.perf_counter() - t0) * 1000.0:.0f}ms"
+                )
+            return True
+        except TaskCancelled:
+            if DEBUG:
+                print("[AI] 补充生成已取消")
+            return False
+        except Exception as e:
+            if DEBUG:
+                print(f"[AI] 补充生成失败: {e}")
+            self._last_failure_ts = time.time()
+            return False
+        finally:
+            with self._lock:
+                self._preparing = False
+                self._cancel = None
+
+    def invalidate_today_cache(self) -> None:
+        """删除当前上下文的今日缓存变体并清空当前内容（下次 prepare 会重新生成）"""
+        try:
+            key = self._cache_key or context_key(self._build_context())
+            if get_cache_index().remove(self._today_str(), key) and DEBUG:
+                print(f"[AI] 已删除今日缓存: {self._today_str()}.{key}")
         except Exception as e:
             if DEBUG:
                 print(f"[AI] 删除今日缓存失败: {e}")
         finally:
-            self._items = []
-            self._ready = False
+            self._publish(array("I"), ready=False)
+
+    # ---------- 文本池压缩 ----------
+
+    def pool_handles(self) -> List[int]:
+        """仍在使用的文本池句柄（当前文本包 + 展示计数）"""
+        return list(self._snap.items) + list(self._shown)
+
+    def pool_remap(self, remap) -> None:
+        """文本池压缩后换成新句柄（与快照写入方串行）"""
+        with self._stream_lock:
+            snap = self._snap
+            self._snap = snap.with_items(array("I", (remap(h) for h in snap.items)))
+            shown: Dict[int, int] = {}
+            for h, c in list(self._shown.items()):
+                shown[remap(h)] = shown.get(remap(h), 0) + c
+            self._shown = shown
 
     # ---------- 内部实现 ----------
 
-    def _ensure_cache_dir(self) -> None:
-        os.makedirs(AI_CACHE_DIR, exist_ok=True)
+    def _pick_victims(self, items: List[int], n: int, old_ctx: Dict[str, Any], ctx: Dict[str, Any]) -> List[int]:
+        """选出要替换的条目：上下文过期的在前，其余按展示次数从多到少"""
+        stale_values = [
+            str(old_ctx.get(k) or "")
+            for k in ("salutation", "city")
+            if old_ctx.get(k) and old_ctx.get(k) != ctx.get(k)
+        ]
+        stale: List[int] = []
+        if stale_values:
+            stale = [h for h in items if any(v in self._pool.get(h, hot_cache=False) for v in stale_values)]
+        stale_set = set(stale)
+        rest = sorted((h for h in items if h not in stale_set), key=lambda h: self._shown.get(h, 0), reverse=True)
+        count = min(max(int(n), len(stale)), param("AI_ITEMS_PER_DAY"), len(items))
+        return (stale + rest)[:count]
+
+    def _write_cache(self, date: str) -> None:
+        """写入当前上下文的缓存变体（单条 SQLite 写入，读取方不会看到写了一半的文本包）"""
+        if not self._cache_key:
+            self._cache_key = context_key(self._context or {})
+        payload = {
+            "date": date,
+            "context": self._context or {},
+            "items": [{"text": self._pool.get(h, hot_cache=False)} for h in self._items],
+        }
+        get_cache_index().save(self._today_str(), self._cache_key, payload, self._context or {})
+        if DEBUG:
+            print(f"[AI] 已写入缓存: {self._today_str()}.{self._cache_key}")
+
+    def _publish(self, items: array, ready: bool, context: Optional[Dict[str, Any]] = None) -> None:
+        """
+        构造新快照并一次性替换（items 发布后不再修改）；写入方串行，读取方不加锁
+
+        :param context: 非空时同时替换上下文与缓存 key（与快照在同一把锁内切换）
+        """
+        with self._stream_lock:
+            if context is not None:
+                self._context = context
+                self._cache_key = context_key(context)
+            self._snap = TextSnapshot(items=items, ready=ready and bool(items), key=self._cache_key)
+            self._ready = self._snap.ready
+
+    def _check_cancelled(self) -> None:
+        cancel = self._cancel
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
+    def _record_stage(self, stage: str, start: float) -> None:
+        self.last_stage_timings[stage] = (time.perf_counter() - start) * 1000.0
+
+    def _log_stage_timings(self) -> None:
+        if not DEBUG:
+            return
+        t = self.last_stage_timings
+        warm = t.get("warm")
+        print(
+            f"[AI] 耗时分解: 上下文 {t.get('context', 0):.0f}ms"
+            f"（城市/天气 {t.get('city_weather', 0):.0f}ms，设置 {t.get('settings', 0):.0f}ms，"
+            f"预热 {f'{warm:.0f}ms' if warm is not None else '-'}），"
+            f"生成 {t.get('request', 0):.0f}ms，总计 {t.get('total', 0):.0f}ms"
+        )
+
+    @property
+    def date_str(self) -> str:
+        """文本包对应的日期（YYYY-MM-DD）"""
+        return self._today_str()
 
     def _today_str(self) -> str:
+        if self._target_date is not None:
+            return self._target_date.isoformat()
         return _today_str()
 
-    def _get_today_cache_path(self) -> str:
-        return os.path.join(AI_CACHE_DIR, f"{self._today_str()}.json")
-
-    def _load_cache(self, path: str) -> bool:
+    def _load_payload(self, data: Dict[str, Any]) -> Optional[array]:
+        """解析缓存中的文本包，返回句柄数组（无效返回 None，由调用方发布）"""
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
             # 读取上下文（可选）
             ctx = data.get("context") or {}
             if isinstance(ctx, dict):
                 self._context = ctx
-            items = data.get("items") or []
-            self._items = [{"text": str(it.get("text", "")).strip()} for it in items if it.get("text")]
-            if not self._items:
-                return False
-            return True
+            return self._intern_items(data.get("items") or []) or None
         except Exception as e:
             if DEBUG:
                 print(f"[AI] 读取缓存失败: {e}")
-            return False
+            return None
+
+    @staticmethod
+    def _extract_texts(items: List[Any]) -> List[str]:
+        """从 [{"text": ...}] 中取出非空文本"""
+        texts = (str(it.get("text", "")).strip() for it in items if isinstance(it, dict) and it.get("text"))
+        return [t for t in texts if t]
+
+    def _intern_items(self, items: List[Any]) -> array:
+        """把 [{"text": ...}] 存入共享文本池，返回句柄数组"""
+        return self._pool.intern_many(self._extract_texts(items))
+
+    def _valid_texts(self, items: List[Any], ctx: Dict[str, Any]) -> List[str]:
+        """
+        按模板约束校验条目；有条目被丢弃时发一次小请求补回（最多 AI_REPLACE_REJECTED_MAX 条，补回的同样校验）
+        """
+        item_filter = get_item_filter()
+        kept, rejected = item_filter.filter(self._extract_texts(items))
+        n = min(sum(rejected.values()), AI_REPLACE_REJECTED_MAX)
+        if n <= 0 or not has_api_key():
+            return kept
+        try:
+            data = self._request_items(self._render_prompt(ctx, n), n, stream=False)
+            extra, _rejected = item_filter.filter(self._extract_texts((data or {}).get("items") or []))
+        except Exception as e:
+            if DEBUG:
+                print(f"[AI] 补回被丢弃的条目失败: {e}")
+            return kept
+        seen = set(kept)
+        added = [t for t in extra if t not in seen][:n]
+        if DEBUG:
+            print(f"[AI] 补回被丢弃的条目: 请求 {n} 条，补回 {len(added)} 条")
+        return kept + added
+
+    def _dedup_texts(self, texts: List[str], date: str) -> List[str]:
+        """近重复过滤（失败时原样返回，不影响生成）"""
+        if not AI_DEDUP_ENABLED or not texts:
+            return texts
+        try:
+            kept, _rejected = get_dedup_index().filter_pack(texts, date, min_keep=AI_DEDUP_MIN_KEEP)
+            return kept
+        except Exception as e:
+            if DEBUG:
+                print(f"[Dedup] 近重复过滤失败: {e}")
+            return texts
 
     def _build_prompt(self) -> str:
         """构建带上下文的 Prompt"""
-        today = datetime.date.today()
+        return self._render_prompt(self._build_context(), param("AI_ITEMS_PER_DAY"))
+
+    def _build_context(self, warm: bool = False) -> Dict[str, Any]:
+        """
+        收集 prompt 上下文（日期/时间段/城市/天气/称呼/自定义提示词）
+
+        :param warm: 随后要请求 AI 时传 True，收集上下文的同时预热到 AI_API_BASE 的连接
+        """
+        today = self._target_date or datetime.date.today()
         date_str = today.isoformat()
         weekday = ["一", "二", "三", "四", "五", "六", "日"][today.weekday()]
 
-        # 简单划分时间段
-        hour = datetime.datetime.now().hour
+        # 简单划分时间段（预生成的未来文本包从早晨开始使用）
+        if today > datetime.date.today():
+            hour = 8
+        else:
+            hour = datetime.datetime.now().hour
         if 5 <= hour < 12:
             time_of_day = "早晨"
         elif 12 <= hour < 18:
@@ -218,7 +528,50 @@ class DeepSeekTextProvider(BaseTextProvider):
         else:
             time_of_day = "深夜"
 
-        # 获取城市和天气（失败时返回空字符串）
+        # 城市→天气（有依赖，串行）与称呼/提示词（QSettings）并发收集；
+        # warm 时同时预热 AI 连接，关键路径为 max(上下文, 握手) 而不是两者之和
+        t0 = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        def timed(stage: str, fn: Callable[[], Any]) -> Any:
+            start = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                timings[stage] = (time.perf_counter() - start) * 1000.0
+                # 线程池随本次收集结束，关闭本线程的数据库连接
+                get_database().release()
+
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="ai-ctx") as pool:
+            if warm:
+                endpoints = _usable_endpoints()
+                base = endpoints[0].base if endpoints else AI_API_BASE
+                pool.submit(timed, "warm", lambda: self._http.warm(base))
+            place = pool.submit(timed, "city_weather", self._gather_place)
+            prefs = pool.submit(timed, "settings", self._gather_prefs)
+            city, weather = place.result()
+            salutation, user_custom = prefs.result()
+        timings["context"] = (time.perf_counter() - t0) * 1000.0
+        self.last_stage_timings = timings
+
+        # 简单裁剪自定义提示词长度，避免 prompt 过长
+        if user_custom and len(user_custom) > 400:
+            user_custom = user_custom[:400]
+
+        # 由调用方决定何时替换 self._context（补充生成在成功后才切换）
+        return {
+            "date": date_str,
+            "weekday": weekday,
+            "time_of_day": time_of_day,
+            "city": city,
+            "weather": weather,
+            "salutation": salutation,
+            "user_custom_prompt": user_custom,
+        }
+
+    @staticmethod
+    def _gather_place() -> tuple[str, str]:
+        """城市与天气（失败时返回空字符串）"""
         try:
             city = get_city()
         except Exception as e:
@@ -232,8 +585,11 @@ class DeepSeekTextProvider(BaseTextProvider):
             if DEBUG:
                 print(f"[Context] 获取天气失败: {e}")
             weather = ""
+        return city, weather
 
-        # 用户自定义：称呼 & 提示词
+    @staticmethod
+    def _gather_prefs() -> tuple[str, str]:
+        """用户自定义：称呼 & 提示词"""
         try:
             salutation = app_settings.get_salutation()
         except Exception as e:
@@ -247,49 +603,239 @@ class DeepSeekTextProvider(BaseTextProvider):
             if DEBUG:
                 print(f"[Context] 获取自定义提示词失败: {e}")
             user_custom = ""
+        return salutation, user_custom
 
-        # 简单裁剪自定义提示词长度，避免 prompt 过长
-        if user_custom and len(user_custom) > 400:
-            user_custom = user_custom[:400]
+    @staticmethod
+    def _render_prompt(ctx: Dict[str, Any], n: int, focus: str = "") -> str:
+        """按上下文渲染 prompt；focus 非空时追加本组主题侧重（分片并发生成用）"""
+        prompt = AI_PROMPT_TEMPLATE.format(
+            n=n,
+            date=ctx.get("date", ""),
+            weekday=ctx.get("weekday", ""),
+            time_of_day=ctx.get("time_of_day", ""),
+            city=ctx.get("city", ""),
+            weather=ctx.get("weather", ""),
+            salutation=ctx.get("salutation", ""),
+            user_custom_prompt=ctx.get("user_custom_prompt", ""),
+        )
+        if focus:
+            prompt += f"\n\n本组文字的主题侧重：{focus}（仍需满足以上全部约束）。"
+        return prompt
 
-        # 保存上下文到实例（用于写入缓存）
-        self._context = {
-            "date": date_str,
-            "weekday": weekday,
-            "time_of_day": time_of_day,
-            "city": city,
-            "weather": weather,
-            "salutation": salutation,
-            "user_custom_prompt": user_custom,
-        }
+    def _generate_from_ai(self, ctx: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """调用 DeepSeek 接口生成文本（AI_PARALLEL_SHARDS > 1 时拆成多个并发请求）"""
+        # 流式条目逐条发布为新快照，整次生成开始前统一清空
+        self._publish(array("I"), ready=False)
 
-        return AI_PROMPT_TEMPLATE.format(
-            n=AI_ITEMS_PER_DAY,
-            date=date_str,
-            weekday=weekday,
-            time_of_day=time_of_day,
-            city=city,
-            weather=weather,
-            salutation=salutation,
-            user_custom_prompt=user_custom,
-        )
+        if ctx is None:
+            ctx = self._context = self._build_context(warm=True)
+        total = param("AI_ITEMS_PER_DAY")
+        shards = self._plan_shards(total, param("AI_PARALLEL_SHARDS"))
+        if len(shards) <= 1:
+            return self._request_items(self._render_prompt(ctx, total), total)
+        return self._generate_parallel(ctx, shards)
+
+    @staticmethod
+    def _plan_shards(total: int, k: int) -> List[tuple[int, str]]:
+        """把 total 条拆成 k 组 (条数, 主题)，主题取自 AI_SHARD_THEMES"""
+        k = max(1, min(int(k), int(total)))
+        if k == 1:
+            return [(total, "")]
+        base, extra = divmod(total, k)
+        themes = list(AI_SHARD_THEMES) or [""]
+        return [(base + (1 if i < extra else 0), themes[i % len(themes)]) for i in range(k)]
+
+    def _generate_parallel(self, ctx: Dict[str, Any], shards: List[tuple[int, str]]) -> Optional[Dict[str, Any]]:
+        """并发请求各分片；单个分片失败不影响其它分片"""
+        t0 = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(shards)
+        stats: List[Dict[str, Any]] = []
+        last_error: Exception | None = None
+
+        def run(idx: int, n: int, focus: str):
+            start = time.perf_counter()
+            try:
+                return idx, self._request_items(self._render_prompt(ctx, n, focus), n), None, start
+            except Exception as e:
+                return idx, None, e, start
+            finally:
+                get_database().release()
+
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="ai-shard") as pool:
+            futures = [pool.submit(run, i, n, focus) for i, (n, focus) in enumerate(shards)]
+            for fut in as_completed(futures):
+                idx, data, err, start = fut.result()
+                ms = (time.perf_counter() - start) * 1000.0
+                n, focus = shards[idx]
+                got = len((data or {}).get("items") or [])
+                stats.append({"shard": idx, "focus": focus, "requested": n, "items": got, "ms": ms, "error": str(err or "")})
+                if err is not None:
+                    last_error = err
+                    if DEBUG:
+                        print(f"[AI] 分片 {idx}（{focus or '-'}）失败，{ms:.0f}ms: {err}")
+                    continue
+                results[idx] = data
+                if DEBUG:
+                    print(f"[AI] 分片 {idx}（{focus or '-'}）完成: {got}/{n} 条，{ms:.0f}ms")
+
+        self.last_shard_stats = sorted(stats, key=lambda s: s["shard"])
+
+        # 合并并按文本精确去重（近重复由 prepare 中的 MinHash 过滤处理）
+        seen: set = set()
+        merged: List[Dict[str, Any]] = []
+        date = ""
+        for data in results:
+            if not data:
+                continue
+            date = date or str(data.get("date") or "")
+            for text in self._extract_texts(data.get("items") or []):
+                if text not in seen:
+                    seen.add(text)
+                    merged.append({"text": text})
+
+        if DEBUG:
+            ok = sum(1 for r in results if r)
+            print(
+                f"[AI] 分片生成完成: {ok}/{len(shards)} 个分片成功，合并 {len(merged)} 条，"
+                f"总计 {(time.perf_counter() - t0) * 1000.0:.0f}ms"
+            )
+        if not merged:
+            if last_error is not None:
+                raise last_error
+            return None
+        return {"date": date or self._today_str(), "items": merged}
+
+    def _request_items(self, prompt: str, n: int, stream: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        发送一次 chat completion 请求并解析为 {"date", "items"}
+
+        stream=False 时不走流式追加（条目只在返回值中，由调用方合并发布）
+
+        配置了多个端点时做对冲：最快的端点先发，AI_HEDGE_DELAY_SECONDS 内没有结果再向下一个端点发，
+        取第一个有效结果，其余请求取消
+        """
+        endpoints = _usable_endpoints()
+        if not endpoints:
+            raise ValueError("没有配置 API Key 的 AI 端点")
+        if len(endpoints) == 1 or param("AI_HEDGE_DELAY_SECONDS") <= 0:
+            ep = endpoints[0]
+            t0 = time.perf_counter()
+            try:
+                data = self._request_endpoint(ep, prompt, n, stream=stream)
+            except TaskCancelled:
+                raise
+            except Exception:
+                get_endpoint_latency().observe(ep, AI_TIMEOUT_SECONDS * 1000.0)
+                raise
+            get_endpoint_latency().observe(ep, (time.perf_counter() - t0) * 1000.0)
+            return data
+        return self._request_hedged(endpoints, prompt, n, stream)
+
+    def _request_hedged(
+        self, endpoints: List[Endpoint], prompt: str, n: int, stream: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """对冲请求：按顺序延迟发出，第一个有效结果胜出；全部失败时抛出最后一个错误"""
+        race = HedgeRace()
+        results: "queue.Queue[tuple]" = queue.Queue()
+        started: List[float] = []
+        latency = get_endpoint_latency()
+        last_error: Exception | None = None
+        hedge_delay = param("AI_HEDGE_DELAY_SECONDS")
+
+        def attempt(idx: int, ep: Endpoint) -> None:
+            # 落选/失败的耗时在各自线程里记录：胜者返回后仍在进行的请求也会计入
+            try:
+                results.put((idx, self._request_endpoint(ep, prompt, n, race, idx, stream), None))
+            except HedgeCancelled as e:
+                # 落选者没有完成耗时：从整个请求开始算（自身耗时 + 发出前的对冲延迟）只作为下限抬高 EWMA
+                latency.observe_floor(ep, (time.perf_counter() - started[0]) * 1000.0)
+                results.put((idx, None, e))
+            except TaskCancelled as e:
+                # 整个任务被取消：不计入端点延迟
+                results.put((idx, None, e))
+            except Exception as e:
+                ms = (time.perf_counter() - started[idx]) * 1000.0
+                latency.observe(ep, max(ms, AI_TIMEOUT_SECONDS * 1000.0))
+                results.put((idx, None, e))
+            finally:
+                get_database().release()
+
+        pool = ThreadPoolExecutor(max_workers=len(endpoints), thread_name_prefix="ai-hedge")
+
+        def launch() -> None:
+            idx = len(started)
+            started.append(time.perf_counter())
+            pool.submit(attempt, idx, endpoints[idx])
+
+        try:
+            launch()
+            finished = 0
+            while finished < len(started):
+                self._check_cancelled()
+                can_hedge = len(started) < len(endpoints) and race.winner is None
+                try:
+                    idx, data, err = results.get(timeout=hedge_delay if can_hedge else None)
+                except queue.Empty:
+                    if DEBUG:
+                        print(
+                            f"[AI] {endpoints[len(started) - 1].name} {hedge_delay:.1f}s 内未返回，"
+                            f"对冲请求 {endpoints[len(started)].name}"
+                        )
+                    launch()
+                    continue
+                finished += 1
+                ep = endpoints[idx]
+                ms = (time.perf_counter() - started[idx]) * 1000.0
+                if err is None and race.winner == idx:
+                    latency.observe(ep, (race.claimed_at - started[idx]) * 1000.0)
+                    if DEBUG and len(started) > 1:
+                        print(f"[AI] 对冲请求由 {ep.name} 胜出（{len(started)} 个端点参与）")
+                    return data
+                if isinstance(err, HedgeCancelled):
+                    continue
+                if isinstance(err, TaskCancelled):
+                    raise err
+                last_error = err or ValueError("AI 返回内容无效")
+                if DEBUG:
+                    print(f"[AI] 端点 {ep.name} 失败，{ms:.0f}ms: {last_error}")
+                # 进行中的请求都失败了：不等对冲延迟，立即换下一个端点
+                if finished == len(started) and len(started) < len(endpoints) and race.winner is None:
+                    launch()
+        finally:
+            # 胜者已返回：其余尝试在各自线程里看到 race.lost() 后自行结束
+            pool.shutdown(wait=False)
+        if last_error is not None:
+            raise last_error
+        return None
+
+    def _request_endpoint(
+        self,
+        ep: Endpoint,
+        prompt: str,
+        n: int,
+        race: Optional[HedgeRace] = None,
+        idx: int = 0,
+        stream: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        向单个端点发送请求；race 非空时为对冲中的一个尝试
 
-    def _generate_from_ai(self) -> Optional[Dict[str, Any]]:
-        """调用 DeepSeek 接口生成文本"""
-        url = AI_API_BASE.rstrip("/") + "/v1/chat/completions"
+        端点支持时请求 JSON 格式输出（response_format），max_tokens 按条数封顶；
+        端点以 400 拒绝 response_format 时记下并去掉该参数重试一次
+        """
+        url = ep.url
         if DEBUG:
             proxies = requests.utils.get_environ_proxies(url) or {}
             print(f"[AI] proxies: {proxies if proxies else '(none)'}")
         headers = {
-            "Authorization": f"Bearer {_get_api_key()}",
+            "Authorization": f"Bearer {ep.api_key(_get_api_key())}",
             "Content-Type": "application/json",
         }
 
-        prompt = self._build_prompt()
-
-        body = {
-            "model": AI_MODEL,
+        body: Dict[str, Any] = {
+            "model": ep.model,
             "temperature": AI_TEMPERATURE,
+            "max_tokens": max(1, int(n)) * AI_MAX_TOKENS_PER_ITEM + 200,
             "messages": [
                 {
                     "role": "user",
@@ -297,14 +843,53 @@ class DeepSeekTextProvider(BaseTextProvider):
                 }
             ],
         }
+        if ep.json_mode and ep.name not in _json_mode_unsupported:
+            body["response_format"] = {"type": "json_object"}
 
         if DEBUG:
-            print(f"[AI] 调用 DeepSeek: {url}")
+            print(f"[AI] 调用 {ep.name}: {url}")
+
+        try:
+            return self._post_chat(url, headers, body, race, idx, stream)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 0
+            if status != 400 or "response_format" not in body:
+                raise
+            _json_mode_unsupported.add(ep.name)
+            if DEBUG:
+                print(f"[AI] {ep.name} 不支持 JSON 输出模式，改用普通模式")
+            body.pop("response_format")
+            return self._post_chat(url, headers, body, race, idx, stream)
+
+    def _post_chat(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        body: Dict[str, Any],
+        race: Optional[HedgeRace],
+        idx: int,
+        stream: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        if stream and AI_STREAM_ENABLED:
+            body["stream"] = True
+            return self._generate_streaming(url, headers, body, race, idx)
 
-        # timeout 分离：connect 5s，read AI_TIMEOUT_SECONDS（默认 20，可在 config 调大）
-        resp = self._session.post(url, headers=headers, json=body, timeout=(5, AI_TIMEOUT_SECONDS))
-        resp.raise_for_status()
-        data = resp.json()
+        cancel = self._cancel
+        if race is None and cancel is None:
+            resp = self._http.post(url, headers=headers, json=body)
+            resp.raise_for_status()
+            data = resp.json()
+        else:
+            # 对冲中 / 可取消时按块读取，其它端点胜出或任务取消后立即放弃
+            chunks: List[bytes] = []
+            with self._http.post(url, headers=headers, json=body, stream=True, cancel=cancel) as resp:
+                resp.raise_for_status()
+                for chunk in resp.iter_content(chunk_size=8192):
+                    if race is not None and race.lost(idx):
+                        raise HedgeCancelled()
+                    self._check_cancelled()
+                    chunks.append(chunk)
+            data = json.loads(b"".join(chunks).decode("utf-8"))
 
         choices = data.get("choices") or []
         if not choices:
@@ -314,7 +899,118 @@ class DeepSeekTextProvider(BaseTextProvider):
         if DEBUG:
             print("[AI] 原始返回内容截断:", content[:120].replace("\n", " ") + "...")
 
-        # content 应该是 JSON 字符串
+        result = self._parse_content(content)
+        valid = any(get_item_filter().accept(t) for t in self._extract_texts(result.get("items") or []))
+        if race is not None and not (valid and race.claim(idx)):
+            if race.lost(idx):
+                raise HedgeCancelled()
+            raise ValueError("AI 返回没有有效条目")
+        return result
+
+    def _generate_streaming(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        body: Dict[str, Any],
+        race: Optional[HedgeRace] = None,
+        idx: int = 0,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        流式调用（SSE）：每闭合一个 {"text": ...} 就放入文本池，
+        收到 AI_STREAM_READY_ITEMS 条后即 is_ready()；缓存仍在流结束后由 prepare 写入
+
+        对冲中（race 非空）第一个收到有效条目的尝试胜出，只有胜者的条目进入文本池
+        """
+        extractor = IncrementalItemExtractor()
+        received: List[str] = []
+        t0 = time.perf_counter()
+        first_item_ms: float | None = None
+
+        # 读完或中途异常时 with 都会关闭响应，连接归还连接池
+        with self._http.post(url, headers=headers, json=body, stream=True, cancel=self._cancel) as resp:
+            resp.raise_for_status()
+            resp.encoding = "utf-8"
+            for line in resp.iter_lines(decode_unicode=True):
+                if race is not None and race.lost(idx):
+                    # 中途关闭连接（不归还连接池），尽快停止接收
+                    raise HedgeCancelled()
+                self._check_cancelled()
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    # 不 break：读到流结束，连接才能归还连接池（中途关闭会断开连接）
+                    continue
+                try:
+                    chunk = json.loads(payload)
+                except ValueError:
+                    continue
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                piece = (choices[0].get("delta") or {}).get("content") or ""
+                for obj in extractor.feed(piece):
+                    if race is not None and not (get_item_filter().accept(str(obj.get("text", "")).strip()) and race.claim(idx)):
+                        if race.lost(idx):
+                            raise HedgeCancelled()
+                        continue
+                    text = self._on_stream_item(obj)
+                    if text:
+                        received.append(text)
+                        if first_item_ms is None:
+                            first_item_ms = (time.perf_counter() - t0) * 1000.0
+
+        content = extractor.text
+        if DEBUG:
+            first = f"{first_item_ms:.0f}ms" if first_item_ms is not None else "-"
+            print(
+                f"[AI] 流式生成完成: {len(received)} 条，首条 {first}，"
+                f"总计 {(time.perf_counter() - t0) * 1000.0:.0f}ms"
+            )
+        try:
+            return self._parse_content(content)
+        except ValueError:
+            # 整体 JSON 不完整（例如被截断），但已提取到的条目仍然可用
+            if received:
+                return {"date": self._today_str(), "items": [{"text": t} for t in received]}
+            raise
+
+    def _on_stream_item(self, obj: Dict[str, Any]) -> str:
+        """流式收到一个条目：放入文本池，必要时标记就绪；返回被接收的文本（未接收返回空串）"""
+        text = str(obj.get("text", "")).strip()
+        if not text or not get_item_filter().accept(text):
+            return ""
+        if AI_DEDUP_ENABLED:
+            try:
+                if get_dedup_index().is_near_duplicate(text, exclude_date=self._today_str()):
+                    return ""
+            except Exception:
+                pass
+
+        # 复制 + 追加后整体替换（多个分片线程并发追加，用锁串行化写入方；读取方不加锁）
+        h = self._pool.intern(text)
+        with self._stream_lock:
+            snap = self._snap
+            ready = snap.ready or len(snap.items) + 1 >= param("AI_STREAM_READY_ITEMS")
+            self._snap = snap.appended(h, ready)
+            self._ready = ready
+            fire = ready and not snap.ready
+
+        if fire:
+            if DEBUG:
+                print(f"[AI] 已收到 {len(self._snap)} 条，提前就绪")
+            callback = self.on_ready
+            if callback:
+                try:
+                    callback(self)
+                except Exception as e:
+                    if DEBUG:
+                        print(f"[AI] on_ready 回调失败: {e}")
+        return text
+
+    def _parse_content(self, content: str) -> Dict[str, Any]:
+        """解析模型返回的 JSON 文本（容忍前后多余字符）"""
+        # 快速路径：JSON 输出模式下 content 就是完整 JSON，一次 json.loads 即可
         try:
             result = json.loads(content)
         except json.JSONDecodeError:
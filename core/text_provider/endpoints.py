@@ -0,0 +1,185 @@
+"""
+AI 端点列表与延迟统计
+
+AI_ENDPOINTS 可配置多个 OpenAI-compatible 端点（base / model / key_env / json_mode）；为空时只使用 AI_API_BASE + AI_MODEL。
+每个端点记录一次请求到首个有效结果的耗时 EWMA（保存在数据库 endpoint_latency 表，重启后仍有效），
+对冲请求按 EWMA 从快到慢依次发出；没有测量过的端点按配置顺序排在后面，熔断中的端点排在最后。
+对冲中落选（被取消）的请求没有完成耗时，不计入 EWMA，只能把已有的 EWMA 抬高到“从请求开始到取消”的时长。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import config as _config
+from utils.db import Database, get_database
+from utils.resilience import host_of
+from utils.resilience import get_breaker
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+AI_LATENCY_EWMA_ALPHA = float(getattr(_config, "AI_LATENCY_EWMA_ALPHA", 0.3))
+AI_JSON_MODE = bool(getattr(_config, "AI_JSON_MODE", True))
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """一个 OpenAI-compatible 端点"""
+
+    base: str  # 不带 /v1
+    model: str
+    key_env: str = ""  # 读取 API Key 的环境变量名；为空时使用 DeepSeek Key
+    json_mode: bool = True  # 是否请求 JSON 格式输出（response_format）
+
+    @property
+    def name(self) -> str:
+        return f"{host_of(self.base)}/{self.model}"
+
+    @property
+    def url(self) -> str:
+        return self.base.rstrip("/") + "/v1/chat/completions"
+
+    def api_key(self, default: str) -> str:
+        if self.key_env:
+            return os.getenv(self.key_env, "").strip()
+        return default
+
+
+def configured_endpoints() -> List[Endpoint]:
+    """按配置顺序返回端点列表（AI_ENDPOINTS 为空时退化为 AI_API_BASE + AI_MODEL）"""
+    out: List[Endpoint] = []
+    for item in getattr(_config, "AI_ENDPOINTS", None) or []:
+        if not isinstance(item, dict) or not item.get("base"):
+            continue
+        out.append(
+            Endpoint(
+                base=str(item["base"]),
+                model=str(item.get("model") or _config.AI_MODEL),
+                key_env=str(item.get("key_env") or ""),
+                json_mode=bool(item.get("json_mode", AI_JSON_MODE)),
+            )
+        )
+    return out or [Endpoint(base=_config.AI_API_BASE, model=_config.AI_MODEL, json_mode=AI_JSON_MODE)]
+
+
+class EndpointLatency:
+    """各端点耗时 EWMA（线程安全，每次更新写回数据库）"""
+
+    def __init__(self, alpha: float = AI_LATENCY_EWMA_ALPHA, db: Optional[Database] = None) -> None:
+        self.alpha = min(1.0, max(0.01, float(alpha)))
+        self.db = db or get_database()
+        self._lock = threading.Lock()
+        self._ewma: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        try:
+            for row in self.db.query_all("SELECT name, ewma_ms, samples FROM endpoint_latency"):
+                self._ewma[row["name"]] = float(row["ewma_ms"])
+                self._samples[row["name"]] = int(row["samples"])
+        except Exception as e:
+            if DEBUG:
+                print(f"[AI] 读取端点延迟失败: {e}")
+
+    def ewma(self, endpoint: Endpoint) -> Optional[float]:
+        with self._lock:
+            return self._ewma.get(endpoint.name)
+
+    def observe(self, endpoint: Endpoint, ms: float) -> None:
+        """
+        记录一次完成的耗时（失败按超时时长记录，慢/坏端点会自然排到后面）
+
+        对冲中被取消的请求没有完成耗时，用 observe_floor()
+        """
+        name = endpoint.name
+        with self._lock:
+            prev = self._ewma.get(name)
+            value = ms if prev is None else prev + self.alpha * (ms - prev)
+            samples = self._samples.get(name, 0) + 1
+            self._ewma[name] = value
+            self._samples[name] = samples
+        self._save(name, value, samples)
+
+    def observe_floor(self, endpoint: Endpoint, ms: float) -> None:
+        """
+        对冲中被取消的请求：到取消时还没有结果，只说明耗时不少于 ms
+
+        只把已有的 EWMA 抬高到 ms（不降低、不计入样本）；没有测量过的端点保持未测量
+        """
+        name = endpoint.name
+        with self._lock:
+            prev = self._ewma.get(name)
+            if prev is None or ms <= prev:
+                return
+            self._ewma[name] = ms
+            samples = self._samples.get(name, 0)
+        self._save(name, ms, samples)
+
+    def _save(self, name: str, value: float, samples: int) -> None:
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO endpoint_latency (name, ewma_ms, samples, updated) VALUES (?, ?, ?, ?)",
+                (name, value, samples, time.time()),
+            )
+        except Exception as e:
+            if DEBUG:
+                print(f"[AI] 写入端点延迟失败: {e}")
+
+    def ordered(self, endpoints: List[Endpoint]) -> List[Endpoint]:
+        """可用的在前、按 EWMA 从快到慢；未测量的按配置顺序排在已测量之后"""
+        with self._lock:
+            ewma = dict(self._ewma)
+
+        def key(item):
+            idx, ep = item
+            tripped = get_breaker(host_of(ep.base)).retry_in() > 0
+            known = ewma.get(ep.name)
+            return (tripped, known is None, known or 0.0, idx)
+
+        return [ep for _idx, ep in sorted(enumerate(endpoints), key=key)]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {n: {"ewma_ms": v, "samples": self._samples.get(n, 0)} for n, v in self._ewma.items()}
+
+
+_latency: EndpointLatency | None = None
+_latency_lock = threading.Lock()
+
+
+def get_endpoint_latency() -> EndpointLatency:
+    """端点延迟统计（进程内单例）"""
+    global _latency
+    with _latency_lock:
+        if _latency is None:
+            _latency = EndpointLatency()
+        return _latency
+
+
+class HedgeCancelled(Exception):
+    """对冲请求中已有其它端点胜出，本请求放弃"""
+
+
+class HedgeRace:
+    """
+    一次对冲请求中各尝试之间的胜负
+
+    第一个拿到有效结果（流式为首个有效条目）的尝试 claim 成功，其余尝试看到 lost() 后尽快放弃
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.winner: Optional[int] = None
+        self.claimed_at: float = 0.0
+
+    def claim(self, idx: int) -> bool:
+        with self._lock:
+            if self.winner is None:
+                self.winner = idx
+                self.claimed_at = time.perf_counter()
+            return self.winner == idx
+
+    def lost(self, idx: int) -> bool:
+        winner = self.winner
+        return winner is not None and winner != idx
@@ -0,0 +1,77 @@
+"""
+AI 条目校验
+
+AI_PROMPT_TEMPLATE 中列出的硬性约束在这里落实，不合格的条目在进入文本池之前丢弃：
+- 长度在 AI_ITEM_MIN_CHARS ~ AI_ITEM_MAX_CHARS 之间（按字符计，含标点）
+- 不含网址（包括 example.com 这类裸域名）、@、#、表情符号，不含换行
+- 同一批内不重复
+
+所有字符类约束合并成一个预编译正则，每条文本只扫描一遍。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+import config as _config
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+AI_ITEM_MIN_CHARS = int(getattr(_config, "AI_ITEM_MIN_CHARS", 4))
+AI_ITEM_MAX_CHARS = int(getattr(_config, "AI_ITEM_MAX_CHARS", 28))
+
+# 每个分组对应一种拒绝原因（lastgroup 即原因名）
+# 裸域名用 (?![A-Za-z0-9]) 收尾而不是 \b：中文也是 \w，“访问example.com了解更多”里 \b 不成立
+_FORBIDDEN = re.compile(
+    r"(?P<url>https?://|www\.|[A-Za-z0-9-]+\.[A-Za-z]{2,}(?![A-Za-z0-9]))"
+    r"|(?P<mention>[@＠])"
+    r"|(?P<hashtag>[#＃])"
+    r"|(?P<emoji>[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\uFE0F\u200D])"
+    r"|(?P<newline>[\r\n])",
+    re.IGNORECASE,
+)
+
+
+class ItemFilter:
+    """单遍校验：check() 返回拒绝原因（合格返回空串）"""
+
+    def __init__(self, min_chars: int = AI_ITEM_MIN_CHARS, max_chars: int = AI_ITEM_MAX_CHARS) -> None:
+        self.min_chars = max(1, int(min_chars))
+        self.max_chars = max(self.min_chars, int(max_chars))
+
+    def check(self, text: str) -> str:
+        n = len(text)
+        if n < self.min_chars:
+            return "too_short"
+        if n > self.max_chars:
+            return "too_long"
+        m = _FORBIDDEN.search(text)
+        return (m.lastgroup or "forbidden") if m else ""
+
+    def accept(self, text: str) -> bool:
+        return not self.check(text)
+
+    def filter(self, texts: Iterable[str]) -> Tuple[List[str], Dict[str, int]]:
+        """过滤一批文本，返回 (合格文本, {原因: 条数})；同批内重复的记为 duplicate"""
+        kept: List[str] = []
+        rejected: Dict[str, int] = {}
+        seen = set()
+        for text in texts:
+            reason = self.check(text)
+            if not reason and text in seen:
+                reason = "duplicate"
+            if reason:
+                rejected[reason] = rejected.get(reason, 0) + 1
+                continue
+            seen.add(text)
+            kept.append(text)
+        if DEBUG and rejected:
+            print(f"[AI] 条目校验：保留 {len(kept)} 条，丢弃 {sum(rejected.values())} 条 {rejected}")
+        return kept, rejected
+
+
+_filter = ItemFilter()
+
+
+def get_item_filter() -> ItemFilter:
+    return _filter
@@ -0,0 +1,77 @@
+"""
+增量 JSON 条目提取
+
+流式生成时，模型按 token 输出形如 {"date": ..., "items": [{"text": ...}, ...]} 的 JSON。
+IncrementalItemExtractor 逐段喂入文本，每当 items 中的一个对象闭合就立即解析并返回，
+不必等整段 JSON 结束。只跟踪花括号深度与字符串/转义状态，单遍扫描，不回溯。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+
+class IncrementalItemExtractor:
+    """从流式 JSON 文本中提取第二层对象（即 items 数组中的元素）"""
+
+    def __init__(self) -> None:
+        self._buf: List[str] = []  # 当前正在累积的对象
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._text_parts: List[str] = []  # 完整内容（流结束后整体解析用）
+
+    @property
+    def text(self) -> str:
+        """目前为止收到的全部内容"""
+        return "".join(self._text_parts)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """喂入一段文本，返回本段内新闭合的对象"""
+        if not chunk:
+            return []
+        self._text_parts.append(chunk)
+        out: List[Dict[str, Any]] = []
+        collecting = self._depth >= 2
+        start = 0
+
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+                if self._depth == 2:
+                    collecting = True
+                    start = i
+                    self._buf = []
+            elif ch == "}":
+                if self._depth == 2 and collecting:
+                    self._buf.append(chunk[start:i + 1])
+                    obj = self._parse("".join(self._buf))
+                    if obj is not None:
+                        out.append(obj)
+                    self._buf = []
+                    collecting = False
+                self._depth = max(0, self._depth - 1)
+
+        if collecting:
+            self._buf.append(chunk[start:])
+        return out
+
+    @staticmethod
+    def _parse(s: str) -> Dict[str, Any] | None:
+        try:
+            obj = json.loads(s)
+        except ValueError:
+            return None
+        return obj if isinstance(obj, dict) else None
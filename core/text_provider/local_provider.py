@@ -1,41 +1,321 @@
 """
 本地文本提供者
 
-从 data/texts.txt 或默认列表中读取文本
+从 data/texts.txt 或默认列表中读取文本，支持文件变更后的增量重载；
+若文本库目录（TEXT_CORPUS_DIR）中有分片文件，则切换为分片懒加载模式
 """
 
 from __future__ import annotations
 
+import hashlib
+import os
 import random
-from typing import List
+import threading
+import time
+from array import array
+from typing import List, Dict, Any, Optional
 
 from .base import BaseTextProvider
-from utils.text_loader import load_texts
+from .corpus import ShardedCorpus
+from .text_pool import get_text_pool
+from utils.text_loader import DEFAULT_TEXTS, parse_text_line, get_text_file_path
+from utils.resources import get_resource_path
+from config import TEXT_CORPUS_DIR, TEXT_CORPUS_WORKERS, DEBUG
+from utils.runtime_params import param
+from utils.task_executor import CancelToken
+
+# 用于判断“仅追加”的签名长度（字节）：先比较已解析区域的头尾，再比较整段哈希
+_SIG_BYTES = 64
+_HASH_CHUNK = 1 << 20
+
+
+def _prefix_hash(data: bytes = b""):
+    return hashlib.blake2b(data, digest_size=16)
 
 
 class LocalTextProvider(BaseTextProvider):
     """本地文件文本提供者"""
 
-    def __init__(self) -> None:
+    def __init__(self, path: Optional[str] = None, corpus_dir: Optional[str] = None) -> None:
         super().__init__()
-        self._texts: List[str] = []
+        self._path: str = path or get_text_file_path()
+        if corpus_dir is None and TEXT_CORPUS_DIR:
+            corpus_dir = get_resource_path(TEXT_CORPUS_DIR)
+        self._corpus_dir: Optional[str] = corpus_dir or None
+        self._corpus: Optional[ShardedCorpus] = None
+        self._pool = get_text_pool()
+        self._texts: array = array("I")  # 文本池句柄
         self._index: int = 0
+        # 重载串行化（prepare / reload 可能来自不同线程）
+        self._reload_lock = threading.Lock()
+        # 增量读取状态
+        self._offset: int = 0  # 已解析到的字节位置（最后一个换行之后）
+        self._mtime: float = 0.0
+        self._size: int = 0
+        self._head_sig: bytes = b""
+        self._tail_sig: bytes = b""
+        self._prefix_hash = _prefix_hash()  # 已解析区域 [0, _offset) 的哈希（中间被改写时不再当作追加）
+        self._tail_handle: int = -1  # 文件末尾未以换行结束的那一行（已计入 _texts）
+        self._from_file: bool = False
+        self.last_reload: Dict[str, Any] = {}
+        self._pool.add_holder(self)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def watch_paths(self) -> List[str]:
+        """需要监听的路径（文本文件 + 文本库目录）"""
+        paths = [self._path]
+        if self._corpus_dir:
+            paths.append(self._corpus_dir)
+        return paths
+
+    @property
+    def corpus(self) -> Optional[ShardedCorpus]:
+        return self._corpus
 
     def prepare(self) -> None:
-        """同步读取本地文本"""
+        """同步读取本地文本（目录模式下只建立 manifest，分片按需加载）"""
         try:
-            texts = load_texts()
-            # 过滤空行
-            self._texts = [t.strip() for t in texts if t and t.strip()]
-            self._ready = bool(self._texts)
+            with self._reload_lock:
+                if self._corpus_dir and os.path.isdir(self._corpus_dir):
+                    self._prepare_corpus()
+                if self._corpus is None:
+                    self._full_load()
         except Exception as e:
             print(f"本地文本加载失败: {e}")
-            self._texts = []
+            self._texts = array("I")
             self._ready = False
 
+    def reload(self, cancel: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        文件变更后重新加载（可在后台线程调用）
+
+        - 文件只是追加内容时（已解析区域的哈希不变），只读取新增的字节范围
+        - 其它情况（改写/截断/删除）整体重读
+        - 新列表构建完成后一次性替换引用，读取方不会看到半更新状态
+        - cancel 被取消时在替换之前抛出 TaskCancelled（保持旧列表）
+
+        返回: {"mode": "append"/"full"/"unchanged", "added": n, "removed": n, "total": n, "ms": 耗时}
+        """
+        t0 = time.perf_counter()
+        if self._corpus is not None or (self._corpus_dir and os.path.isdir(self._corpus_dir)):
+            return self._reload_corpus(t0)
+        with self._reload_lock:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            old = self._texts
+            try:
+                st = os.stat(self._path)
+            except OSError:
+                st = None
+
+            if st is not None and self._from_file and st.st_size == self._size and st.st_mtime == self._mtime:
+                mode = "unchanged"
+            elif st is not None and self._from_file and st.st_size > self._size and self._is_append(cancel):
+                mode = "append"
+                self._append_load(st)
+            else:
+                mode = "full"
+                self._full_load()
+
+            new = self._texts
+            if new is old:
+                added = removed = 0
+            else:
+                old_set, new_set = set(old), set(new)
+                added = len(new_set - old_set)
+                removed = len(old_set - new_set)
+
+        self.last_reload = {
+            "mode": mode,
+            "added": added,
+            "removed": removed,
+            "total": len(self._texts),
+            "ms": (time.perf_counter() - t0) * 1000.0,
+        }
+        return self.last_reload
+
     def get_next_text(self) -> str:
         """随机返回一条文本"""
-        if not self._texts:
+        corpus = self._corpus
+        if corpus is not None:
+            text = corpus.sample()
+            if text:
+                return text
+        texts = self._texts
+        if not texts:
             return ""
-        return random.choice(self._texts)
+        return self._pool.get(random.choice(texts))
+
+    # ---------- 文本池压缩 ----------
+
+    def pool_handles(self) -> List[int]:
+        """仍在使用的文本池句柄"""
+        handles = list(self._texts)
+        if self._tail_handle >= 0:
+            handles.append(self._tail_handle)
+        return handles
+
+    def pool_remap(self, remap) -> None:
+        """文本池压缩后换成新句柄（与重载串行）"""
+        with self._reload_lock:
+            self._texts = array("I", (remap(h) for h in self._texts))
+            if self._tail_handle >= 0:
+                self._tail_handle = remap(self._tail_handle)
+
+    # ---------- 内部实现 ----------
+
+    def _prepare_corpus(self) -> None:
+        """目录模式：texts.txt 作为额外分片并入文本库"""
+        corpus = ShardedCorpus(
+            self._corpus_dir,
+            extra_files=[self._path],
+            memory_budget_bytes=int(param("TEXT_CORPUS_MEMORY_MB") * 1024 * 1024),
+            workers=TEXT_CORPUS_WORKERS,
+        )
+        stats = corpus.refresh()
+        if not stats["shards"]:
+            corpus.shutdown()
+            return
+        corpus.prefetch(1)
+        self._corpus = corpus
+        # 分片未加载前的兜底
+        self._texts = self._pool.intern_many(DEFAULT_TEXTS)
+        self._ready = True
+        if DEBUG:
+            print(f"[Corpus] 文本库目录模式: {self._corpus_dir} shards={stats['shards']}")
+
+    def _reload_corpus(self, t0: float) -> Dict[str, Any]:
+        """目录模式下的重载：重新 stat 分片，变更的分片会被卸载并在下次抽中时重读"""
+        with self._reload_lock:
+            if self._corpus is None:
+                self._prepare_corpus()
+                stats = {"added": self._corpus.total_lines if self._corpus else 0, "removed": len(self._texts)}
+                mode = "corpus"
+                if self._corpus is None:
+                    self._full_load()
+                    mode = "full"
+            else:
+                stats = self._corpus.refresh()
+                mode = "corpus" if (stats["added"] or stats["removed"]) else "unchanged"
+            total = self._corpus.total_lines if self._corpus else len(self._texts)
+
+        self.last_reload = {
+            "mode": mode,
+            "added": stats.get("added", 0),
+            "removed": stats.get("removed", 0),
+            "total": total,
+            "ms": (time.perf_counter() - t0) * 1000.0,
+        }
+        return self.last_reload
+
+    def _full_load(self) -> None:
+        """整体读取文件；文件不存在或为空时使用默认文本"""
+        self._from_file = False
+        self._offset = self._size = 0
+        self._mtime = 0.0
+        self._head_sig = self._tail_sig = b""
+        self._prefix_hash = _prefix_hash()
+        self._tail_handle = -1
+
+        texts: List[str] = []
+        try:
+            st = os.stat(self._path)
+            with open(self._path, "rb") as f:
+                data = f.read()
+            texts, consumed, tail = self._parse_chunk(data)
+            if texts:
+                self._from_file = True
+                self._offset = consumed
+                self._size = st.st_size
+                self._mtime = st.st_mtime
+                self._head_sig = data[:_SIG_BYTES]
+                self._tail_sig = data[max(0, consumed - _SIG_BYTES):consumed]
+                self._prefix_hash = _prefix_hash(data[:consumed])
+                self._tail_handle = self._pool.intern(tail) if tail else -1
+        except OSError:
+            texts = []
+        except Exception as e:
+            print(f"读取文本文件失败: {e}")
+            texts = []
+
+        if not texts:
+            # 与 load_texts 保持一致：文件不可用时回退默认列表
+            texts = list(DEFAULT_TEXTS)
+
+        # 过滤空行
+        self._texts = self._pool.intern_many(t.strip() for t in texts if t and t.strip())
+        self._ready = bool(self._texts)
+
+    def _is_append(self, cancel: Optional[CancelToken] = None) -> bool:
+        """
+        判断文件是否只是在末尾追加：先比较已解析区域的头尾签名（快速排除），
+        再对 [0, _offset) 重新计算哈希（中间被改写且文件变长时不会误判为追加）
+        """
+        try:
+            with open(self._path, "rb") as f:
+                head = f.read(len(self._head_sig))
+                start = self._offset - len(self._tail_sig)
+                f.seek(start)
+                tail = f.read(len(self._tail_sig))
+                if head != self._head_sig or tail != self._tail_sig:
+                    return False
+                f.seek(0)
+                h, remaining = _prefix_hash(), self._offset
+                while remaining > 0:
+                    if cancel is not None:
+                        cancel.raise_if_cancelled()
+                    chunk = f.read(min(_HASH_CHUNK, remaining))
+                    if not chunk:
+                        return False
+                    h.update(chunk)
+                    remaining -= len(chunk)
+            return h.digest() == self._prefix_hash.digest()
+        except OSError:
+            return False
+
+    def _append_load(self, st: os.stat_result) -> None:
+        """只读取 _offset 之后的新增字节"""
+        with open(self._path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        new_texts, consumed, tail = self._parse_chunk(data)
+
+        texts = array("I", self._texts)
+        # 上次末尾的半行现在可能已经写完整，移除后由新数据重新解析
+        if self._tail_handle >= 0 and texts and texts[-1] == self._tail_handle:
+            texts.pop()
+        texts.extend(self._pool.intern_many(new_texts))
+
+        self._offset += consumed
+        self._tail_sig = (self._tail_sig + data[:consumed])[-_SIG_BYTES:]
+        self._prefix_hash.update(data[:consumed])
+        self._tail_handle = self._pool.intern(tail) if tail else -1
+        self._size = st.st_size
+        self._mtime = st.st_mtime
+        self._texts = texts
+        self._ready = bool(texts)
+
+    @staticmethod
+    def _parse_chunk(data: bytes) -> tuple[List[str], int, str]:
+        """
+        解析一段字节
+
+        返回: (文本列表, 已完整消费的字节数（到最后一个换行为止）, 末尾半行文本)
+        """
+        if data.startswith(b"\xef\xbb\xbf"):
+            data_body, bom = data[3:], 3
+        else:
+            data_body, bom = data, 0
+        cut = data_body.rfind(b"\n") + 1
+        complete = data_body[:cut].decode("utf-8", errors="replace")
+        rest = data_body[cut:].decode("utf-8", errors="replace")
 
+        texts = [t for t in (parse_text_line(line) for line in complete.splitlines()) if t]
+        tail = parse_text_line(rest)
+        if tail:
+            texts.append(tail)
+        return texts, cut + bom, tail
@@ -0,0 +1,199 @@
+"""
+工作进程中的 AI 文本包（AI_WORKER_PROCESS=True 时代替 DeepSeekTextProvider）
+
+接口与 DeepSeekTextProvider 一致（prepare / top_up / invalidate_today_cache / on_ready / snapshot …），
+实际的生成、上下文与缓存都在 core.ai_worker 的子进程中；这里只把返回的文本放入本进程文本池，
+以不可变快照发布，GUI 线程抽样时不加锁。
+"""
+
+from __future__ import annotations
+
+import datetime
+import itertools
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+from .base import BaseTextProvider
+from .deepseek_provider import DeepSeekTextProvider
+from .snapshot import EMPTY_SNAPSHOT, TextSnapshot
+from .text_pool import get_text_pool
+from core.ai_worker import AIWorker, get_ai_worker, worker_enabled
+from utils.task_executor import CancelToken, TaskCancelled
+from utils.runtime_params import get_params
+from config import DEBUG
+
+_remote_ids = itertools.count(1)
+
+
+class RemoteTextProvider(BaseTextProvider):
+    """由工作进程生成文本包的 AI provider"""
+
+    def __init__(self, target_date: Optional[datetime.date] = None, worker: Optional[AIWorker] = None) -> None:
+        super().__init__()
+        self._target_date = target_date
+        self._worker = worker or get_ai_worker()
+        self._pid = next(_remote_ids)  # 子进程中对应 provider 的编号
+        self._pool = get_text_pool()
+        self._snap: TextSnapshot = EMPTY_SNAPSHOT
+        self._lock = threading.Lock()
+        self._snap_lock = threading.Lock()  # 快照写入方（结果 / 流式事件 / 文本池压缩）串行
+        self._preparing: bool = False
+        self._last_failure_ts: float | None = None
+        self._shown: Dict[int, int] = {}
+        self.on_ready: Optional[Callable[["RemoteTextProvider"], None]] = None
+        self.last_stage_timings: Dict[str, float] = {}
+        self._pool.add_holder(self)
+
+    @property
+    def preparing(self) -> bool:
+        return self._preparing
+
+    @property
+    def last_failure_ts(self) -> float | None:
+        return self._last_failure_ts
+
+    @property
+    def cache_key(self) -> str:
+        return self._snap.key
+
+    @property
+    def snapshot(self) -> TextSnapshot:
+        return self._snap
+
+    @property
+    def date_str(self) -> str:
+        return (self._target_date or datetime.date.today()).isoformat()
+
+    def is_ready(self) -> bool:
+        return self._snap.ready
+
+    # ---------- 公共接口 ----------
+
+    def prepare(self, cancel: Optional[CancelToken] = None) -> None:
+        """在工作进程中加载缓存变体或生成；流式首批条目到达时先发布部分文本包"""
+        if not self._begin():
+            return
+        try:
+            self._apply(self._call("prepare", cancel, on_event=self._on_event))
+        except TaskCancelled:
+            if DEBUG:
+                print("[AI] 生成已取消")
+        except Exception as e:
+            if DEBUG:
+                print(f"[AI] 生成失败: {e}")
+            self._last_failure_ts = time.time()
+        finally:
+            self._end()
+
+    def top_up(self, n: int, cancel: Optional[CancelToken] = None) -> bool:
+        """补充生成；展示次数随请求带给工作进程，用于挑选替换对象"""
+        if not self._snap.items:
+            self.prepare(cancel)
+            return self.is_ready()
+        if not self._begin():
+            return False
+        try:
+            shown = {self._pool.get(h, hot_cache=False): c for h, c in self._shown.items()}
+            result = self._call("top_up", cancel, n=int(n), shown=shown)
+            self._apply(result)
+            return bool(result.get("ok"))
+        except TaskCancelled:
+            return False
+        except Exception as e:
+            if DEBUG:
+                print(f"[AI] 补充生成失败: {e}")
+            self._last_failure_ts = time.time()
+            return False
+        finally:
+            self._end()
+
+    def invalidate_today_cache(self) -> None:
+        try:
+            self._call("invalidate", None)
+        except Exception as e:
+            if DEBUG:
+                print(f"[AI] 删除今日缓存失败: {e}")
+        finally:
+            with self._snap_lock:
+                self._snap = EMPTY_SNAPSHOT
+                self._ready = False
+                self._shown = {}
+
+    def get_next_text(self) -> str:
+        h = self._snap.sample()
+        if h < 0:
+            return ""
+        self._shown[h] = self._shown.get(h, 0) + 1
+        return self._pool.get(h)
+
+    # ---------- 文本池压缩 ----------
+
+    def pool_handles(self) -> List[int]:
+        """仍在使用的文本池句柄（当前文本包 + 展示计数）"""
+        return list(self._snap.items) + list(self._shown)
+
+    def pool_remap(self, remap) -> None:
+        """文本池压缩后换成新句柄"""
+        with self._snap_lock:
+            snap = self._snap
+            self._snap = snap.with_items(array("I", (remap(h) for h in snap.items)))
+            shown: Dict[int, int] = {}
+            for h, c in list(self._shown.items()):
+                shown[remap(h)] = shown.get(remap(h), 0) + c
+            self._shown = shown
+
+    # ---------- 内部实现 ----------
+
+    def _begin(self) -> bool:
+        with self._lock:
+            if self._preparing:
+                if DEBUG:
+                    print("[AI] prepare 已在进行中，跳过重复调用")
+                return False
+            self._preparing = True
+            return True
+
+    def _end(self) -> None:
+        with self._lock:
+            self._preparing = False
+
+    def _call(self, op: str, cancel: Optional[CancelToken], **kwargs: Any) -> Dict[str, Any]:
+        date = self._target_date.isoformat() if self._target_date else None
+        # 运行时参数（每日条数、分片数…）的覆盖值随调用带过去
+        return self._worker.call(op, cancel, pid=self._pid, date=date, params=get_params().overrides(), **kwargs)
+
+    def _apply(self, pack: Dict[str, Any]) -> None:
+        """工作进程返回的文本包 → 本进程文本池句柄，整体发布为新快照"""
+        texts: List[str] = pack.get("texts") or []
+        items = self._pool.intern_many(texts)
+        live = set(items)
+        with self._snap_lock:
+            self._shown = {h: c for h, c in self._shown.items() if h in live}
+            self._snap = TextSnapshot(items=items, ready=bool(pack.get("ready")) and bool(items), key=pack.get("key") or "")
+            self._ready = self._snap.ready
+        self.last_stage_timings = dict(pack.get("timings") or {})
+        if pack.get("failure_ts"):
+            self._last_failure_ts = pack["failure_ts"]
+
+    def _on_event(self, name: str, pack: Dict[str, Any]) -> None:
+        """读取线程回调：流式首批条目已到达"""
+        if name != "partial":
+            return
+        was_ready = self._snap.ready
+        self._apply(pack)
+        callback = self.on_ready
+        if callback and self._snap.ready and not was_ready:
+            try:
+                callback(self)
+            except Exception as e:
+                if DEBUG:
+                    print(f"[AI] on_ready 回调失败: {e}")
+
+
+def create_ai_provider(target_date: Optional[datetime.date] = None) -> BaseTextProvider:
+    """按 AI_WORKER_PROCESS 创建进程内或工作进程中的 AI provider"""
+    if worker_enabled():
+        return RemoteTextProvider(target_date=target_date)
+    return DeepSeekTextProvider(target_date=target_date)
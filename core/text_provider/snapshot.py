@@ -0,0 +1,63 @@
+"""
+不可变快照
+
+后台线程（生成 / 补充 / 失效）与 GUI 线程（每次生成漂浮文字时抽样）之间只通过整体替换引用交换状态：
+- TextSnapshot：一个文本包的句柄数组 + 就绪标志 + 缓存变体键；发布后不再修改
+- ProviderSet：控制器当前使用的 provider 组合（当前来源 / AI provider / 模式）
+
+读取方先取一次引用再使用，不加锁，也不会看到写了一半的状态；
+写入方构造新对象后一次赋值发布（Python 中属性赋值是原子的）。
+"""
+
+from __future__ import annotations
+
+import random
+from array import array
+from dataclasses import dataclass, field, replace
+from typing import Any, Optional
+
+from .base import BaseTextProvider
+
+
+@dataclass(frozen=True)
+class TextSnapshot:
+    """文本包快照（items 为文本池句柄，发布后不得原地修改）"""
+
+    items: array = field(default_factory=lambda: array("I"))
+    ready: bool = False
+    key: str = ""  # 对应的缓存变体（上下文哈希）
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self) -> int:
+        """随机取一个句柄；没有条目时返回 -1"""
+        items = self.items
+        if not items:
+            return -1
+        return items[random.randrange(len(items))]
+
+    def with_items(self, items: array, ready: Optional[bool] = None) -> "TextSnapshot":
+        return replace(self, items=items, ready=self.ready if ready is None else ready)
+
+    def appended(self, handle: int, ready: bool) -> "TextSnapshot":
+        """追加一个句柄（复制数组，旧快照保持不变）"""
+        items = array("I", self.items)
+        items.append(handle)
+        return replace(self, items=items, ready=ready)
+
+
+EMPTY_SNAPSHOT = TextSnapshot()
+
+
+@dataclass(frozen=True)
+class ProviderSet:
+    """控制器使用的 provider 组合；只在 GUI 线程整体替换"""
+
+    active: BaseTextProvider  # 当前取文本的 provider（本地 / AI / 混合）
+    ai: Optional[Any] = None  # 当前的 AI provider（DeepSeekTextProvider，可能尚未就绪）
+    mode: str = "local"  # "local" / "ai" / "mix"
+    version: int = 0
+
+    def evolve(self, **changes: Any) -> "ProviderSet":
+        return replace(self, version=self.version + 1, **changes)
@@ -0,0 +1,235 @@
+"""
+紧凑文本池
+
+所有 provider 共用的字符串存储：
+- UTF-8 文本连续存放在一个 bytearray 中，另有一个偏移数组（array('I')）
+- 相同文本只存一份（跨 provider / 跨文本包去重），对外只给整数句柄
+- get() 时才解码为 str，并保留一个小的热点 LRU
+
+池按代（generation）压缩：文本包每天更换、本地文本重载、补充生成都会留下不再引用的文本，
+compact() 只把仍被引用的文本复制到新一代，再让持有句柄的 provider（add_holder 登记）换成新句柄。
+句柄最高位是代的奇偶：上一代在下一次压缩前保持可读，读取方与压缩并发时拿到的旧句柄仍然有效。
+
+句柄 h 对应 第 h >> 31 代的 buffer[offsets[i]:offsets[i + 1]]，i = h & 0x7FFFFFFF。
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import config as _config
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+
+# 热点字符串 LRU 容量
+HOT_CACHE_SIZE = 64
+# maybe_compact()：当前代比上次压缩后保留的文本多出这么多倍（且不小于下限）时才压缩
+COMPACT_GROWTH_RATIO = 2.0
+COMPACT_MIN_BYTES = 256 * 1024
+
+_GEN_SHIFT = 31
+_INDEX_MASK = (1 << _GEN_SHIFT) - 1
+
+
+def _index_add(index: Dict[int, Union[int, List[int]]], key: int, h: int) -> None:
+    found = index.get(key)
+    if found is None:
+        index[key] = h
+    elif isinstance(found, list):
+        found.append(h)
+    else:
+        index[key] = [found, h]
+
+
+class _Generation:
+    """一代存储：文本字节 + 偏移数组（只追加）"""
+
+    __slots__ = ("buf", "offsets")
+
+    def __init__(self) -> None:
+        self.buf = bytearray()
+        self.offsets = array("I", [0])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buf) + self.offsets.itemsize * len(self.offsets)
+
+
+class TextPool:
+    """去重的紧凑字符串池"""
+
+    def __init__(self, hot_cache_size: int = HOT_CACHE_SIZE) -> None:
+        # 两个槽位：当前代与上一代（按代的奇偶存放）
+        self._gens: List[_Generation] = [_Generation(), _Generation()]
+        self._cur = 0
+        # hash(bytes) -> 当前代的句柄；哈希冲突时值为句柄列表
+        self._index: Dict[int, Union[int, List[int]]] = {}
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._hot: "OrderedDict[int, str]" = OrderedDict()
+        self._hot_size = max(0, int(hot_cache_size))
+        # 持有句柄的对象：pool_handles() -> Iterable[int]，pool_remap(remap)
+        self._holders: "weakref.WeakSet" = weakref.WeakSet()
+        self.generation = 0
+        self._live_bytes = 0  # 上次压缩后当前代的字节数
+
+    def __len__(self) -> int:
+        """当前代的文本条数"""
+        return len(self._gens[self._cur])
+
+    @property
+    def nbytes(self) -> int:
+        """文本与偏移数组占用的字节数（两代合计，不含去重索引）"""
+        return sum(g.nbytes for g in self._gens)
+
+    def intern(self, text: str) -> int:
+        """存入一条文本（当前代已存在则直接返回原句柄）"""
+        data = text.encode("utf-8")
+        key = hash(data)
+        with self._lock:
+            found = self._index.get(key)
+            if found is not None:
+                for h in (found if isinstance(found, list) else (found,)):
+                    if self._slice(h) == data:
+                        return h
+
+            gen = self._gens[self._cur]
+            h = (self._cur << _GEN_SHIFT) | len(gen)
+            # 先写文本再追加偏移：无锁读取方只会看到完整的句柄
+            gen.buf.extend(data)
+            gen.offsets.append(len(gen.buf))
+            _index_add(self._index, key, h)
+            return h
+
+    def intern_many(self, texts: Iterable[str]) -> array:
+        """批量存入，返回句柄数组"""
+        return array("I", (self.intern(t) for t in texts))
+
+    def get(self, handle: int, hot_cache: bool = True) -> str:
+        """
+        句柄 → 文本（热点文本走 LRU，其它按需解码）
+
+        写缓存等批量场景可传 hot_cache=False，避免冲掉热点
+        """
+        if not hot_cache:
+            return self._slice(handle).decode("utf-8")
+        hot = self._hot
+        text = hot.get(handle)
+        if text is not None:
+            try:
+                hot.move_to_end(handle)
+            except KeyError:
+                pass
+            return text
+
+        text = self._slice(handle).decode("utf-8")
+        if self._hot_size:
+            hot[handle] = text
+            while len(hot) > self._hot_size:
+                try:
+                    hot.popitem(last=False)
+                except KeyError:
+                    break
+        return text
+
+    # ---------- 压缩 ----------
+
+    def add_holder(self, holder) -> None:
+        """登记持有句柄的对象（弱引用）；压缩时收集其句柄并让它换成新句柄"""
+        self._holders.add(holder)
+
+    def maybe_compact(
+        self, ratio: float = COMPACT_GROWTH_RATIO, min_bytes: int = COMPACT_MIN_BYTES
+    ) -> Optional[Dict[str, int]]:
+        """当前代增长到上次保留量的 ratio 倍以上（且超过 min_bytes）时压缩；否则返回 None"""
+        size = self._gens[self._cur].nbytes
+        if size < min_bytes or size < ratio * self._live_bytes:
+            return None
+        return self.compact()
+
+    def compact(self) -> Dict[str, int]:
+        """
+        按代压缩：把登记对象仍在引用的文本复制到新一代，再通知它们换成新句柄
+
+        - 新一代占用上上代的槽位，上一代保持可读到下一次压缩为止
+          （收集句柄之后才存入的文本、与压缩并发的读取方手中的句柄都还有效）
+        - 换句柄在各对象自己的写锁内进行，不持有池的锁（避免与正在 intern 的写入方互锁）
+
+        返回: {"before": 压缩前字节数, "after": 压缩后字节数（含仍保留的上一代）, "live": 保留条数}
+        """
+        with self._compact_lock:
+            holders = list(self._holders)
+            live: Dict[int, None] = {}
+            for holder in holders:
+                try:
+                    live.update(dict.fromkeys(holder.pool_handles()))
+                except Exception as e:
+                    if DEBUG:
+                        print(f"[TextPool] 收集句柄失败: {e}")
+
+            with self._lock:
+                before = self.nbytes
+                nxt = 1 - self._cur
+                gen = _Generation()
+                by_text: Dict[bytes, int] = {}
+                mapping: Dict[int, int] = {}
+                for old in live:
+                    data = bytes(self._slice(old))
+                    h = by_text.get(data)
+                    if h is None:
+                        h = by_text[data] = (nxt << _GEN_SHIFT) | len(gen)
+                        gen.buf.extend(data)
+                        gen.offsets.append(len(gen.buf))
+                    mapping[old] = h
+                index: Dict[int, Union[int, List[int]]] = {}
+                for data, h in by_text.items():
+                    _index_add(index, hash(data), h)
+                self._gens[nxt] = gen
+                self._cur = nxt
+                self._index = index
+                self._hot = OrderedDict()
+                self.generation += 1
+                self._live_bytes = gen.nbytes
+                after = self.nbytes
+
+            remap: Callable[[int], int] = lambda h: mapping.get(h, h)
+            for holder in holders:
+                try:
+                    holder.pool_remap(remap)
+                except Exception as e:
+                    if DEBUG:
+                        print(f"[TextPool] 更新句柄失败: {e}")
+
+        stats = {"before": before, "after": after, "live": len(gen)}
+        if DEBUG:
+            print(f"[TextPool] 压缩完成: {before} → {after} 字节，保留 {len(gen)} 条（第 {self.generation} 代）")
+        return stats
+
+    def reset(self) -> None:
+        """清空整个池（调用方需确保旧句柄不再使用；一般用 compact()）"""
+        with self._lock:
+            self._gens = [_Generation(), _Generation()]
+            self._cur = 0
+            self._index.clear()
+            self._hot.clear()
+
+    def _slice(self, handle: int) -> bytearray:
+        gen = self._gens[handle >> _GEN_SHIFT]
+        i = handle & _INDEX_MASK
+        offsets = gen.offsets
+        return gen.buf[offsets[i]:offsets[i + 1]]
+
+
+_shared_pool = TextPool()
+
+
+def get_text_pool() -> TextPool:
+    """进程内共享的文本池"""
+    return _shared_pool
@@ -0,0 +1,113 @@
+"""
+本地文本文件监听
+监听 data/texts.txt 的变更，去抖后作为后台任务（TaskExecutor）重载 LocalTextProvider
+"""
+from __future__ import annotations
+
+import os
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from config import DEBUG
+from utils.task_executor import CancelToken, TaskCancelled, TaskExecutor
+
+
+class TextFileWatcher(QObject):
+    """文本文件监听器 - 去抖 + 后台重载，不阻塞 GUI 线程"""
+
+    # 重载完成信号（跨线程发出，Qt 自动排队到 GUI 线程）
+    reloaded = pyqtSignal(dict)  # {"mode", "added", "removed", "total", "ms"}
+
+    def __init__(self, provider, debounce_ms: int = 300, parent=None, executor: TaskExecutor | None = None):
+        """
+        :param provider: LocalTextProvider 实例（需提供 path / reload()）
+        :param debounce_ms: 去抖间隔，连续写入在此时间内只触发一次重载
+        :param executor: 执行重载的后台任务池（可取消，退出时统一收尾）；未传入时自建一个单线程池
+        """
+        super().__init__(parent)
+        self._provider = provider
+        self._tasks = executor if executor is not None else TaskExecutor(1, name="texts")
+        self._path = os.path.abspath(provider.path)
+        # 额外监听的目录（如文本库目录）
+        self._dirs = [
+            os.path.abspath(p)
+            for p in getattr(provider, "watch_paths", [])
+            if os.path.abspath(p) != self._path
+        ]
+        self._reloading = False
+        self._pending = False
+
+        # 去抖定时器：每次变更都重新计时
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(max(0, int(debounce_ms)))
+        self._debounce.timeout.connect(self._start_reload)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_changed)
+        # 同时监听目录：编辑器“写临时文件再替换”或文件被删除/新建时，文件监听会丢失
+        self._watcher.directoryChanged.connect(self._on_changed)
+        self._ensure_watched()
+
+        self.reloaded.connect(self._on_reloaded)
+
+    def stop(self):
+        """停止监听（取消进行中的重载）"""
+        self._debounce.stop()
+        self._tasks.cancel("texts-reload")
+        paths = self._watcher.files() + self._watcher.directories()
+        if paths:
+            self._watcher.removePaths(paths)
+
+    def _ensure_watched(self):
+        """确保文件（存在时）与其所在目录处于监听中"""
+        directory = os.path.dirname(self._path)
+        if os.path.isdir(directory) and directory not in self._watcher.directories():
+            self._watcher.addPath(directory)
+        if os.path.exists(self._path) and self._path not in self._watcher.files():
+            self._watcher.addPath(self._path)
+        for d in self._dirs:
+            if os.path.isdir(d) and d not in self._watcher.directories():
+                self._watcher.addPath(d)
+
+    def _on_changed(self, _path: str = ""):
+        """文件或目录变化：重新计时"""
+        self._ensure_watched()
+        self._debounce.start()
+
+    def _start_reload(self):
+        """去抖结束：提交后台重载任务"""
+        if self._reloading:
+            # 重载进行中又有新变更：完成后再来一次
+            self._pending = True
+            return
+        try:
+            self._tasks.submit("texts-reload", self._reload_worker)
+        except RuntimeError:
+            # 执行器已关闭（正在退出）
+            return
+        self._reloading = True
+
+    def _reload_worker(self, cancel: CancelToken):
+        """后台任务：读文件、diff、原子替换"""
+        stats = {"mode": "error", "added": 0, "removed": 0, "total": 0, "ms": 0.0}
+        try:
+            stats = self._provider.reload(cancel)
+        except TaskCancelled:
+            stats = dict(stats, mode="cancelled")
+            raise
+        except Exception as e:
+            print(f"[Texts] 本地文本重载失败: {e}")
+        finally:
+            self.reloaded.emit(stats)
+
+    def _on_reloaded(self, stats: dict):
+        """GUI 线程：收尾并处理重载期间的新变更"""
+        self._reloading = False
+        if DEBUG and stats.get("mode") not in ("unchanged", None):
+            print(
+                f"[Texts] 本地文本已重载 mode={stats.get('mode')} "
+                f"+{stats.get('added', 0)} -{stats.get('removed', 0)} "
+                f"total={stats.get('total', 0)} ({stats.get('ms', 0.0):.1f}ms)"
+            )
+        if self._pending:
+            self._pending = False
+            self._debounce.start()
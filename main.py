@@ -1,19 +1,23 @@
 """
 主程序入口
 """
+# 最先导入：导入时刻作为启动时间线的起点
+from utils import startup_timeline
+
 import sys
 import os
+import multiprocessing
 import warnings
 
 # 抑制 libpng 的 ICC profile 警告（不影响功能）
 os.environ.setdefault("QT_LOGGING_RULES", "*.debug=false")
 warnings.filterwarnings("ignore", category=UserWarning, message=".*iCCP.*")
 
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication, QSystemTrayIcon
 from core.spawner import FloatSpawner
 from core.app_controller import AppController
 from ui.tray import TrayIcon
-from ui.panel import ControlPanel
 from core import settings as app_settings
 
 
@@ -36,21 +40,29 @@ def set_windows_appusermodelid():
 
 def main():
     """主函数"""
+    # 渲染子进程（RENDERER_PROCESS=True 时由控制进程启动）：只显示漂浮文字
+    if "--renderer" in sys.argv:
+        from ui.renderer import run_renderer
+        return run_renderer(sys.argv[sys.argv.index("--renderer") + 1])
+
     # 设置 Windows AppUserModelID（必须在创建 QApplication 之前或之后，但在创建窗口之前）
     set_windows_appusermodelid()
     
     # 创建 QApplication
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)  # 关闭所有窗口时不退出（因为有托盘）
+    startup_timeline.mark("qapplication")
     
     # 创建 Spawner
     spawner = FloatSpawner()
     
-    # 创建 Controller
+    # 创建 Controller（其余初始化在事件循环开始后进行）
     controller = AppController(spawner=spawner)
+    startup_timeline.mark("controller")
     
     # 创建并显示托盘图标
     tray = TrayIcon(controller)
+    startup_timeline.mark("tray_icon")
     
     # 检查系统托盘是否可用
     if not QSystemTrayIcon.isSystemTrayAvailable():
@@ -58,17 +70,34 @@ def main():
         print("程序无法运行")
         return 1
     
-    # 创建控制面板
-    panel = ControlPanel(controller)
-    tray.set_panel(panel)  # 让托盘可以打开面板
-    
+    # 控制面板在首次打开时才创建（启动时不显示面板就不构建）
+    def create_panel():
+        from ui.panel import ControlPanel
+
+        panel = ControlPanel(controller)
+        startup_timeline.mark("panel")
+        return panel
+
     # 根据设置决定是否显示面板
     if app_settings.get_show_panel_on_startup():
+        panel = create_panel()
+        tray.set_panel(panel)  # 让托盘可以打开面板
         panel.show_home()
+    else:
+        tray.set_panel_factory(create_panel)
+
+    # 事件循环开始后（延后的初始化已完成）打印启动时间线
+    def on_started():
+        startup_timeline.mark("startup_finished")
+        startup_timeline.report()
+
+    QTimer.singleShot(0, on_started)
     
     # 运行应用
     return app.exec()
 
 
 if __name__ == "__main__":
+    # 打包后（PyInstaller）启动 AI 工作进程需要
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+本地缓存维护工具
+
+用法：
+    python tools/cache_maint.py [stats]      查看数据库与各缓存的大小、条目数、命中率（近重复索引为剔除率）
+    python tools/cache_maint.py compact      整理缓存（过期/超限淘汰、WAL checkpoint）
+    python tools/cache_maint.py list         列出 AI 文本包（按最近使用时间）
+    python tools/cache_maint.py history [N]  最近展示的 N 条文字（默认 20）
+
+示例：
+    python tools/cache_maint.py
+    python tools/cache_maint.py compact
+    python tools/cache_maint.py history 50
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db import get_database
+from core.history import get_shown_history
+from core.text_provider.ai_cache import get_cache_index
+from core.text_provider.deepseek_provider import get_dedup_index
+from core.context.context_cache import get_geo_cache, get_weather_cache
+
+
+def _stores():
+    return [get_cache_index(), get_dedup_index(), get_geo_cache(), get_weather_cache(), get_shown_history()]
+
+
+def _fmt_size(n: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GB"
+
+
+def _fmt_ts(ts) -> str:
+    if not ts:
+        return "-"
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+def show_stats():
+    """打印各缓存的统计信息"""
+    db = get_database()
+    print(f"数据库: {db.path}（{_fmt_size(db.size_bytes())}，含 WAL）")
+    for store in _stores():
+        s = store.stats()
+        limit = _fmt_size(s["max_bytes"]) if s["max_bytes"] else "不限"
+        days = f"{s['max_age_seconds'] / 86400:.0f}天" if s["max_age_seconds"] else "不限"
+        lookups = s["hits"] + s["misses"]
+        print(f"\n[{s['name']}] 表 {s['table']}")
+        print("-" * 50)
+        print(f"   条目: {s['entries']}")
+        if s["bytes"] is not None:
+            print(f"   大小: {_fmt_size(s['bytes'])} / {limit}")
+        print(f"   保存: {days}（最早 {_fmt_ts(s['oldest'])}）")
+        if "rejection_rate" in s:
+            print(f"   近重复剔除率: {s['rejection_rate'] * 100:.1f}%（{s['hits']}/{lookups}）")
+        else:
+            print(f"   命中率: {s['hit_rate'] * 100:.1f}%（{s['hits']}/{lookups}）")
+        print(f"   累计淘汰: {s['evictions']}")
+
+
+def compact():
+    """整理所有缓存"""
+    for store in _stores():
+        r = store.compact()
+        size = f" {_fmt_size(r['bytes'])}" if r["bytes"] is not None else ""
+        print(f"[{r['name']}] {r['entries']} 条{size}，淘汰 {r['evicted']}（{r['ms']:.1f}ms）")
+    db = get_database()
+    db.checkpoint()
+    print(f"数据库: {_fmt_size(db.size_bytes())}")
+
+
+def list_packs():
+    """列出 AI 文本包"""
+    rows = get_database().query_all("SELECT date, ctx_key, size, created, used FROM ai_packs ORDER BY used DESC")
+    print("\n[ai_cache]")
+    print("-" * 50)
+    for r in rows:
+        print(
+            f"   {r['date']} {r['ctx_key']:<14} {_fmt_size(r['size']):>9}  "
+            f"创建 {_fmt_ts(r['created'])}  使用 {_fmt_ts(r['used'])}"
+        )
+    if not rows:
+        print("   （空）")
+
+
+def show_history(limit: int = 20):
+    """最近展示的文字"""
+    for ts, source, text in get_shown_history().recent(limit):
+        print(f"   {_fmt_ts(ts)}  {source or '-':<6} {text}")
+
+
+def main():
+    args = sys.argv[1:]
+    cmd = args[0] if args else "stats"
+    if cmd == "stats":
+        show_stats()
+    elif cmd == "compact":
+        compact()
+    elif cmd == "list":
+        list_packs()
+    elif cmd == "history":
+        show_history(int(args[1]) if len(args) > 1 else 20)
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+本地模拟的 OpenAI-compatible AI 端点（测试对冲请求 / 重试 / 熔断用）
+
+每个 --endpoint 启动一个服务：端口:首字节延迟秒数[:HTTP 状态码]
+状态码不是 200 时该端点总是返回错误（例如 503 模拟故障）。
+--bad N 让每次返回中混入 N 条违反模板约束的条目（网址/@/#/表情/过长），测试条目校验与补回；
+--reject-json-mode 让端点对带 response_format 的请求返回 400，测试退回普通模式。
+
+用法：
+    python tools/fake_ai_server.py --endpoint 8765:0.5 --endpoint 8766:4 --endpoint 8767:0:503
+    python tools/fake_ai_server.py --endpoint 8765:0.2 --bad 5 --reject-json-mode
+
+然后在 config.py 中配置（key_env 指向任意非空环境变量）：
+    AI_ENDPOINTS = [
+        {"base": "http://127.0.0.1:8766", "model": "fake-slow", "key_env": "FAKE_AI_KEY"},
+        {"base": "http://127.0.0.1:8765", "model": "fake-fast", "key_env": "FAKE_AI_KEY"},
+    ]
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+BAD_TEXTS = [
+    "看看 https://example.com 吧",
+    "@你 记得喝水",
+    "#周末# 好好休息",
+    "晚安 \U0001F319 好梦",
+    "这是一条非常非常非常非常非常非常非常非常非常非常长的文字",
+]
+
+
+_request_ids = itertools.count(1)
+
+
+def make_content(n: int, tag: str, bad: int = 0) -> str:
+    bad = min(bad, n)
+    rid = next(_request_ids)
+    items = [{"text": f"{tag}-{rid} 第 {i + 1} 条：今天也很好"} for i in range(n - bad)]
+    items += [{"text": BAD_TEXTS[i % len(BAD_TEXTS)]} for i in range(bad)]
+    return json.dumps({"date": datetime.date.today().isoformat(), "items": items}, ensure_ascii=False)
+
+
+def make_handler(port: int, delay: float, status: int, items: int, bad: int = 0, reject_json_mode: bool = False):
+    tag = f"[{port}]"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            print(f"{tag} {self.command} {self.path} -> {fmt % args}")
+
+        def do_HEAD(self):
+            # 连接预热
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                body = {}
+            time.sleep(delay)
+
+            if reject_json_mode and "response_format" in body:
+                payload = b'{"error": "response_format is not supported"}'
+                self.send_response(400)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            if status != 200:
+                payload = b'{"error": "fake failure"}'
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            # 按请求的 max_tokens 粗略限制条数（补回请求只要几条）
+            n = items
+            if body.get("max_tokens"):
+                n = max(1, min(items, (int(body["max_tokens"]) - 200) // 60))
+            content = make_content(n, f"{tag}{body.get('model', '')}", bad if n == items else 0)
+            if not body.get("stream"):
+                payload = json.dumps(
+                    {"choices": [{"message": {"role": "assistant", "content": content}}]}, ensure_ascii=False
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            # SSE：按小片段输出，模拟逐 token 生成
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for i in range(0, len(content), 16):
+                    chunk = {"choices": [{"delta": {"content": content[i : i + 16]}}]}
+                    self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+                    time.sleep(0.005)
+                self._write_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                print(f"{tag} 客户端已断开（对冲落选被取消）")
+
+        def _write_chunk(self, text: str) -> None:
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 OpenAI-compatible AI 端点")
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        default=[],
+        help="端口:延迟秒数[:状态码]，可重复（默认 8765:0.5）",
+    )
+    parser.add_argument("--items", type=int, default=50, help="每次返回的条目数")
+    parser.add_argument("--bad", type=int, default=0, help="每次混入的不合格条目数")
+    parser.add_argument("--reject-json-mode", action="store_true", help="对 response_format 请求返回 400")
+    args = parser.parse_args()
+
+    servers = []
+    for spec in args.endpoint or ["8765:0.5"]:
+        parts = spec.split(":")
+        port = int(parts[0])
+        delay = float(parts[1]) if len(parts) > 1 else 0.0
+        status = int(parts[2]) if len(parts) > 2 else 200
+        handler = make_handler(port, delay, status, args.items, args.bad, args.reject_json_mode)
+        server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        print(f"模拟端点 http://127.0.0.1:{port}  延迟 {delay}s  状态 {status}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
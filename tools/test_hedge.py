@@ -0,0 +1,99 @@
+"""
+测试对冲请求后的端点排序（离线，不发网络请求）
+
+模拟两个端点：主端点 0.35s 后返回有效结果；对冲端点在 AI_HEDGE_DELAY_SECONDS（0.2s）后发出，
+主端点胜出时被取消。胜出的端点之后应排在前面——落选者的“取消前耗时”（约 150ms）不能当作完成耗时。
+
+用法：
+    python tools/test_hedge.py
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.text_provider import deepseek_provider as dp
+from core.text_provider.endpoints import Endpoint, EndpointLatency, HedgeCancelled
+from utils.db import Database
+from utils.runtime_params import get_params
+
+PRIMARY = Endpoint(base="http://127.0.0.1:1", model="fake-primary")
+HEDGE = Endpoint(base="http://127.0.0.1:2", model="fake-hedge")
+
+
+def fake_request(ep, prompt, n, race=None, idx=0, stream=True):
+    """主端点 0.35s 后胜出；对冲端点一直等到被判落选"""
+    if ep is PRIMARY:
+        time.sleep(0.35)
+        race.claim(idx)
+        return {"date": "", "items": [{"text": "今天也要好好休息"}]}
+    end = time.time() + 5
+    while time.time() < end:
+        if race.lost(idx):
+            raise HedgeCancelled()
+        time.sleep(0.01)
+    raise ValueError("对冲端点没有被取消")
+
+
+def run_hedged_once(latency: EndpointLatency) -> None:
+    provider = dp.DeepSeekTextProvider()
+    provider._request_endpoint = fake_request
+    dp.get_endpoint_latency = lambda: latency
+    provider._request_hedged([PRIMARY, HEDGE], "prompt", 1)
+    # 落选者在自己的线程里收尾，等它记录完
+    time.sleep(0.3)
+
+
+def check(name: str, ok: bool, detail: str) -> bool:
+    print(f"{'✅' if ok else '❌'} {name}: {detail}")
+    return ok
+
+
+def test_unmeasured_loser() -> bool:
+    """两个端点都没有历史：胜者有测量值，落选者保持未测量，胜者排前"""
+    print("\n[测试] 无历史数据时对冲一次")
+    print("-" * 50)
+    latency = EndpointLatency(db=Database(os.path.join(tempfile.mkdtemp(), "t.db")))
+    run_hedged_once(latency)
+    order = [ep.model for ep in latency.ordered([HEDGE, PRIMARY])]
+    return check(
+        "排序",
+        order[0] == PRIMARY.model and latency.ewma(HEDGE) is None,
+        f"{order}，主 {latency.ewma(PRIMARY):.0f}ms，对冲 {latency.ewma(HEDGE)}",
+    )
+
+
+def test_fast_history_loser() -> bool:
+    """落选者历史上更快：取消只能把它抬高到“从请求开始到取消”的时长，不会把它记得比胜者更快"""
+    print("\n[测试] 落选者历史 EWMA 更低时对冲一次")
+    print("-" * 50)
+    latency = EndpointLatency(db=Database(os.path.join(tempfile.mkdtemp(), "t.db")))
+    latency.observe(HEDGE, 100.0)
+    run_hedged_once(latency)
+    primary, hedge = latency.ewma(PRIMARY), latency.ewma(HEDGE)
+    order = [ep.model for ep in latency.ordered([HEDGE, PRIMARY])]
+    return check(
+        "排序",
+        order[0] == PRIMARY.model and hedge >= primary,
+        f"{order}，主 {primary:.0f}ms，对冲 {hedge:.0f}ms",
+    )
+
+
+def main():
+    print("=" * 60)
+    print("对冲请求端点排序测试")
+    print("=" * 60)
+    get_params().set("AI_HEDGE_DELAY_SECONDS", 0.2, source="control")
+    results = [test_unmeasured_loser(), test_fast_history_loser()]
+    print(f"\n{'='*60}")
+    print(f"测试完成: {sum(results)}/{len(results)} 通过")
+    print(f"{'='*60}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+测试 AI 条目校验（离线）
+
+用法：
+    python tools/test_item_filter.py
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.text_provider.item_filter import ItemFilter
+
+# (文本, 期望的拒绝原因；合格为空串)
+CASES = [
+    ("记得起来喝杯水", ""),
+    ("休息一下眼睛吧", ""),
+    ("圆周率是3.14哦", ""),
+    ("看看 https://example.com 吧", "url"),
+    ("打开www.baidu.com看看", "url"),
+    # 裸域名后紧跟中文：\b 在 ASCII 与中文之间不成立，必须也能拦住
+    ("访问example.com了解更多", "url"),
+    ("来baidu.cn看看吧", "url"),
+    ("去看看github.io吧", "url"),
+    ("新站点shop.xyz上线了", "url"),
+    ("今天也要加油@朋友", "mention"),
+    ("今天也要加油#打卡", "hashtag"),
+    ("今天也要加油😀呀", "emoji"),
+    ("今天也要\n加油呀", "newline"),
+    ("好", "too_short"),
+    ("这是一句特别特别特别特别特别特别特别特别长的话，超过了长度上限", "too_long"),
+]
+
+
+def main():
+    print("=" * 60)
+    print("AI 条目校验测试")
+    print("=" * 60)
+    item_filter = ItemFilter()
+    failed = 0
+    for text, expected in CASES:
+        reason = item_filter.check(text)
+        ok = reason == expected
+        failed += not ok
+        note = "" if ok else f"（期望 {expected or '合格'}）"
+        print(f"{'✅' if ok else '❌'} {text!r}: {reason or '合格'}{note}")
+    print(f"\n{'='*60}")
+    print(f"测试完成: {len(CASES) - failed}/{len(CASES)} 通过")
+    print(f"{'='*60}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+运行时参数调整工具（连接正在运行的程序的本地控制套接字，无需重启）
+
+用法：
+    python tools/tune.py [list]                       查看全部参数：当前值、来源、范围
+    python tools/tune.py set 名称 值 [--persist]      覆盖一个参数（--persist 同时写入设置，重启后仍生效）
+    python tools/tune.py reset 名称 [--persist]       撤销覆盖（--persist 同时删除设置中的覆盖）
+
+示例：
+    python tools/tune.py set SPAWN_INTERVAL 1200
+    python tools/tune.py set FLOAT_SPEED 16 --persist
+    python tools/tune.py reset SPAWN_INTERVAL
+
+未运行程序时也可以用环境变量 FLOAT_WORDS_<名称> 覆盖（启动时读取）。
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtNetwork import QLocalSocket
+
+from core.control_server import control_server_name
+
+
+def _request(msg: dict, timeout_ms: int = 3000) -> dict:
+    """发送一条命令并等待一行回复"""
+    sock = QLocalSocket()
+    sock.connectToServer(control_server_name())
+    if not sock.waitForConnected(timeout_ms):
+        raise ConnectionError(f"无法连接（程序未运行或未启用 CONTROL_SOCKET_ENABLED）: {sock.errorString()}")
+    sock.write((json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8"))
+    sock.flush()
+    data = b""
+    while b"\n" not in data:
+        if not sock.waitForReadyRead(timeout_ms):
+            raise TimeoutError("等待回复超时")
+        data += bytes(sock.readAll())
+    sock.disconnectFromServer()
+    return json.loads(data.split(b"\n", 1)[0])
+
+
+def show_params():
+    reply = _request({"op": "list"})
+    print(f"{'名称':<32}{'当前值':>10}{'默认':>10}  {'来源':<9}{'范围':<18}说明")
+    print("-" * 100)
+    for p in reply.get("params", []):
+        mark = "" if p["live"] else "（重启生效）"
+        rng = f"[{p['min']:g}, {p['max']:g}]"
+        print(f"{p['name']:<32}{p['value']:>10}{p['default']:>10}  {p['source']:<9}{rng:<18}{p['doc']}{mark}")
+
+
+def main():
+    app = QCoreApplication(sys.argv)  # noqa: F841 (QLocalSocket 需要应用对象)
+    args = [a for a in sys.argv[1:] if a != "--persist"]
+    persist = "--persist" in sys.argv[1:]
+    cmd = args[0] if args else "list"
+    try:
+        if cmd == "list":
+            show_params()
+            return 0
+        if cmd == "set" and len(args) == 3:
+            reply = _request({"op": "set", "name": args[1], "value": args[2], "persist": persist})
+        elif cmd == "reset" and len(args) == 2:
+            reply = _request({"op": "reset", "name": args[1], "persist": persist})
+        else:
+            print(__doc__)
+            return 1
+    except (ConnectionError, TimeoutError) as e:
+        print(f"错误: {e}")
+        return 2
+    if not reply.get("ok"):
+        print(f"错误: {reply.get('error')}")
+        return 1
+    note = "" if reply.get("live", True) else "（下次启动生效）"
+    print(f"{args[1]} = {reply['value']}{note}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,16 @@
 """
 漂浮文字窗口组件
+
+外观与运动参数可以由调用方给定（make_float_spec 生成，渲染进程按它创建窗口），
+未给定的按原来的方式随机选取 / 从设置读取
 """
 import random
 from PyQt6.QtWidgets import QWidget, QLabel
 from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from PyQt6.QtWidgets import QGraphicsDropShadowEffect, QApplication
-from config import DECOR_ICONS, FONT_NAME, FONT_SIZE, LIFETIME
+from config import DECOR_ICONS, FONT_NAME
+from utils.runtime_params import get_params, param
 from utils.theme import get_theme
 from core import settings as app_settings
 
@@ -17,15 +21,36 @@ class FloatText(QWidget):
     # 窗口关闭信号
     closed = pyqtSignal(object)  # 传递自身引用
     
-    def __init__(self, text):
+    def __init__(self, text, theme=None, icon=None, anchor=None, speed_ms=None, lifetime=None, font_size=None):
+        """
+        :param theme: (文字颜色, 背景颜色)，默认从当前主题随机选
+        :param icon: 装饰图标，默认从 DECOR_ICONS 随机选
+        :param anchor: 初始位置在可用范围内的比例 (0~1, 0~1)，默认随机
+        :param speed_ms: 漂浮定时器间隔，默认读取设置
+        :param lifetime: 显示多久后淡出（ms），默认运行时参数 LIFETIME
+        :param font_size: 字号，默认运行时参数 FONT_SIZE
+        """
         super().__init__()
         self.setup_window()
-        self.setup_label(text)
-        self.setup_icon()
+        self.setup_label(text, theme, font_size)
+        self.setup_icon(icon)
         self.setup_shadow()
-        self.setup_position()
-        self.setup_animation()
+        self.setup_position(anchor)
+        self.setup_animation(speed_ms, lifetime)
         self.show()
+
+    @classmethod
+    def from_spec(cls, spec):
+        """按 make_float_spec() 的结果创建"""
+        return cls(
+            spec.get("text", ""),
+            theme=spec.get("theme"),
+            icon=spec.get("icon"),
+            anchor=spec.get("anchor"),
+            speed_ms=spec.get("speed_ms"),
+            lifetime=spec.get("lifetime"),
+            font_size=spec.get("font_size"),
+        )
     
     def setup_window(self):
         """设置窗口属性"""
@@ -38,11 +63,11 @@ class FloatText(QWidget):
         # 设置关闭时自动删除，确保对象被销毁
         self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, False)  # 由 controller 控制
     
-    def setup_label(self, text):
+    def setup_label(self, text, theme=None, font_size=None):
         """设置文字标签"""
         self.label = QLabel(text, self)
-        self.label.setFont(QFont(FONT_NAME, FONT_SIZE))
-        text_color, bg_color = random.choice(get_theme())
+        self.label.setFont(QFont(FONT_NAME, int(font_size or param("FONT_SIZE"))))
+        text_color, bg_color = theme or random.choice(get_theme())
         self.label.setStyleSheet(f"""
             color: {text_color};
             background-color: {bg_color};
@@ -52,9 +77,9 @@ class FloatText(QWidget):
         self.label.adjustSize()
         self.resize(self.label.size())
     
-    def setup_icon(self):
+    def setup_icon(self, icon=None):
         """设置装饰图标"""
-        icon = random.choice(DECOR_ICONS)
+        icon = icon or random.choice(DECOR_ICONS)
         self.icon_label = QLabel(icon, self)
         self.icon_label.setFont(QFont(FONT_NAME, 12))
         self.icon_label.setStyleSheet("background: transparent;")
@@ -72,8 +97,8 @@ class FloatText(QWidget):
         shadow.setColor(QColor(0, 0, 0, 100))
         self.label.setGraphicsEffect(shadow)
     
-    def setup_position(self):
-        """设置初始位置"""
+    def setup_position(self, anchor=None):
+        """设置初始位置（屏幕下半部分的可用范围内）"""
         screen = QApplication.primaryScreen().availableGeometry()
         sw, sh = screen.width(), screen.height()
         w, h = self.width(), self.height()
@@ -81,9 +106,13 @@ class FloatText(QWidget):
         x_max = max(x_min, sw - w - 20)
         y_min = int(sh * 0.55)
         y_max = max(y_min, sh - h - 20)
-        self.move(random.randint(x_min, x_max), random.randint(y_min, y_max))
+        if anchor:
+            fx, fy = (min(1.0, max(0.0, float(v))) for v in anchor)
+            self.move(x_min + int((x_max - x_min) * fx), y_min + int((y_max - y_min) * fy))
+        else:
+            self.move(random.randint(x_min, x_max), random.randint(y_min, y_max))
     
-    def setup_animation(self):
+    def setup_animation(self, speed_ms=None, lifetime=None):
         """设置动画效果"""
         # 淡入动画
         self.anim_in = QPropertyAnimation(self, b"windowOpacity")
@@ -100,10 +129,15 @@ class FloatText(QWidget):
         self.timer = QTimer()
         self.timer.timeout.connect(self.float_up)
         # 速度从 settings 读取（档位映射为 ms），新窗口立即生效
-        self.timer.start(app_settings.get_float_speed_ms())
+        self.timer.start(int(speed_ms or frame_interval_ms()))
         
         # 淡出定时器
-        QTimer.singleShot(LIFETIME, self.fade_out)
+        QTimer.singleShot(int(lifetime or param("LIFETIME")), self.fade_out)
+
+    def set_speed(self, speed_ms):
+        """修改漂浮定时器间隔（已显示的窗口立即生效）"""
+        if self.timer.isActive():
+            self.timer.setInterval(int(speed_ms))
     
     def float_up(self):
         """漂浮动画"""
@@ -149,3 +183,23 @@ class FloatText(QWidget):
             self.anim_out.stop()
         # 立即关闭（会触发 closeEvent）
         self.close()
+
+
+def frame_interval_ms():
+    """漂浮动画帧间隔：运行时参数 FLOAT_SPEED 被覆盖时优先，否则按速度档位"""
+    if get_params().is_overridden("FLOAT_SPEED"):
+        return param("FLOAT_SPEED")
+    return app_settings.snapshot().float_speed_ms
+
+
+def make_float_spec(text):
+    """一个漂浮文字的完整参数（可 JSON 序列化，发送给渲染进程）"""
+    return {
+        "text": text,
+        "theme": list(random.choice(get_theme())),
+        "icon": random.choice(DECOR_ICONS),
+        "anchor": [random.random(), random.random()],
+        "speed_ms": frame_interval_ms(),
+        "lifetime": param("LIFETIME"),
+        "font_size": param("FONT_SIZE"),
+    }
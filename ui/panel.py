@@ -3,7 +3,7 @@
 
 包含两个 Tab：
 - Home：首页（欢迎、快速操作、状态）
-- Settings：设置页
+- Settings：设置页（首次切换到该页时才创建）
 """
 
 from __future__ import annotations
@@ -24,7 +24,6 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QIcon, QPixmap, QFont
 
-from ui.settings_widget import SettingsWidget
 from core import settings as app_settings
 from utils.resources import get_resource_path, get_icon_path
 
@@ -35,6 +34,7 @@ class HomeTab(QWidget):
     def __init__(self, controller, parent=None):
         super().__init__(parent)
         self.controller = controller
+        self._texts_stats: dict = {}  # 最近一次本地文本重载（含失败 / 取消）
         self._setup_ui()
 
     def _setup_ui(self):
@@ -117,11 +117,16 @@ class HomeTab(QWidget):
         self.ai_status_label = QLabel()
         self.city_weather_label = QLabel()
         self.idle_status_label = QLabel()
+        self.texts_label = QLabel()
+        self.tasks_label = QLabel()
+        self.tasks_label.setWordWrap(True)
         
         status_layout.addWidget(self.text_source_label)
         status_layout.addWidget(self.ai_status_label)
         status_layout.addWidget(self.city_weather_label)
         status_layout.addWidget(self.idle_status_label)
+        status_layout.addWidget(self.texts_label)
+        status_layout.addWidget(self.tasks_label)
         
         root.addWidget(self.status_frame)
 
@@ -139,6 +144,10 @@ class HomeTab(QWidget):
             self.controller.stateChanged.connect(self._update_status)
             self.controller.providerChanged.connect(self._update_status)
             self.controller.aiPreparingChanged.connect(self._update_status)
+            self.controller.breakerChanged.connect(self._update_status)
+            self.controller.tasksChanged.connect(self._update_tasks)
+            self.controller.textsReloaded.connect(self._update_texts)
+        app_settings.get_notifier().settingsChanged.connect(self._update_status)
         
         self._update_status()
 
@@ -169,17 +178,16 @@ class HomeTab(QWidget):
             self.start_pause_btn.setText("开始显示")
             self.start_pause_btn.setStyleSheet("font-size: 14px; background: #51cf66; color: white;")
         
+        # 设置快照：只取一次引用，下面都是属性访问
+        s = app_settings.snapshot()
+
         # 文本来源
-        text_source = app_settings.get_text_source()
-        self.text_source_label.setText(f"📝 文本来源: {text_source}")
+        self.text_source_label.setText(f"📝 文本来源: {s.text_source}")
         
         # AI 状态
-        ai_enabled = app_settings.get_ai_enabled()
-        env_key = (os.getenv("DEEPSEEK_API_KEY", "") or "").strip()
-        settings_key = app_settings.get_deepseek_api_key()
-        has_key = bool(env_key or settings_key)
+        has_key = bool(s.api_key)
         
-        if ai_enabled:
+        if s.ai_enabled:
             if has_key:
                 # 检查 AI 是否正在准备中
                 preparing = False
@@ -188,8 +196,16 @@ class HomeTab(QWidget):
                     if provider and hasattr(provider, 'preparing'):
                         preparing = provider.preparing
                 
+                breaker = self.controller.ai_breaker_state()
                 if preparing:
                     self.ai_status_label.setText("🤖 AI: 已启用，正在准备中...")
+                elif breaker["state"] == "open":
+                    self.ai_status_label.setText(
+                        f"🤖 AI: 服务暂不可用（连续失败 {breaker['failures']} 次），"
+                        f"{breaker['retry_in']:.0f} 秒后自动重试"
+                    )
+                elif breaker["state"] == "half_open":
+                    self.ai_status_label.setText("🤖 AI: 服务恢复检测中...")
                 else:
                     self.ai_status_label.setText("🤖 AI: 已启用，Key 已配置")
             else:
@@ -198,22 +214,74 @@ class HomeTab(QWidget):
             self.ai_status_label.setText("🤖 AI: 未启用")
         
         # 城市/天气
-        city = app_settings.get_city()
-        weather_enabled = app_settings.get_weather_enabled()
-        if city:
-            weather_text = "已启用" if weather_enabled else "未启用"
-            self.city_weather_label.setText(f"🌍 城市: {city} | 天气: {weather_text}")
+        if s.city:
+            weather_text = "已启用" if s.weather_enabled else "未启用"
+            self.city_weather_label.setText(f"🌍 城市: {s.city} | 天气: {weather_text}")
         else:
             self.city_weather_label.setText("🌍 城市: 未设置 | 天气: 未启用")
         
         # 空闲检测
-        idle_only = app_settings.get_idle_only()
-        idle_threshold = app_settings.get_idle_threshold_seconds()
-        if idle_only:
-            self.idle_status_label.setText(f"⏱️ 空闲检测: 已启用（阈值: {idle_threshold} 秒）")
+        if s.idle_only:
+            self.idle_status_label.setText(f"⏱️ 空闲检测: 已启用（阈值: {s.idle_threshold_seconds} 秒）")
         else:
             self.idle_status_label.setText("⏱️ 空闲检测: 未启用")
 
+        self._update_texts()
+        self._update_tasks()
+
+    def _update_texts(self, _stats: dict | None = None):
+        """本地文本：条数与最近一次重载（变化行数、耗时）"""
+        if not self.controller:
+            return
+        if _stats:
+            self._texts_stats = _stats
+        stats = self._texts_stats or self.controller.local_provider.last_reload
+        if not stats:
+            self.texts_label.setText("📄 本地文本: 未重载")
+            return
+        if stats.get("mode") in ("error", "cancelled"):
+            result = "失败" if stats["mode"] == "error" else "已取消"
+            self.texts_label.setText(f"📄 本地文本: 最近重载{result}")
+            return
+        self.texts_label.setText(
+            f"📄 本地文本: {stats.get('total', 0)} 条，最近重载 +{stats.get('added', 0)} -{stats.get('removed', 0)} 行"
+            f"（{stats.get('ms', 0.0):.0f} ms）"
+        )
+
+    _TASK_NAMES = {
+        "ai-prepare": "准备 AI 文本",
+        "ai-refresh": "刷新 AI 文本",
+        "ai-pregen": "预生成明日文本",
+        "texts-reload": "重载本地文本",
+        "pool-compact": "整理文本池",
+    }
+    _TASK_STATES = {"pending": "排队中", "running": "进行中", "done": "完成", "failed": "失败", "cancelled": "已取消"}
+
+    def _update_tasks(self):
+        """后台任务：进行中 / 排队的任务，以及最近结束的一个"""
+        if not self.controller:
+            return
+        tasks = self.controller.task_states()
+        active = [t for t in tasks if t["state"] in ("running", "pending")]
+        shown = active or tasks[:1]
+        if not shown:
+            self.tasks_label.setText("⚙️ 后台任务: 无")
+            return
+        parts = []
+        for t in shown:
+            name = self._TASK_NAMES.get(t["name"], t["name"])
+            state = self._TASK_STATES.get(t["state"], t["state"])
+            if t["state"] == "running" and t["cancel_requested"]:
+                state = "取消中"
+            text = f"{name}（{state}"
+            if t["state"] != "pending":
+                text += f"，{t['elapsed']:.0f} 秒"
+            if t["error"]:
+                text += f"，{t['error']}"
+            parts.append(text + "）")
+        label = "⚙️ 后台任务: " if active else "⚙️ 最近任务: "
+        self.tasks_label.setText(label + "；".join(parts))
+
 
 class ControlPanel(QDialog):
     """控制面板（统一入口窗口）"""
@@ -247,10 +315,6 @@ class ControlPanel(QDialog):
         self._center_window()
         
         self._setup_ui()
-        
-        # 连接设置变更信号
-        if self.settings_widget:
-            self.settings_widget.settingsChanged.connect(self._on_settings_changed)
     
     def _center_window(self):
         """将窗口居中显示"""
@@ -275,9 +339,10 @@ class ControlPanel(QDialog):
         self.home_tab = HomeTab(self.controller, self)
         self.tabs.addTab(self.home_tab, "首页")
         
-        # Settings Tab
-        self.settings_widget = SettingsWidget(self)
-        self.tabs.addTab(self.settings_widget, "设置")
+        # Settings Tab：先放占位页，首次切换到该页时再创建设置页
+        self.settings_widget = None
+        self.tabs.addTab(QWidget(), "设置")
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         
         root.addWidget(self.tabs)
 
@@ -293,18 +358,33 @@ class ControlPanel(QDialog):
         
         root.addLayout(bottom_layout)
 
+    def _on_tab_changed(self, index: int):
+        if index == 1:
+            self._ensure_settings_widget()
+
+    def _ensure_settings_widget(self):
+        """创建设置页（替换占位页）"""
+        if self.settings_widget is not None:
+            return
+        from ui.settings_widget import SettingsWidget
+
+        self.settings_widget = SettingsWidget(self)
+        # 连接设置变更信号
+        self.settings_widget.settingsChanged.connect(self._on_settings_changed)
+        placeholder, current = self.tabs.widget(1), self.tabs.currentIndex()
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(1)
+        self.tabs.insertTab(1, self.settings_widget, "设置")
+        self.tabs.setCurrentIndex(current)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+
     def _on_show_on_startup_toggled(self, checked: bool):
         """启动时显示复选框改变"""
         app_settings.set_show_panel_on_startup(checked)
 
     def _on_settings_changed(self, changed_keys: list):
-        """设置变更回调"""
-        if self.controller:
-            try:
-                self.controller.apply_settings(changed_keys)
-            except Exception as e:
-                print(f"[Panel] 应用设置失败: {e}")
-        
+        """设置变更回调（controller 已经通过 settingsChanged 通知应用了设置）"""
         # 更新首页状态
         if self.home_tab:
             self.home_tab._update_status()
@@ -330,6 +410,7 @@ class ControlPanel(QDialog):
         self.show()
         self.activateWindow()
         self.raise_()
+        self._ensure_settings_widget()
         self.tabs.setCurrentIndex(1)
     
     def _ensure_visible(self):
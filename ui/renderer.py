@@ -0,0 +1,250 @@
+"""
+独立渲染进程（可选，RENDERER_PROCESS=True 时启用）
+
+漂浮文字窗口与它们的动画定时器放到一个只做渲染的子进程中；
+打开控制面板/设置、构建托盘菜单、读写 QSettings 都发生在控制进程的事件循环里，不再让漂浮文字卡顿。
+
+- 控制进程：RendererProcess 监听一个 QLocalServer，用 QProcess 启动 `main.py --renderer <name>`
+- 渲染进程：run_renderer() 连接该本地套接字，按收到的参数创建 FloatText
+- 协议为一行一个 JSON：
+    控制 → 渲染：{"op": "spawn", "spec": {...}} / {"op": "speed", "ms": 帧间隔} / {"op": "clear"} / {"op": "quit"}
+    渲染 → 控制：{"ev": "count", "n": 当前窗口数}
+- 渲染进程未连接或崩溃期间，控制进程照常在本进程内创建窗口；崩溃后按退避自动重启
+- 控制进程退出（连接断开）时渲染进程随之退出
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Any, Dict, Optional, Set
+
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+import config as _config
+from utils.resilience import backoff_delay
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+RENDERER_RESTART_MAX_SECONDS = float(getattr(_config, "RENDERER_RESTART_MAX_SECONDS", 30))
+
+
+def _encode(obj: Dict[str, Any]) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _renderer_command(server_name: str) -> tuple[str, list[str]]:
+    """启动渲染进程的命令（打包后可执行文件本身即入口）"""
+    if getattr(sys, "frozen", False):
+        return sys.executable, ["--renderer", server_name]
+    main_py = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    return sys.executable, [main_py, "--renderer", server_name]
+
+
+class RendererProcess(QObject):
+    """控制进程一侧：管理渲染子进程并发送生成命令"""
+
+    countChanged = pyqtSignal(int)
+    connectedChanged = pyqtSignal(bool)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._name = f"float_words_renderer_{os.getpid()}"
+        self._server = QLocalServer(self)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._socket: Optional[QLocalSocket] = None
+        self._process: Optional[QProcess] = None
+        self._buffer = b""
+        self._count = 0
+        self._crashes = 0
+        self._stopping = False
+        self._restart_timer = QTimer(self)
+        self._restart_timer.setSingleShot(True)
+        self._restart_timer.timeout.connect(self._launch)
+
+    @property
+    def connected(self) -> bool:
+        return self._socket is not None
+
+    @property
+    def count(self) -> int:
+        """渲染进程中当前的漂浮窗口数（未连接时为 0）"""
+        return self._count if self._socket is not None else 0
+
+    # ---------- 生命周期 ----------
+
+    def start(self) -> bool:
+        QLocalServer.removeServer(self._name)
+        if not self._server.listen(self._name):
+            print(f"[Renderer] 本地套接字监听失败: {self._server.errorString()}")
+            return False
+        self._launch()
+        return True
+
+    def stop(self, timeout_ms: int = 1500) -> None:
+        """通知渲染进程退出，超时则强制结束"""
+        self._stopping = True
+        self._restart_timer.stop()
+        self._send({"op": "quit"})
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            sock.flush()
+            # 退出时不再需要断开通知（此后对象可能已被销毁）
+            sock.disconnected.disconnect()
+            sock.readyRead.disconnect()
+        proc = self._process
+        if proc is not None and proc.state() != QProcess.ProcessState.NotRunning:
+            if not proc.waitForFinished(timeout_ms):
+                proc.kill()
+                proc.waitForFinished(500)
+        self._server.close()
+
+    def _launch(self) -> None:
+        if self._stopping:
+            return
+        program, args = _renderer_command(self._name)
+        proc = QProcess(self)
+        proc.setProcessChannelMode(QProcess.ProcessChannelMode.ForwardedChannels)
+        proc.finished.connect(lambda code, _status, p=proc: self._on_finished(p, code))
+        proc.start(program, args)
+        self._process = proc
+        if DEBUG:
+            print(f"[Renderer] 启动渲染进程: {program} {' '.join(args)}")
+
+    def _on_new_connection(self) -> None:
+        sock = self._server.nextPendingConnection()
+        if sock is None:
+            return
+        if self._socket is not None:
+            self._socket.abort()
+        self._socket = sock
+        self._buffer = b""
+        self._count = 0
+        sock.readyRead.connect(self._on_ready_read)
+        sock.disconnected.connect(lambda s=sock: self._on_disconnected(s))
+        if DEBUG:
+            print("[Renderer] 渲染进程已连接")
+        self.connectedChanged.emit(True)
+
+    def _on_disconnected(self, sock: QLocalSocket) -> None:
+        if self._socket is not sock:
+            return
+        self._socket = None
+        self._count = 0
+        sock.deleteLater()
+        self.connectedChanged.emit(False)
+
+    def _on_finished(self, proc: QProcess, code: int) -> None:
+        if proc is not self._process:
+            return
+        self._process = None
+        if self._stopping:
+            return
+        self._crashes += 1
+        delay = backoff_delay(self._crashes, 1.0, RENDERER_RESTART_MAX_SECONDS, floor=0.5)
+        print(f"[Renderer] 渲染进程退出（code={code}），{delay:.1f}s 后重启；期间在本进程内显示")
+        self._restart_timer.start(int(delay * 1000))
+
+    # ---------- 命令 ----------
+
+    def spawn(self, spec: Dict[str, Any]) -> bool:
+        """发送一个生成命令；未连接时返回 False（调用方在本进程内显示）"""
+        if not self._send({"op": "spawn", "spec": spec}):
+            return False
+        # 先按已发送计数，渲染进程回报后校正
+        self._count += 1
+        return True
+
+    def clear(self) -> None:
+        self._send({"op": "clear"})
+
+    def set_speed(self, ms: int) -> None:
+        """已显示的窗口换成新的帧间隔"""
+        self._send({"op": "speed", "ms": int(ms)})
+
+    def _send(self, obj: Dict[str, Any]) -> bool:
+        sock = self._socket
+        if sock is None:
+            return False
+        return sock.write(_encode(obj)) > 0
+
+    def _on_ready_read(self) -> None:
+        sock = self._socket
+        if sock is None:
+            return
+        self._buffer += bytes(sock.readAll())
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if msg.get("ev") == "count":
+                self._count = int(msg.get("n", 0))
+                self._crashes = 0
+                self.countChanged.emit(self._count)
+
+
+# ---------- 渲染进程 ----------
+
+
+def run_renderer(server_name: str) -> int:
+    """渲染进程入口：只有漂浮窗口，没有托盘/面板/文本生成"""
+    from PyQt6.QtWidgets import QApplication
+
+    from ui.float_text import FloatText
+
+    app = QApplication([sys.argv[0]])
+    app.setQuitOnLastWindowClosed(False)
+    windows: Set[FloatText] = set()
+    sock = QLocalSocket()
+    buffer = [b""]
+
+    def report() -> None:
+        sock.write(_encode({"ev": "count", "n": len(windows)}))
+
+    def on_closed(window) -> None:
+        windows.discard(window)
+        window.deleteLater()
+        report()
+
+    def handle(msg: Dict[str, Any]) -> None:
+        op = msg.get("op")
+        if op == "spawn":
+            try:
+                window = FloatText.from_spec(msg.get("spec") or {})
+            except Exception as e:
+                print(f"[Renderer] 生成窗口失败: {e}")
+                return
+            window.closed.connect(on_closed)
+            windows.add(window)
+            report()
+        elif op == "speed":
+            for window in list(windows):
+                window.set_speed(int(msg.get("ms") or 40))
+        elif op == "clear":
+            for window in list(windows):
+                window.force_close()
+        elif op == "quit":
+            for window in list(windows):
+                window.force_close()
+            app.quit()
+
+    def on_ready_read() -> None:
+        buffer[0] += bytes(sock.readAll())
+        *lines, buffer[0] = buffer[0].split(b"\n")
+        for line in lines:
+            try:
+                handle(json.loads(line))
+            except ValueError:
+                continue
+
+    sock.readyRead.connect(on_ready_read)
+    # 控制进程退出（或崩溃）时连接断开，渲染进程随之退出
+    sock.disconnected.connect(app.quit)
+    sock.connectToServer(server_name)
+    if not sock.waitForConnected(5000):
+        print(f"[Renderer] 无法连接控制进程: {sock.errorString()}")
+        return 1
+    return app.exec()
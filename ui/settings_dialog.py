@@ -60,7 +60,7 @@ class SettingsDialog(QDialog):
 
         # text source
         self.text_source = QComboBox()
-        self.text_source.addItems(["auto", "local", "ai"])
+        self.text_source.addItems(["auto", "local", "ai", "mix"])
         form.addRow(QLabel("文本来源"), self.text_source)
 
         # api key
@@ -157,74 +157,32 @@ class SettingsDialog(QDialog):
         self.user_prompt.setPlainText(app_settings.get_user_custom_prompt())
 
     def _on_save(self):
-        changed: List[str] = []
-
-        # AI enabled
-        if app_settings.get_ai_enabled() != self.ai_enabled.isChecked():
-            app_settings.set_ai_enabled(self.ai_enabled.isChecked())
-            changed.append(app_settings.Keys.AI_ENABLED)
-
-        # text source
         src = self.text_source.currentText().strip().lower()
-        if app_settings.get_text_source() != src:
-            app_settings.set_text_source(src)
-            changed.append(app_settings.Keys.AI_TEXT_SOURCE)
-
-        # api key（允许为空）
         key = (self.api_key.text() or "").strip()
-        if app_settings.get_deepseek_api_key() != key:
-            app_settings.set_deepseek_api_key(key)
-            changed.append(app_settings.Keys.AI_DEEPSEEK_API_KEY)
-
-        # city
-        city = (self.city.text() or "").strip()
-        if app_settings.get_city() != city:
-            app_settings.set_city(city)
-            changed.append(app_settings.Keys.CONTEXT_CITY)
-
-        # weather enabled
-        if app_settings.get_weather_enabled() != self.weather_enabled.isChecked():
-            app_settings.set_weather_enabled(self.weather_enabled.isChecked())
-            changed.append(app_settings.Keys.CONTEXT_WEATHER_ENABLED)
 
-        # idle only
-        if app_settings.get_idle_only() != self.idle_only.isChecked():
-            app_settings.set_idle_only(self.idle_only.isChecked())
-            changed.append(app_settings.Keys.IDLE_ENABLED)
-
-        # idle threshold
-        th = int(self.idle_threshold.value())
-        if app_settings.get_idle_threshold_seconds() != th:
-            app_settings.set_idle_threshold_seconds(th)
-            changed.append(app_settings.Keys.IDLE_THRESHOLD_SECONDS)
-
-        # float density
-        density = self.float_density.currentText().strip()
-        if app_settings.get_float_density_label() != density:
-            app_settings.set_float_density_label(density)
-            changed.append(app_settings.Keys.UI_FLOAT_DENSITY)
-
-        # float speed
-        speed = self.float_speed.currentText().strip()
-        if app_settings.get_float_speed_label() != speed:
-            app_settings.set_float_speed_label(speed)
-            changed.append(app_settings.Keys.UI_FLOAT_SPEED)
-
-        # salutation
-        salutation = (self.salutation.text() or "").strip()
-        if app_settings.get_salutation() != salutation:
-            app_settings.set_salutation(salutation)
-            changed.append(app_settings.Keys.PROMPT_SALUTATION)
-
-        # user custom prompt
-        user_prompt = (self.user_prompt.toPlainText() or "").strip()
-        if app_settings.get_user_custom_prompt() != user_prompt:
-            app_settings.set_user_custom_prompt(user_prompt)
-            changed.append(app_settings.Keys.PROMPT_USER_HINT)
+        # 整批校验、一次写入；只通知一次（包含全部变化的键）
+        tx = app_settings.transaction().set_many({
+            app_settings.Keys.AI_ENABLED: self.ai_enabled.isChecked(),
+            app_settings.Keys.AI_TEXT_SOURCE: src,
+            app_settings.Keys.AI_DEEPSEEK_API_KEY: key,  # 允许为空
+            app_settings.Keys.CONTEXT_CITY: self.city.text(),
+            app_settings.Keys.CONTEXT_WEATHER_ENABLED: self.weather_enabled.isChecked(),
+            app_settings.Keys.IDLE_ENABLED: self.idle_only.isChecked(),
+            app_settings.Keys.IDLE_THRESHOLD_SECONDS: int(self.idle_threshold.value()),
+            app_settings.Keys.UI_FLOAT_DENSITY: self.float_density.currentText(),
+            app_settings.Keys.UI_FLOAT_SPEED: self.float_speed.currentText(),
+            app_settings.Keys.PROMPT_SALUTATION: self.salutation.text(),
+            app_settings.Keys.PROMPT_USER_HINT: self.user_prompt.toPlainText(),
+        })
+        try:
+            changed: List[str] = tx.commit()
+        except app_settings.SettingsError as e:
+            QMessageBox.warning(self, "设置无效", f"设置未保存：\n{e}")
+            return
 
         # 轻量校验提示：启用 AI 且使用 ai/auto 时，没有 key（env+settings 都为空）
         env_key = (os.getenv("DEEPSEEK_API_KEY", "") or "").strip()
-        if self.ai_enabled.isChecked() and src in ("auto", "ai") and (not env_key) and (not key):
+        if self.ai_enabled.isChecked() and src in ("auto", "ai", "mix") and (not env_key) and (not key):
             QMessageBox.information(
                 self,
                 "提示",
@@ -39,6 +39,7 @@ class TrayIcon(QSystemTrayIcon):
         self.controller = controller
         self._settings_dialog: SettingsDialog | None = None
         self._panel = None  # ControlPanel 实例
+        self._panel_factory = None  # 首次打开面板时创建 ControlPanel
         
         # 设置图标
         self._setup_icon()
@@ -50,6 +51,7 @@ class TrayIcon(QSystemTrayIcon):
         self.controller.stateChanged.connect(self._on_state_changed)
         self.controller.providerChanged.connect(self._on_provider_changed)
         self.controller.aiPreparingChanged.connect(self._on_ai_preparing_changed)
+        self.controller.breakerChanged.connect(self._on_breaker_changed)
         
         # 初始状态
         self._update_menu_state()
@@ -129,6 +131,12 @@ class TrayIcon(QSystemTrayIcon):
         self.refresh_ai_action = QAction("刷新今日 AI 文本", self)
         self.refresh_ai_action.triggered.connect(self._on_refresh_ai)
         menu.addAction(self.refresh_ai_action)
+
+        # AI 服务状态（熔断时显示，只读）
+        self.ai_service_action = QAction("", self)
+        self.ai_service_action.setEnabled(False)
+        self.ai_service_action.setVisible(False)
+        menu.addAction(self.ai_service_action)
         
         # 分隔线
         menu.addSeparator()
@@ -151,36 +159,44 @@ class TrayIcon(QSystemTrayIcon):
         exit_action.triggered.connect(self.controller.exit)
         menu.addAction(exit_action)
         
+        # 打开菜单时刷新（熔断剩余时间等）
+        menu.aboutToShow.connect(self._update_menu_state)
         self.setContextMenu(menu)
     
     def set_panel(self, panel):
         """设置控制面板实例"""
         self._panel = panel
+
+    def set_panel_factory(self, factory):
+        """设置控制面板的创建函数（首次打开面板时才创建）"""
+        self._panel_factory = factory
+
+    def _ensure_panel(self):
+        if self._panel is None and self._panel_factory is not None:
+            self._panel = self._panel_factory()
+        return self._panel
     
     def _open_panel(self):
         """打开控制面板（首页）"""
-        if self._panel:
+        if self._ensure_panel():
             self._panel.show_home()
         else:
             # 如果没有面板，回退到打开设置对话框
             self._open_settings()
     
     def _on_idle_only_toggled(self, checked: bool):
-        """空闲显示开关切换"""
-        self.controller.idle_only = checked
-        # 写入 settings（可选但更符合“用户设置”预期）
+        """空闲显示开关切换（写入 settings，controller 经 settingsChanged 生效）"""
         try:
             app_settings.set_idle_only(checked)
         except Exception:
-            pass
+            self.controller.idle_only = checked
 
     def _on_ai_toggled(self, checked: bool):
-        """AI 文本开关"""
-        self.controller.set_ai_enabled(checked)
+        """AI 文本开关（写入 settings，controller 经 settingsChanged 生效）"""
         try:
             app_settings.set_ai_enabled(checked)
         except Exception:
-            pass
+            self.controller.set_ai_enabled(checked)
 
     def _on_refresh_ai(self):
         """刷新今日 AI 文本"""
@@ -189,7 +205,7 @@ class TrayIcon(QSystemTrayIcon):
     def _open_settings(self):
         """打开设置窗口"""
         # 优先使用控制面板
-        if self._panel:
+        if self._ensure_panel():
             self._panel.show_settings()
         else:
             # 回退到旧版设置对话框
@@ -204,9 +220,8 @@ class TrayIcon(QSystemTrayIcon):
         from core import settings as app_settings
         
         try:
-            self.controller.apply_settings(changed_keys)
-            
-            # 如果城市或天气设置变更，提示用户刷新今日 AI 文本
+            # controller 已经通过 settingsChanged 通知应用了设置，这里只做提示
+            # 城市或天气设置变更：AI 文本会按新上下文自动切换，这里只做提示
             keys_set = set(changed_keys)
             context_changed = (
                 app_settings.Keys.CONTEXT_CITY in keys_set or
@@ -217,8 +232,8 @@ class TrayIcon(QSystemTrayIcon):
                 QMessageBox.information(
                     self.parent(),
                     "提示",
-                    "城市或天气设置已更新，但今日 AI 文本缓存不会自动刷新。\n"
-                    "如需立即生效，请点击“刷新今日 AI 文本”菜单项。",
+                    "城市或天气设置已更新。\n"
+                    "AI 文本会自动切换：之前用过的设置立即生效，新设置在后台生成后生效。",
                 )
         except Exception as e:
             print(f"[Settings] 应用设置失败: {e}")
@@ -240,6 +255,10 @@ class TrayIcon(QSystemTrayIcon):
     def _on_ai_preparing_changed(self, preparing: bool):
         """AI 准备状态变化：禁用刷新/避免重入"""
         self._update_menu_state()
+
+    def _on_breaker_changed(self, name: str, state: str):
+        """熔断器状态变化：更新 AI 服务状态项与托盘提示"""
+        self._update_menu_state()
     
     def _update_menu_state(self):
         """更新菜单状态"""
@@ -254,6 +273,18 @@ class TrayIcon(QSystemTrayIcon):
         self.refresh_ai_action.setEnabled(self.ai_action.isChecked() and (not preparing))
         # AI 正在准备时，禁用勾选项防止连点
         self.ai_action.setEnabled(not preparing)
+
+        # AI 服务熔断：显示状态，托盘提示同步
+        breaker = self.controller.ai_breaker_state()
+        if breaker["state"] == "open":
+            text = f"AI 服务暂不可用，{breaker['retry_in']:.0f} 秒后自动重试"
+        elif breaker["state"] == "half_open":
+            text = "AI 服务恢复检测中…"
+        else:
+            text = ""
+        self.ai_service_action.setText(text)
+        self.ai_service_action.setVisible(bool(text))
+        self.setToolTip("Float Words" + (f"\n{text}" if text else ""))
         
         # 更新菜单文本
         if running:
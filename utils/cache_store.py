@@ -0,0 +1,207 @@
+"""
+本地缓存存储
+
+AI 文本包与上下文数据（地理编码/天气）共用的有界缓存，数据存放在 utils.db 的 SQLite 数据库中：
+- 每类缓存一张表，子类提供具体的读写（带索引的点查）
+- 超过保存时长的条目过期删除；总大小超过上限时按最近使用时间（LRU）淘汰
+- 命中/未命中/淘汰次数先在内存累计，flush() 时累加到 cache_stats 表，供 tools/cache_maint.py 报告
+- 后台线程定期整理所有登记的缓存，并把 WAL 合并回主库
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import DEBUG
+from utils.db import Database, get_database
+
+
+class CacheStore:
+    """基于一张 SQLite 表的有界缓存（子类设置表结构相关的类属性）"""
+
+    table: str = ""
+    # 过期判断列（创建/更新时间）
+    ts_column: str = "created"
+    # LRU 淘汰列与大小列（为空表示不按大小淘汰）
+    used_column: str = ""
+    size_column: str = ""
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int = 0,
+        max_age_seconds: float = 0,
+        db: Optional[Database] = None,
+    ) -> None:
+        """
+        :param name: 统计/报告中显示的名称
+        :param max_bytes: 总大小上限（0 表示不限制）
+        :param max_age_seconds: 条目保存时长（0 表示不限制）
+        """
+        self.name = name
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_age_seconds = max(0.0, float(max_age_seconds))
+        self.db = db or get_database()
+        self._lock = threading.Lock()
+        # 尚未落盘的统计增量
+        self._pending = {"hits": 0, "misses": 0, "evictions": 0}
+
+    # ---------- 统计 ----------
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self._pending["hits"] += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self._pending["misses"] += 1
+
+    def flush(self) -> None:
+        """把内存中的统计增量累加到 cache_stats 表"""
+        with self._lock:
+            delta, self._pending = self._pending, {"hits": 0, "misses": 0, "evictions": 0}
+        if not any(delta.values()):
+            return
+        try:
+            self.db.execute(
+                "INSERT INTO cache_stats (name, hits, misses, evictions) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET hits = hits + excluded.hits, "
+                "misses = misses + excluded.misses, evictions = evictions + excluded.evictions",
+                (self.name, delta["hits"], delta["misses"], delta["evictions"]),
+            )
+        except Exception as e:
+            if DEBUG:
+                print(f"[Cache] {self.name}: 写入统计失败: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        size_expr = f"COALESCE(SUM({self.size_column}), 0)" if self.size_column else "0"
+        row = self.db.query_one(f"SELECT COUNT(*), {size_expr}, MIN({self.ts_column}) FROM {self.table}")
+        saved = self.db.query_one("SELECT hits, misses, evictions FROM cache_stats WHERE name = ?", (self.name,))
+        with self._lock:
+            pending = dict(self._pending)
+        hits = (saved["hits"] if saved else 0) + pending["hits"]
+        misses = (saved["misses"] if saved else 0) + pending["misses"]
+        lookups = hits + misses
+        return {
+            "name": self.name,
+            "table": self.table,
+            "entries": row[0],
+            "bytes": row[1] if self.size_column else None,
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age_seconds,
+            "oldest": row[2],
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "evictions": (saved["evictions"] if saved else 0) + pending["evictions"],
+        }
+
+    # ---------- 淘汰 / 整理 ----------
+
+    def evict(self) -> int:
+        """删除过期条目，并按大小上限 LRU 淘汰，返回删除条数"""
+        removed = 0
+        if self.max_age_seconds:
+            cur = self.db.execute(
+                f"DELETE FROM {self.table} WHERE {self.ts_column} < ?",
+                (time.time() - self.max_age_seconds,),
+            )
+            removed += max(0, cur.rowcount)
+
+        if self.max_bytes and self.size_column and self.used_column:
+            with self.db.transaction() as c:
+                total = c.execute(f"SELECT COALESCE(SUM({self.size_column}), 0) FROM {self.table}").fetchone()[0]
+                if total > self.max_bytes:
+                    victims: List[int] = []
+                    # 最近使用的一条永远保留（通常是刚写入/正在使用的文本包）
+                    rows = c.execute(
+                        f"SELECT rowid, {self.size_column} FROM {self.table} ORDER BY {self.used_column} ASC"
+                    ).fetchall()
+                    for rowid, size in rows[:-1]:
+                        if total <= self.max_bytes:
+                            break
+                        victims.append(rowid)
+                        total -= size
+                    c.executemany(f"DELETE FROM {self.table} WHERE rowid = ?", [(v,) for v in victims])
+                    removed += len(victims)
+                    if DEBUG and victims:
+                        print(f"[Cache] {self.name}: 超出上限，淘汰 {len(victims)} 条")
+
+        if removed:
+            with self._lock:
+                self._pending["evictions"] += removed
+        return removed
+
+    def compact(self) -> Dict[str, Any]:
+        """整理：淘汰 + 统计落盘，返回整理后的统计"""
+        t0 = time.perf_counter()
+        evicted = self.evict()
+        self.flush()
+        stats = self.stats()
+        stats["evicted"] = evicted
+        stats["ms"] = (time.perf_counter() - t0) * 1000.0
+        if DEBUG and evicted:
+            print(f"[Cache] {self.name}: 整理完成 {stats['entries']} 条，淘汰 {evicted}，{stats['ms']:.1f}ms")
+        return stats
+
+
+# ---------- 进程内注册表与后台整理 ----------
+
+_stores: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+_maint_stop: threading.Event | None = None
+
+
+def register_store(store: Any) -> Any:
+    """
+    登记一个需要定期整理的对象（同名只保留第一个），返回实际生效的实例
+
+    对象需提供 name / compact() / flush()
+    """
+    with _stores_lock:
+        return _stores.setdefault(store.name, store)
+
+
+def registered_stores() -> List[Any]:
+    with _stores_lock:
+        return list(_stores.values())
+
+
+def start_maintenance(interval_seconds: float) -> None:
+    """启动后台整理线程：立即整理一次，之后每 interval_seconds 整理一次"""
+    global _maint_stop
+    if _maint_stop is not None or interval_seconds <= 0:
+        return
+    stop = threading.Event()
+    _maint_stop = stop
+
+    def loop():
+        while True:
+            for store in registered_stores():
+                try:
+                    store.compact()
+                except Exception as e:
+                    if DEBUG:
+                        print(f"[Cache] {store.name}: 整理失败: {e}")
+            get_database().checkpoint()
+            if stop.wait(interval_seconds):
+                return
+
+    threading.Thread(target=loop, name="cache-maint", daemon=True).start()
+
+
+def stop_maintenance() -> None:
+    """停止后台整理，落盘各缓存的统计与缓冲数据"""
+    global _maint_stop
+    if _maint_stop is not None:
+        _maint_stop.set()
+        _maint_stop = None
+    for store in registered_stores():
+        try:
+            store.flush()
+        except Exception as e:
+            if DEBUG:
+                print(f"[Cache] {store.name}: 落盘失败: {e}")
+    get_database().checkpoint()
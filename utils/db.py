@@ -0,0 +1,243 @@
+"""
+本地 SQLite 数据库
+
+AI 文本包、近重复索引、地理编码、天气快照、展示历史与 AI 端点延迟统一存放在一个嵌入式数据库中（data/float_words.db）：
+- WAL 模式：读不阻塞写，后台线程（AI 生成、天气刷新、缓存整理）可以并发安全地写入
+- 每个线程一个连接（sqlite3 连接不跨线程共享），SQL 为固定字符串，由 sqlite3 的语句缓存复用预编译语句；
+  短命线程（上下文收集、分片/对冲请求）结束时调用 release()，漏掉的在新建连接与 checkpoint 时按线程存活情况回收
+- 按日期、上下文哈希、城市建立索引，查询都是带索引的点查，不再整文件解析 JSON
+- 结构版本记录在 PRAGMA user_version 中（所有建表语句均为 IF NOT EXISTS，升级时重新执行即可）
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+import config as _config
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+DB_PATH = str(getattr(_config, "DB_PATH", "data/float_words.db"))
+
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_packs (
+    date     TEXT NOT NULL,
+    ctx_key  TEXT NOT NULL,
+    context  TEXT NOT NULL DEFAULT '{}',
+    payload  TEXT NOT NULL,
+    size     INTEGER NOT NULL DEFAULT 0,
+    created  REAL NOT NULL,
+    used     REAL NOT NULL,
+    PRIMARY KEY (date, ctx_key)
+);
+CREATE INDEX IF NOT EXISTS idx_ai_packs_ctx ON ai_packs (ctx_key);
+CREATE INDEX IF NOT EXISTS idx_ai_packs_used ON ai_packs (used);
+
+CREATE TABLE IF NOT EXISTS dedup_signatures (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    date     TEXT NOT NULL,
+    params   TEXT NOT NULL,
+    sig      BLOB NOT NULL,
+    created  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dedup_signatures_date ON dedup_signatures (date);
+
+CREATE TABLE IF NOT EXISTS geo_cache (
+    city          TEXT PRIMARY KEY,
+    ts            REAL NOT NULL,
+    lat           REAL,
+    lon           REAL,
+    name          TEXT,
+    country       TEXT,
+    country_code  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS weather_snapshots (
+    loc_key  TEXT PRIMARY KEY,
+    ts       REAL NOT NULL,
+    data     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_weather_ts ON weather_snapshots (ts);
+
+CREATE TABLE IF NOT EXISTS shown_history (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts      REAL NOT NULL,
+    date    TEXT NOT NULL,
+    source  TEXT NOT NULL DEFAULT '',
+    text    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_shown_history_date ON shown_history (date);
+
+CREATE TABLE IF NOT EXISTS endpoint_latency (
+    name     TEXT PRIMARY KEY,
+    ewma_ms  REAL NOT NULL,
+    samples  INTEGER NOT NULL DEFAULT 0,
+    updated  REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cache_stats (
+    name       TEXT PRIMARY KEY,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    misses     INTEGER NOT NULL DEFAULT 0,
+    evictions  INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class Database:
+    """线程安全的 SQLite 访问封装（每线程一个连接）"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        # (所属线程, 连接)：线程结束后连接由 release() / _close_dead_locked() 关闭
+        self._connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+
+    # ---------- 连接 ----------
+
+    def conn(self) -> sqlite3.Connection:
+        """当前线程的连接（首次使用时创建并初始化结构）"""
+        c: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if c is not None:
+            return c
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # isolation_level=None：默认自动提交，需要事务时用 transaction()
+        # check_same_thread=False 只为了退出时能统一关闭；连接本身不跨线程使用
+        c = sqlite3.connect(
+            self.path,
+            timeout=5.0,
+            isolation_level=None,
+            cached_statements=128,
+            check_same_thread=False,
+        )
+        c.row_factory = sqlite3.Row
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute("PRAGMA synchronous=NORMAL")
+        c.execute("PRAGMA busy_timeout=5000")
+        with self._lock:
+            if not self._schema_ready:
+                self._init_schema(c)
+                self._schema_ready = True
+            self._close_dead_locked()
+            self._connections.append((threading.current_thread(), c))
+        self._local.conn = c
+        return c
+
+    def release(self) -> None:
+        """关闭当前线程的连接（短命线程结束前调用；之后再访问会重新建立）"""
+        c: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if c is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._connections = [(t, x) for t, x in self._connections if x is not c]
+        try:
+            c.close()
+        except sqlite3.Error:
+            pass
+
+    def _close_dead_locked(self) -> None:
+        """关闭所属线程已结束的连接"""
+        alive: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        for t, c in self._connections:
+            if t.is_alive():
+                alive.append((t, c))
+                continue
+            try:
+                c.close()
+            except sqlite3.Error:
+                pass
+        if DEBUG and len(alive) < len(self._connections):
+            print(f"[DB] 回收 {len(self._connections) - len(alive)} 个已结束线程的连接")
+        self._connections = alive
+
+    def _init_schema(self, c: sqlite3.Connection) -> None:
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            c.executescript(_SCHEMA)
+            c.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            if DEBUG:
+                print(f"[DB] 已初始化数据库结构 v{SCHEMA_VERSION}: {self.path}")
+
+    # ---------- 查询 ----------
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        return self.conn().execute(sql, params)
+
+    def executemany(self, sql: str, rows: Sequence[Sequence[Any]]) -> None:
+        with self.transaction() as c:
+            c.executemany(sql, rows)
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        return self.conn().execute(sql, params).fetchone()
+
+    def query_all(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        return self.conn().execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务（BEGIN IMMEDIATE：立即拿写锁，避免读后升级写锁时的死锁重试）"""
+        c = self.conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            yield c
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        else:
+            c.execute("COMMIT")
+
+    # ---------- 维护 ----------
+
+    def checkpoint(self) -> None:
+        """把 WAL 合并回主库并截断 WAL 文件"""
+        try:
+            self.conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            if DEBUG:
+                print(f"[DB] checkpoint 失败: {e}")
+        with self._lock:
+            self._close_dead_locked()
+
+    def size_bytes(self) -> int:
+        total = 0
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                total += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return total
+
+    def close_all(self) -> None:
+        """
+        退出时调用：关闭本线程与已结束线程的连接
+
+        仍在运行的线程（超过退出期限的后台任务）可能正在通过自己的连接写入，不去关闭，留给进程退出回收
+        """
+        self.release()
+        with self._lock:
+            self._close_dead_locked()
+            busy = len(self._connections)
+        if DEBUG and busy:
+            print(f"[DB] {busy} 个仍在运行的线程持有连接，随进程退出回收")
+
+
+_db: Database | None = None
+_db_lock = threading.Lock()
+
+
+def get_database() -> Database:
+    """进程内共享的数据库"""
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = Database(DB_PATH)
+        return _db
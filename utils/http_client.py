@@ -0,0 +1,284 @@
+"""
+共享 HTTP 客户端
+
+AI、地理编码、天气等所有出站请求共用一个 requests.Session：
+- 每个主机一个连接池（urllib3），keep-alive 复用 TCP/TLS 连接，不再每次请求重新握手
+- 默认请求 gzip 压缩
+- 按主机配置 (连接, 读取) 超时，由各模块在导入时登记，调用方不必再逐处传 timeout
+- 连接池大小可配置（运行时参数 HTTP_POOL_SIZE，下次启动生效）
+- warm() 提前建立连接（DNS + TCP + TLS），与其它准备工作并行
+- 超时 / 连接失败 / 429 / 5xx 按 RetryPolicy 退避重试（遵循 Retry-After）；
+  每个主机一个熔断器（utils.resilience），端点故障期间直接失败，不再持续请求
+- 可传入 CancelToken（utils.task_executor）：每次尝试前检查，重试等待可被取消打断
+- stats() 按主机报告请求数 / 新建连接数 / 复用率
+"""
+
+from __future__ import annotations
+
+import email.utils
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config as _config
+from utils.resilience import CircuitOpenError as _CircuitOpen, RetryPolicy, NO_RETRY, get_breaker, host_of
+from utils.task_executor import CancelToken
+from utils.runtime_params import param
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+HTTP_DEFAULT_TIMEOUT: Tuple[float, float] = tuple(getattr(_config, "HTTP_DEFAULT_TIMEOUT", (5, 15)))  # type: ignore[assignment]
+
+USER_AGENT = "float_words/1.0"
+
+
+class CircuitOpenError(requests.ConnectionError, _CircuitOpen):
+    """主机熔断中，请求未发出（也是 requests.ConnectionError，现有的异常处理照常生效）"""
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        requests.ConnectionError.__init__(self, f"{host} 熔断中，{retry_in:.0f}s 后再试")
+        self.name = host
+        self.retry_in = retry_in
+
+
+def is_retryable_status(status: int) -> bool:
+    """429（限流）与 5xx（501 未实现除外）可重试"""
+    return status == 429 or (500 <= status < 600 and status != 501)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 头：秒数或 HTTP 日期 → 秒数（无法解析返回 None）"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class HttpClient:
+    """进程内共享的 HTTP 客户端（线程安全）"""
+
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        default_timeout: Tuple[float, float] = HTTP_DEFAULT_TIMEOUT,
+    ) -> None:
+        """
+        :param pool_size: 每个主机保留的最大连接数，默认运行时参数 HTTP_POOL_SIZE（并发分片请求数不应超过它，否则多出的连接用完即关）
+        :param default_timeout: 未登记主机的 (连接, 读取) 超时
+        """
+        self.pool_size = max(1, int(pool_size or param("HTTP_POOL_SIZE")))
+        self.default_timeout = default_timeout
+        self._session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+        self._session.headers.update(
+            {
+                "User-Agent": USER_AGENT,
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+            }
+        )
+        self._timeouts: Dict[str, Tuple[float, float]] = {}
+        self._policies: Dict[str, RetryPolicy] = {}
+        self.default_policy = RetryPolicy()
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._retries: Dict[str, int] = {}
+
+    # ---------- 配置 ----------
+
+    def set_host_timeout(self, url_or_host: str, timeout: Tuple[float, float]) -> None:
+        """登记某主机的 (连接, 读取) 超时"""
+        host = host_of(url_or_host)
+        if host:
+            with self._lock:
+                self._timeouts[host] = (float(timeout[0]), float(timeout[1]))
+
+    def timeout_for(self, url: str) -> Tuple[float, float]:
+        return self._timeouts.get(host_of(url), self.default_timeout)
+
+    def set_host_policy(self, url_or_host: str, policy: RetryPolicy) -> None:
+        """登记某主机的重试策略（例如 AI 请求耗时长，只重试一次）"""
+        host = host_of(url_or_host)
+        if host:
+            with self._lock:
+                self._policies[host] = policy
+
+    def policy_for(self, url: str) -> RetryPolicy:
+        return self._policies.get(host_of(url), self.default_policy)
+
+    # ---------- 请求 ----------
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[Any] = None,
+        retry: Optional[RetryPolicy] = None,
+        cancel: Optional[CancelToken] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        发送请求（参数同 requests.Session.request），按重试策略与主机熔断器处理失败
+
+        - 超时、连接失败、429、5xx 视为可重试失败，计入熔断器；其它 4xx 原样返回给调用方
+        - 熔断中直接抛出 CircuitOpenError（不发请求）
+        - 重试用尽后：异常原样抛出；429/5xx 响应原样返回（调用方 raise_for_status 照常处理）
+        - cancel 已取消时在下一次尝试前 / 重试等待中抛出 TaskCancelled
+
+        stream=True 时调用方需读完或关闭响应（with 语句），连接才会归还连接池
+        """
+        host = host_of(url)
+        policy = retry or self.policy_for(url)
+        breaker = get_breaker(host)
+        attempt = 0
+        while True:
+            attempt += 1
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            if not breaker.allow():
+                with self._lock:
+                    self._errors[host] = self._errors.get(host, 0) + 1
+                raise CircuitOpenError(host, breaker.retry_in())
+            with self._lock:
+                self._requests[host] = self._requests.get(host, 0) + 1
+
+            retry_after: Optional[float] = None
+            try:
+                resp = self._session.request(method, url, timeout=timeout or self.timeout_for(url), **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                with self._lock:
+                    self._errors[host] = self._errors.get(host, 0) + 1
+                breaker.record_failure(type(e).__name__)
+                delay = policy.delay(attempt)
+                if delay is None:
+                    raise
+                error = type(e).__name__
+            except BaseException:
+                with self._lock:
+                    self._errors[host] = self._errors.get(host, 0) + 1
+                breaker.release()
+                raise
+            else:
+                if not is_retryable_status(resp.status_code):
+                    breaker.record_success()
+                    return resp
+                breaker.record_failure(f"HTTP {resp.status_code}")
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                delay = policy.delay(attempt, retry_after)
+                if delay is None:
+                    return resp
+                resp.close()
+                error = f"HTTP {resp.status_code}"
+
+            with self._lock:
+                self._retries[host] = self._retries.get(host, 0) + 1
+            if DEBUG:
+                print(f"[HTTP] {host} 第 {attempt} 次请求失败（{error}），{delay:.1f}s 后重试")
+            if cancel is not None:
+                cancel.sleep(delay)
+            else:
+                time.sleep(delay)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def warm(self, url: str) -> float:
+        """
+        预热到 url 所在主机的连接（DNS 解析 + TCP + TLS 握手）
+
+        发送一个 HEAD 请求并读完响应，连接归还连接池，随后的请求直接复用。
+        返回耗时毫秒；失败返回 -1（预热失败不影响正式请求）
+        """
+        t0 = time.perf_counter()
+        try:
+            resp = self.request("HEAD", url, allow_redirects=False, retry=NO_RETRY)
+            resp.close()
+        except requests.RequestException as e:
+            if DEBUG:
+                print(f"[HTTP] 预热 {host_of(url)} 失败: {e}")
+            return -1.0
+        return (time.perf_counter() - t0) * 1000.0
+
+    # ---------- 统计 ----------
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按主机统计：requests（发起的请求）、connections（新建的 TCP 连接）、
+        reused（复用已有连接的请求）、reuse_rate、errors、retries、breaker（熔断器状态）
+        """
+        conns: Dict[str, int] = {}
+        served: Dict[str, int] = {}
+        managers = [self._adapter.poolmanager] + list(getattr(self._adapter, "proxy_manager", {}).values())
+        for manager in managers:
+            pools = getattr(manager, "pools", None)
+            if pools is None:
+                continue
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = str(getattr(pool, "host", "")).lower()
+                conns[host] = conns.get(host, 0) + int(getattr(pool, "num_connections", 0))
+                served[host] = served.get(host, 0) + int(getattr(pool, "num_requests", 0))
+
+        with self._lock:
+            requested = dict(self._requests)
+            errors = dict(self._errors)
+            retries = dict(self._retries)
+        out: Dict[str, Dict[str, Any]] = {}
+        for host in sorted(set(requested) | set(conns)):
+            n = served.get(host, requested.get(host, 0))
+            c = conns.get(host, 0)
+            reused = max(0, n - c)
+            out[host] = {
+                "requests": requested.get(host, 0),
+                "connections": c,
+                "reused": reused,
+                "reuse_rate": (reused / n) if n else 0.0,
+                "errors": errors.get(host, 0),
+                "retries": retries.get(host, 0),
+                "breaker": get_breaker(host).state,
+            }
+        return out
+
+    def format_stats(self) -> str:
+        lines = []
+        for host, s in self.stats().items():
+            lines.append(
+                f"{host}: 请求 {s['requests']}，新建连接 {s['connections']}，"
+                f"复用 {s['reused']}（{s['reuse_rate'] * 100:.0f}%），失败 {s['errors']}，"
+                f"重试 {s['retries']}，熔断器 {s['breaker']}"
+            )
+        return "\n".join(lines) or "(无请求)"
+
+    def close(self) -> None:
+        self._session.close()
+
+
+_client: HttpClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """进程内共享的 HTTP 客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
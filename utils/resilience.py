@@ -0,0 +1,231 @@
+"""
+出站调用的容错：重试策略 + 熔断器
+
+- RetryPolicy：封顶的指数退避 + 全抖动（full jitter），可遵循服务端 Retry-After
+- CircuitBreaker：按端点（主机）统计连续失败，超过阈值后熔断（open），
+  冷却期过后放行一个探测请求（half-open），成功则恢复（closed），失败则冷却期加倍
+- 熔断器按名称登记在进程内注册表中，状态变化通知监听者（托盘/面板显示）
+
+这里不依赖 requests；HTTP 相关的失败分类在 utils.http_client 中
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, List, Optional
+
+import config as _config
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+HTTP_RETRY_ATTEMPTS = int(getattr(_config, "HTTP_RETRY_ATTEMPTS", 3))
+HTTP_RETRY_BASE_DELAY = float(getattr(_config, "HTTP_RETRY_BASE_DELAY", 0.5))
+HTTP_RETRY_MAX_DELAY = float(getattr(_config, "HTTP_RETRY_MAX_DELAY", 8.0))
+BREAKER_FAILURE_THRESHOLD = int(getattr(_config, "BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_SECONDS = float(getattr(_config, "BREAKER_RESET_SECONDS", 30))
+BREAKER_MAX_RESET_SECONDS = float(getattr(_config, "BREAKER_MAX_RESET_SECONDS", 600))
+
+
+def host_of(url: str) -> str:
+    """URL（或裸主机名）→ 小写主机名（熔断器按主机命名）"""
+    if "://" not in url:
+        return url.strip().lower()
+    return (urlsplit(url).hostname or "").lower()
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff_delay(attempt: int, base: float, cap: float, floor: float = 0.0) -> float:
+    """
+    第 attempt 次（从 1 开始）重试前的等待：ceiling = min(cap, base * 2^(attempt-1))，
+    在 [ceiling * floor, ceiling] 内均匀随机（floor=0 为全抖动，0.5 为等值抖动）
+    """
+    ceiling = min(cap, base * (2 ** max(0, attempt - 1)))
+    return random.uniform(ceiling * floor, ceiling)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """重试策略（attempts 为总尝试次数，1 表示不重试）"""
+
+    attempts: int = HTTP_RETRY_ATTEMPTS
+    base_delay: float = HTTP_RETRY_BASE_DELAY
+    max_delay: float = HTTP_RETRY_MAX_DELAY
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        第 attempt 次尝试失败后的等待秒数；返回 None 表示不再重试
+
+        服务端给出的 Retry-After 超过 max_delay 时不在调用内等待（交给熔断器 / 上层退避）
+        """
+        if attempt >= self.attempts:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+class CircuitOpenError(Exception):
+    """熔断中，请求未发出"""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} 熔断中，{retry_in:.0f}s 后再试")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """单个端点的熔断器（线程安全）"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+        max_reset_seconds: float = BREAKER_MAX_RESET_SECONDS,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_reset_seconds = max(0.0, float(reset_seconds))
+        self.max_reset_seconds = max(self.base_reset_seconds, float(max_reset_seconds))
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0  # 连续失败次数
+        self._reset_seconds = self.base_reset_seconds  # 当前冷却期（探测失败后加倍）
+        self._opened_at = 0.0
+        self._probing = False  # half-open 时是否已有探测请求在进行
+        self._last_error = ""
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def retry_in(self) -> float:
+        """熔断中距离可以探测的秒数（未熔断为 0）"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._reset_seconds - time.time())
+
+    def allow(self) -> bool:
+        """
+        是否放行一次请求
+
+        open 且冷却期已过时转为 half-open 并放行一个探测请求；探测结果出来前其它请求仍被拒绝
+        """
+        changed = False
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.time() < self._opened_at + self._reset_seconds:
+                    return False
+                self._state = HALF_OPEN
+                self._probing = False
+                changed = True
+            if self._probing:
+                allowed = False
+            else:
+                self._probing = True
+                allowed = True
+        if changed:
+            _notify(self)
+        return allowed
+
+    def record_success(self) -> None:
+        with self._lock:
+            changed = self._state != CLOSED
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+            self._reset_seconds = self.base_reset_seconds
+        if changed:
+            if DEBUG:
+                print(f"[Breaker] {self.name}: 已恢复")
+            _notify(self)
+
+    def record_failure(self, error: str = "") -> None:
+        with self._lock:
+            self._failures += 1
+            self._last_error = error
+            if self._state == HALF_OPEN:
+                # 探测失败：重新熔断，冷却期加倍
+                self._reset_seconds = min(self.max_reset_seconds, max(1.0, self._reset_seconds * 2))
+            elif self._state == OPEN or self._failures < self.failure_threshold:
+                return
+            self._state = OPEN
+            self._opened_at = time.time()
+            self._probing = False
+            reset = self._reset_seconds
+        if DEBUG:
+            print(f"[Breaker] {self.name}: 连续失败 {self._failures} 次，熔断 {reset:.0f}s（{error}）")
+        _notify(self)
+
+    def release(self) -> None:
+        """请求以非失败、非成功的方式结束（例如参数错误）：只释放探测名额"""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(0.0, self._opened_at + self._reset_seconds - time.time())
+            return {
+                "name": self.name,
+                "state": self._state,
+                "failures": self._failures,
+                "retry_in": retry_in,
+                "reset_seconds": self._reset_seconds,
+                "last_error": self._last_error,
+            }
+
+
+# ---------- 进程内注册表 ----------
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_listeners: List[Callable[[str, str], None]] = []
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """按名称（通常为主机名）取熔断器，不存在时创建"""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def breaker_states() -> List[Dict[str, Any]]:
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in breakers]
+
+
+def add_breaker_listener(callback: Callable[[str, str], None]) -> None:
+    """登记状态变化回调 callback(name, state)；在发生变化的线程中调用"""
+    with _registry_lock:
+        _listeners.append(callback)
+
+
+def _notify(breaker: CircuitBreaker) -> None:
+    with _registry_lock:
+        listeners = list(_listeners)
+    state = breaker.state
+    for callback in listeners:
+        try:
+            callback(breaker.name, state)
+        except Exception as e:
+            if DEBUG:
+                print(f"[Breaker] 状态回调失败: {e}")
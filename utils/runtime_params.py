@@ -0,0 +1,226 @@
+"""
+运行时参数表
+
+性能相关的常量（生成间隔、显示时长、帧间隔、窗口上限、每日条数、分片数…）不再只在导入时从 config 读一次：
+- 每个参数有类型与上下限，默认值取自 config
+- 覆盖来源（后者优先）：settings（QSettings 中 tuning/<名称>）< 环境变量 FLOAT_WORDS_<名称>
+  < parent（AI 工作进程从界面进程收到的值）< control（本地控制套接字，见 core.control_server）
+- 取值无锁（整体替换的只读字典）；值变化时通知监听者（在发生变化的线程中调用），
+  控制器据此立即生效：调度间隔、已显示窗口的帧间隔等；live=False 的参数下次启动生效
+
+命令行调整：python tools/tune.py list / set SPAWN_INTERVAL 1200 / reset SPAWN_INTERVAL
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import config as _config
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+
+SOURCES = ("settings", "env", "parent", "control")  # 覆盖来源，后者优先
+ENV_PREFIX = "FLOAT_WORDS_"
+
+
+@dataclass(frozen=True)
+class Param:
+    """一个可调参数（默认值取 config 中的同名常量）"""
+
+    name: str
+    kind: type  # int / float
+    lo: float
+    hi: float
+    fallback: Any
+    doc: str
+    live: bool = True  # False：下次启动生效
+
+    @property
+    def default(self) -> Any:
+        return self.coerce(getattr(_config, self.name, self.fallback))
+
+    def coerce(self, value: Any) -> Any:
+        """转换为参数类型并检查范围；不合法（含 inf / nan）时抛 ValueError"""
+        try:
+            f = float(value)
+            if not math.isfinite(f):
+                raise ValueError
+            v = int(f) if self.kind is int else self.kind(f)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"{self.name}: 无法解析为{'整数' if self.kind is int else '数字'}: {value!r}")
+        if not (self.lo <= v <= self.hi):
+            raise ValueError(f"{self.name}: {v} 超出范围 [{self.lo:g}, {self.hi:g}]")
+        return v
+
+
+PARAMS: Tuple[Param, ...] = (
+    # 漂浮文字
+    Param("SPAWN_INTERVAL", int, 200, 600_000, 1800, "生成间隔（ms）"),
+    Param("LIFETIME", int, 1000, 120_000, 7000, "文字显示时长（ms），新窗口生效"),
+    Param("FONT_SIZE", int, 8, 96, 18, "字号，新窗口生效"),
+    Param("FLOAT_SPEED", int, 10, 500, 40, "漂浮动画帧间隔（ms）；覆盖时优先于速度档位"),
+    Param("MAX_FLOATS", int, 1, 100, 6, "同时显示的窗口上限；覆盖时优先于数量档位"),
+    # AI 生成
+    Param("AI_ITEMS_PER_DAY", int, 1, 500, 50, "每天生成多少条，下次生成生效"),
+    Param("AI_TOPUP_ITEMS", int, 0, 500, 15, "刷新时补充生成的条数（0 为完整重新生成）"),
+    Param("AI_PARALLEL_SHARDS", int, 1, 16, 4, "分片并发请求数"),
+    Param("AI_STREAM_READY_ITEMS", int, 1, 100, 5, "流式生成收到多少条后开始使用"),
+    Param("AI_HEDGE_DELAY_SECONDS", float, 0.0, 120.0, 3.0, "对冲请求延迟（秒，0 为不对冲）"),
+    Param("AI_PREGEN_IDLE_SECONDS", int, 0, 86_400, 120, "预生成要求的空闲秒数"),
+    Param("AI_PREGEN_CHECK_SECONDS", int, 10, 86_400, 300, "预生成检查间隔（秒）"),
+    # 后台与缓存
+    Param("CACHE_COMPACT_INTERVAL_SECONDS", int, 0, 86_400, 3600, "缓存整理间隔（秒，0 为不整理）"),
+    Param("TASK_MAX_WORKERS", int, 1, 8, 2, "后台任务线程数", live=False),
+    Param("HTTP_POOL_SIZE", int, 1, 64, 8, "每个主机的连接池大小", live=False),
+    Param("TEXT_CORPUS_MEMORY_MB", int, 1, 1024, 16, "文本库分片内存预算（MB）", live=False),
+)
+
+
+class RuntimeParams:
+    """参数表：无锁读取，分来源覆盖，变化时通知"""
+
+    def __init__(self, params: Tuple[Param, ...] = PARAMS) -> None:
+        self._params: Dict[str, Param] = {p.name: p for p in params}
+        self._lock = threading.Lock()
+        self._overrides: Dict[str, Dict[str, Any]] = {s: {} for s in SOURCES}
+        self._values: Mapping[str, Any] = {p.name: p.default for p in params}
+        self._sources: Mapping[str, str] = {p.name: "default" for p in params}
+        self._listeners: List[Callable[[List[str]], None]] = []
+
+    # ---------- 读取 ----------
+
+    def get(self, name: str) -> Any:
+        return self._values[name]
+
+    def source(self, name: str) -> str:
+        """当前值的来源：default / settings / env / parent / control"""
+        return self._sources[name]
+
+    def is_overridden(self, name: str) -> bool:
+        return self._sources[name] != "default"
+
+    def spec(self, name: str) -> Param:
+        param = self._params.get(name)
+        if param is None:
+            raise KeyError(f"未知参数: {name}")
+        return param
+
+    def coerce(self, name: str, value: Any) -> Any:
+        return self.spec(name).coerce(value)
+
+    def overrides(self) -> Dict[str, Any]:
+        """所有被覆盖的参数的当前值（发给 AI 工作进程）"""
+        values, sources = self._values, self._sources
+        return {name: values[name] for name, src in sources.items() if src != "default"}
+
+    def describe(self) -> List[Dict[str, Any]]:
+        values, sources = self._values, self._sources
+        return [
+            {
+                "name": p.name,
+                "value": values[p.name],
+                "default": p.default,
+                "source": sources[p.name],
+                "min": p.lo,
+                "max": p.hi,
+                "live": p.live,
+                "doc": p.doc,
+            }
+            for p in self._params.values()
+        ]
+
+    # ---------- 覆盖 ----------
+
+    def set(self, name: str, value: Any, source: str = "control") -> Any:
+        """覆盖一个参数；不合法时抛 KeyError / ValueError（不改变任何值）"""
+        v = self.coerce(name, value)
+        with self._lock:
+            self._overrides[source][name] = v
+            changed = self._recompute_locked()
+        self._notify(changed)
+        return v
+
+    def clear(self, name: str, source: str = "control") -> None:
+        self.spec(name)
+        with self._lock:
+            self._overrides[source].pop(name, None)
+            changed = self._recompute_locked()
+        self._notify(changed)
+
+    def replace_source(self, source: str, values: Mapping[str, Any]) -> List[str]:
+        """整体替换某个来源的覆盖值；不合法的项忽略并打印，返回错误信息"""
+        parsed: Dict[str, Any] = {}
+        errors: List[str] = []
+        for name, value in values.items():
+            try:
+                parsed[name] = self.coerce(name, value)
+            except (KeyError, ValueError) as e:
+                errors.append(str(e))
+        for err in errors:
+            print(f"[Params] 忽略 {source} 中的覆盖: {err}")
+        with self._lock:
+            self._overrides[source] = parsed
+            changed = self._recompute_locked()
+        self._notify(changed)
+        return errors
+
+    def _recompute_locked(self) -> List[str]:
+        values: Dict[str, Any] = {}
+        sources: Dict[str, str] = {}
+        for name, param in self._params.items():
+            values[name], sources[name] = param.default, "default"
+            for src in SOURCES:
+                if name in self._overrides[src]:
+                    values[name], sources[name] = self._overrides[src][name], src
+        changed = [n for n in values if values[n] != self._values[n]]
+        self._values, self._sources = values, sources
+        return changed
+
+    # ---------- 通知 ----------
+
+    def add_listener(self, callback: Callable[[List[str]], None]) -> None:
+        """值变化回调 callback(names)（在发生变化的线程中调用）"""
+        self._listeners.append(callback)
+
+    def _notify(self, changed: List[str]) -> None:
+        if not changed:
+            return
+        if DEBUG:
+            print("[Params] " + ", ".join(f"{n}={self._values[n]}（{self._sources[n]}）" for n in changed))
+        for callback in list(self._listeners):
+            try:
+                callback(changed)
+            except Exception as e:
+                if DEBUG:
+                    print(f"[Params] 变化回调失败: {e}")
+
+
+def _env_overrides(params: Tuple[Param, ...]) -> Dict[str, str]:
+    return {p.name: os.environ[ENV_PREFIX + p.name] for p in params if ENV_PREFIX + p.name in os.environ}
+
+
+_shared: Optional[RuntimeParams] = None
+_shared_lock = threading.Lock()
+
+
+def get_params() -> RuntimeParams:
+    """进程内共享的参数表（首次创建时读入环境变量覆盖）"""
+    global _shared
+    shared = _shared
+    if shared is not None:
+        return shared
+    with _shared_lock:
+        if _shared is None:
+            shared = RuntimeParams()
+            shared.replace_source("env", _env_overrides(PARAMS))
+            _shared = shared
+        return _shared
+
+
+def param(name: str) -> Any:
+    """当前值（热路径使用）"""
+    return get_params().get(name)
@@ -0,0 +1,61 @@
+"""
+启动时间线
+
+记录启动各阶段距进程启动的耗时（创建 QApplication、控制器、托盘图标、事件循环开始、首个漂浮文字…），
+用来度量与优化启动速度：
+- main.py 最先导入本模块，导入时刻作为起点
+- mark(name)：记录一个阶段（同名只记第一次）
+- report()：打印时间线；DEBUG 或环境变量 FLOAT_WORDS_STARTUP_REPORT=1 时，
+  事件循环开始（托盘已显示）与首个漂浮文字出现时各打印一次
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import config as _config
+
+_T0 = time.perf_counter()
+_lock = threading.Lock()
+_marks: List[Tuple[str, float]] = []
+_seen: Dict[str, float] = {}
+
+
+def enabled() -> bool:
+    return bool(getattr(_config, "DEBUG", False)) or os.environ.get("FLOAT_WORDS_STARTUP_REPORT") == "1"
+
+
+def mark(name: str) -> bool:
+    """记录阶段 name（毫秒，距起点）；已记录过返回 False"""
+    now = (time.perf_counter() - _T0) * 1000
+    with _lock:
+        if name in _seen:
+            return False
+        _seen[name] = now
+        _marks.append((name, now))
+    return True
+
+
+def elapsed(name: str) -> Optional[float]:
+    """阶段 name 距起点的毫秒数（未记录为 None）"""
+    return _seen.get(name)
+
+
+def report(title: str = "启动时间线") -> None:
+    """打印目前为止的时间线（未启用时不打印）"""
+    if not enabled():
+        return
+    with _lock:
+        marks = list(_marks)
+    lines = [f"[Startup] {title}:"]
+    prev = 0.0
+    for name, ms in marks:
+        lines.append(f"[Startup]   {ms:8.1f}ms  (+{ms - prev:7.1f}ms)  {name}")
+        prev = ms
+    start, first = _seen.get("start"), _seen.get("first_float")
+    if start is not None and first is not None and first >= start:
+        lines.append(f"[Startup]   点击开始 → 首个漂浮文字: {first - start:.1f}ms")
+    print("\n".join(lines))
@@ -0,0 +1,244 @@
+"""
+后台任务执行器
+
+AI 准备 / 刷新 / 预生成等后台工作统一提交到这里，不再各自启动裸线程：
+- 固定上限的工作线程池（按需创建，daemon 线程，超过退出期限的任务不会卡住进程退出）
+- 每个任务一个 CancelToken，传入 provider.prepare() 与 HTTP 层；取消是协作式的：
+  在重试等待、流式读取的每一行、请求之间检查，检查点抛出 TaskCancelled
+- shutdown(deadline)：不再接收新任务，取消排队与运行中的任务，在期限内等待它们收尾（例如写完缓存）
+- snapshot() 提供运行中 / 排队 / 最近结束的任务状态，供面板显示；状态变化通知监听者
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+import config as _config
+
+DEBUG = bool(getattr(_config, "DEBUG", False))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskCancelled(Exception):
+    """任务已被取消（在检查点抛出）"""
+
+    def __init__(self, message: str = "任务已取消") -> None:
+        super().__init__(message)
+
+
+class CancelToken:
+    """协作式取消标记（线程安全）"""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        """可被取消打断的等待"""
+        if self._event.wait(max(0.0, seconds)):
+            raise TaskCancelled()
+
+
+class Task:
+    """提交给 TaskExecutor 的一个任务"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, fn: Callable[..., Any], args: tuple) -> None:
+        self.id = next(Task._ids)
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.token = CancelToken()
+        self.state = PENDING
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error = ""
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "cancel_requested": self.token.cancelled,
+            "elapsed": (end - self.started) if self.started else 0.0,
+            "waited": ((self.started or end) - self.submitted),
+            "error": self.error,
+        }
+
+
+class TaskExecutor:
+    """有界后台任务池：任务函数签名为 fn(token, *args)"""
+
+    def __init__(self, max_workers: int, name: str = "task", history: int = 20) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.name = name
+        self._cond = threading.Condition()
+        self._queue: Deque[Task] = deque()
+        self._running: Set[Task] = set()
+        self._recent: Deque[Task] = deque(maxlen=history)
+        self._workers = 0
+        self._idle = 0
+        self._closed = False
+        self._listeners: List[Callable[[], None]] = []
+
+    # ---------- 提交 / 取消 ----------
+
+    def submit(self, name: str, fn: Callable[..., Any], *args: Any) -> Task:
+        """提交任务；已关闭时抛出 RuntimeError"""
+        task = Task(name, fn, args)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name}: 执行器已关闭，拒绝任务 {name}")
+            self._queue.append(task)
+            # 排队任务多于空闲线程时才加线程（已被唤醒但尚未取走任务的空闲线程不能重复计算）
+            if len(self._queue) > self._idle and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._worker, name=f"{self.name}-{self._workers}", daemon=True).start()
+            self._cond.notify()
+        self._notify()
+        return task
+
+    def cancel(self, name: str) -> int:
+        """取消指定名称的排队 / 运行中任务，返回取消的个数"""
+        with self._cond:
+            tasks = [t for t in list(self._queue) + list(self._running) if t.name == name]
+        for t in tasks:
+            t.cancel()
+        if tasks:
+            self._notify()
+        return len(tasks)
+
+    def is_active(self, name: str) -> bool:
+        with self._cond:
+            return any(t.name == name for t in list(self._queue) + list(self._running))
+
+    # ---------- 工作线程 ----------
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                if not self._queue:
+                    self._workers -= 1
+                    return
+                task = self._queue.popleft()
+                if task.token.cancelled:
+                    self._finish_locked(task, CANCELLED)
+                    skip = True
+                else:
+                    task.state = RUNNING
+                    task.started = time.time()
+                    self._running.add(task)
+                    skip = False
+            self._notify()
+            if skip:
+                continue
+
+            state = DONE
+            try:
+                task.fn(task.token, *task.args)
+            except TaskCancelled:
+                state = CANCELLED
+            except Exception as e:
+                state = FAILED
+                task.error = str(e)
+                if DEBUG:
+                    print(f"[Task] {task.name} 失败: {e}")
+            with self._cond:
+                self._running.discard(task)
+                self._finish_locked(task, state)
+            if DEBUG and state == CANCELLED:
+                print(f"[Task] {task.name} 已取消")
+            self._notify()
+
+    def _finish_locked(self, task: Task, state: str) -> None:
+        task.state = state
+        task.finished = time.time()
+        self._recent.append(task)
+        task._done.set()
+
+    # ---------- 关闭 ----------
+
+    def shutdown(self, deadline: float) -> List[str]:
+        """
+        关闭：拒绝新任务，取消排队与运行中的任务，最多等待 deadline 秒让运行中的任务收尾
+
+        返回期限内没有结束的任务名（它们的 daemon 线程随进程退出）
+        """
+        with self._cond:
+            self._closed = True
+            pending = list(self._queue)
+            self._queue.clear()
+            running = list(self._running)
+            for task in pending:
+                task.cancel()
+                self._finish_locked(task, CANCELLED)
+            self._cond.notify_all()
+        for task in running:
+            task.cancel()
+        end = time.time() + max(0.0, deadline)
+        for task in running:
+            task.wait(max(0.0, end - time.time()))
+        unfinished = [t.name for t in running if not t.done]
+        if DEBUG:
+            if unfinished:
+                print(f"[Task] 退出期限内未结束的任务: {', '.join(unfinished)}")
+            elif running:
+                print(f"[Task] {len(running)} 个运行中的任务已收尾")
+        return unfinished
+
+    # ---------- 状态 ----------
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """运行中、排队、最近结束（新的在前）的任务状态"""
+        with self._cond:
+            tasks = sorted(self._running, key=lambda t: t.id) + list(self._queue) + list(reversed(self._recent))
+        return [t.snapshot() for t in tasks]
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """任务状态变化回调（在发生变化的线程中调用）"""
+        self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                if DEBUG:
+                    print(f"[Task] 状态回调失败: {e}")
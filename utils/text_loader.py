@@ -7,12 +7,7 @@ from config import TEXT_FILE
 from utils.resources import get_resource_path
 
 
-def load_texts():
-    """
-    加载文本列表
-    优先从文件加载，如果文件不存在则返回默认列表
-    """
-    default_texts =[
+DEFAULT_TEXTS = [
     "过充满活力的每一天",
     "按时吃饭，保护胃。",
     "相信自己有潜力",
@@ -23,21 +18,41 @@ def load_texts():
     "遇见微笑的人温暖世界",
     "耐心等待惊喜不要放弃",
     "亲近自然愿灵魂得到安宁"
-    ]
+]
+
+
+def get_text_file_path() -> str:
+    """本地文本文件的绝对路径"""
+    return get_resource_path(TEXT_FILE)
+
+
+def parse_text_line(line: str) -> str:
+    """
+    清洗单行文本
+    去除首尾空白，以及形如 "xxx", / "xxx" 的引号和逗号
+    """
+    line = line.strip()
+    if line.startswith('"') and line.endswith('",'):
+        line = line[1:-2]
+    elif line.startswith('"') and line.endswith('"'):
+        line = line[1:-1]
+    return line
+
+
+def load_texts():
+    """
+    加载文本列表
+    优先从文件加载，如果文件不存在则返回默认列表
+    """
     # 获取资源文件路径
-    text_file_path = get_resource_path(TEXT_FILE)
+    text_file_path = get_text_file_path()
 
     if os.path.exists(text_file_path):
         try:
             with open(text_file_path, 'r', encoding='utf-8') as f:
                 texts = []
                 for line in f:
-                    line = line.strip()
-                    # 移除引号和逗号（如果存在）
-                    if line.startswith('"') and line.endswith('",'):
-                        line = line[1:-2]
-                    elif line.startswith('"') and line.endswith('"'):
-                        line = line[1:-1]
+                    line = parse_text_line(line)
                     if line:
                         texts.append(line)
                 if texts:
@@ -45,4 +60,4 @@ def load_texts():
         except Exception as e:
             print(f"读取文本文件失败: {e}")
 
-    return default_texts
+    return list(DEFAULT_TEXTS)